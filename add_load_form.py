@@ -0,0 +1,368 @@
+# Imports
+import flet as ft
+import asyncio
+import datetime
+from zip_lookup import ZipResolver, zip_cache
+from token_manager import token_manager
+from aggregation import parse_date
+from helper_functions import show_message
+from assets.styles import *
+
+
+"""ADDING NEW LOAD"""   
+
+# Required load values and their form labels
+REQUIRED_LOAD_FIELDS = {
+    'date': 'Date',
+    'company_name': 'Company Name',
+    'driver_name': 'Driver Name',
+    'origin_zip': 'Origin Zip Code',
+    'origin_city': 'Origin City',
+    'origin_state': 'Origin State',
+    'dest_zip': 'Destination Zip Code',
+    'dest_city': 'Destination City',
+    'dest_state': 'Destination State',
+    'miles_driven': 'Miles Driven',
+    'deadhead': 'Deadhead Miles',
+    'total_rate': 'Total Rate ($)',
+}
+
+
+# Define Load Validation and Derivation
+def build_load(values: dict, user_id: str) -> dict:
+    """Validates raw load values and derives total miles and rate per mile.
+
+    Raises ValueError naming the empty or malformed fields.
+    """
+    empty_fields = [label for key, label in REQUIRED_LOAD_FIELDS.items() if values.get(key) in (None, '')]
+    if empty_fields:
+        raise ValueError(f"Missing fields: {', '.join(empty_fields)}")
+
+    try:
+        miles = float(values['miles_driven'])
+        dh = float(values['deadhead'])
+        rate = float(values['total_rate'])
+        date = str(parse_date(values['date']))
+    except ValueError as ex:
+        raise ValueError(f"Invalid value: {ex}")
+    if miles < 0 or dh < 0 or rate < 0:
+        raise ValueError("Miles, deadhead and rate must not be negative")
+
+    total = miles + dh
+    return {
+        'date': date,
+        "company_name": str(values['company_name']).strip(),
+        "driver_name": str(values['driver_name']).strip(),
+        "origin": f"{values['origin_city']}, {values['origin_state']}",
+        "destination": f"{values['dest_city']}, {values['dest_state']}",
+        "miles_driven": miles,
+        "deadhead": dh,
+        "total_miles": total,
+        "total_rate": rate,
+        "rate_per_mile": round(rate / total, 2) if total > 0 else 0,
+        "dispatcher_name": user_id,
+    }
+
+
+# Session storage key of the add-load form
+ADD_LOAD_FORM_KEY = 'add_load_form'
+
+
+class AddLoadForm:
+    """Add-load bottom sheet, created once per page session and reused.
+
+    Every session has its own fields, so concurrent dispatchers never share
+    input, and the sheet is added to page.overlay only once.
+    """
+
+    def __init__(self, page: ft.Page):
+        self.page = page
+        self.owner = None
+        self.refresh_callback = None
+        self.selected_date = None
+        self.zip_resolver = ZipResolver()
+        self.estimates = {}  # field -> last prefilled value, overwritten only while untouched
+
+        # Create form fields
+        digits = ft.InputFilter(regex_string=r"[0-9+]", allow=True, replacement_string="",)
+        self.company_input = ft.TextField(label="Company Name")
+        self.driver_input = ft.TextField(label="Driver Name")
+        self.origin_zip = ft.TextField(label="Origin Zip Code", keyboard_type = ft.KeyboardType.NUMBER, input_filter=digits)
+        self.origin_city = ft.TextField(label="Origin City")
+        self.origin_state = ft.TextField(label="Origin State")
+        self.dest_zip = ft.TextField(label="Destination Zip Code", keyboard_type = ft.KeyboardType.NUMBER, input_filter=digits)
+        self.dest_city = ft.TextField(label="Destination City")
+        self.dest_state = ft.TextField(label="Destination State")
+        self.miles_driven = ft.TextField(label="Miles Driven", keyboard_type=ft.KeyboardType.NUMBER, input_filter=digits)
+        self.deadhead = ft.TextField(label="Deadhead Miles", keyboard_type=ft.KeyboardType.NUMBER, input_filter=digits, value="0")
+        self.total_miles = ft.TextField(label="Total Miles", read_only=True)
+        self.total_rate = ft.TextField(label="Total Rate ($)", keyboard_type=ft.KeyboardType.NUMBER, input_filter=digits)
+        self.rate_per_mile = ft.TextField(label="Rate per Mile ($)", read_only=True)
+        self.lane_benchmark = ft.Text(visible=False, color=defaultFontColor, size=14, font_family='lato-regular')
+
+        # Connect Calculation and ZIP Lookup Events
+        self.miles_driven.on_change = self.update_calculations
+        self.deadhead.on_change = self.update_calculations
+        self.total_rate.on_change = self.update_calculations
+        self.origin_zip.on_change = lambda e: self.fetch_zip_info(self.origin_zip, self.origin_city, self.origin_state)
+        self.dest_zip.on_change = lambda e: self.fetch_zip_info(self.dest_zip, self.dest_city, self.dest_state)
+
+        self.date_picker = ft.DatePicker(
+            first_date=datetime.datetime(year=2020, month=1, day=1),
+            on_change=self.handle_change,
+        )
+        self.bottom_sheet = self.build_sheet()
+        page.overlay.append(self.bottom_sheet)
+
+
+    # Define Bottom Sheet
+    def build_sheet(self) -> ft.BottomSheet:
+        button_style = ft.ButtonStyle(
+            shape=ft.RoundedRectangleBorder(radius=8),
+            text_style=ft.TextStyle(
+                size=16,
+                font_family='lato-regular',
+            )
+        )
+        return ft.BottomSheet(
+            ft.Container(
+                ft.Column(
+                    [
+                        ft.Text("Add New Load", size=20, font_family='lato-bold', color=defaultFontColor),
+                        ft.Divider(),
+                        ft.ElevatedButton(
+                            "Pick date",
+                            on_click=lambda e: self.page.open(self.date_picker),
+                            color=defaultFontColor,
+                            style=ft.ButtonStyle(
+                                text_style=ft.TextStyle(
+                                                    size=16,
+                                                    font_family='lato-regular',
+                                                )),
+                            icon=ft.Icons.CALENDAR_MONTH,
+                        ),
+                        self.company_input,
+                        self.driver_input,
+                        ft.Divider(),
+                        ft.Text("Origin:"),
+                        self.origin_zip,
+                        self.origin_city,
+                        self.origin_state,
+                        ft.Divider(),
+                        ft.Text("Destination:"),
+                        self.dest_zip,
+                        self.dest_city,
+                        self.dest_state,
+                        self.lane_benchmark,
+                        ft.Divider(),
+                        ft.Text("Load Details:"),
+                        self.miles_driven,
+                        self.deadhead,
+                        self.total_miles,
+                        self.total_rate,
+                        self.rate_per_mile,
+                        ft.Divider(),
+                        ft.Row(
+                            [
+                                ft.ElevatedButton("Cancel", on_click=self.close, style=button_style),
+                                ft.ElevatedButton("Save", on_click=self.save_load, style=button_style),
+                            ],
+                            alignment=ft.MainAxisAlignment.END,
+                        ),
+                    ],
+                    scroll=ft.ScrollMode.AUTO,
+                    height=600,
+                ),
+                padding=20,
+            ),
+            open=False,
+        )
+
+
+    # Define Calculations Function
+    def update_calculations(self, e):
+        try:
+            miles = float(self.miles_driven.value or 0)
+            dh = float(self.deadhead.value or 0)
+            total = miles + dh
+            self.total_miles.value = str(total)
+
+            if total > 0 and self.total_rate.value:
+                rate = float(self.total_rate.value or 0)
+                self.rate_per_mile.value = f"{rate / total:.2f}"
+
+            self.page.update()
+        except Exception as ex:
+            show_message(self.page, self.owner.error_snackbar, f"Calculation error: {ex}")
+
+
+    # Define ZIP Lookup Function
+    def fetch_zip_info(self, zip_field, city_field, state_field):
+        zip_code = zip_field.value
+        if not zip_code or len(zip_code) != 5:
+            self.zip_resolver.cancel(zip_field)
+            self.lane_benchmark.visible = False
+            self.page.update()
+            return
+
+        def apply(info):
+            city_field.value = info['city']
+            state_field.value = info['state']
+            self.update_benchmark()
+            self.page.update()
+            self.page.run_task(self.prefill_miles)
+
+        self.zip_resolver.resolve(
+            zip_field,
+            zip_code,
+            on_result=apply,
+            on_error=lambda ex: show_message(self.page, self.owner.error_snackbar, f"Error, could not find specified zip {zip_code}"),
+        )
+
+
+    # Define Lane Benchmark (shown once both ZIPs have resolved)
+    def update_benchmark(self):
+        from lane_index import lane_index
+
+        self.lane_benchmark.visible = False
+        if len(self.origin_zip.value or '') != 5 or len(self.dest_zip.value or '') != 5:
+            return
+        if not (self.origin_city.value and self.origin_state.value and self.dest_city.value and self.dest_state.value):
+            return
+        benchmark = lane_index(self.owner.user_id).benchmark(
+            f"{self.origin_city.value}, {self.origin_state.value}",
+            f"{self.dest_city.value}, {self.dest_state.value}",
+            self.origin_zip.value,
+            self.dest_zip.value,
+        )
+        if benchmark is None:
+            self.lane_benchmark.value = "No history on this lane yet"
+        else:
+            scope = {'city': 'this lane', 'zip3': 'ZIP3 to ZIP3', 'state': 'state to state'}[benchmark['granularity']]
+            recent = ', '.join(f"{rate:.2f}" for rate in benchmark['recent'])
+            self.lane_benchmark.value = (
+                f"Benchmark ({scope}, {benchmark['count']} loads): median $ {benchmark['median']:.2f}/mi, "
+                f"avg $ {benchmark['mean']:.2f}/mi, recent {recent}"
+            )
+        self.lane_benchmark.visible = True
+
+
+    # Define Mileage Prefill (offline ZIP centroid estimates; typed values are kept)
+    async def prefill_miles(self):
+        # NumPy is loaded on the first estimate, not on the login path
+        from mileage import estimate_miles, estimate_deadhead
+
+        origin_zip, dest_zip = self.origin_zip.value or '', self.dest_zip.value or ''
+        if len(origin_zip) != 5 or len(dest_zip) != 5:
+            return
+        miles = await asyncio.to_thread(estimate_miles, origin_zip, dest_zip)
+        if miles is not None:
+            self.prefill(self.miles_driven, 'miles', miles)
+        self.miles_driven.helper_text = None if miles is not None else "No estimate for these ZIPs; enter miles"
+
+        # Deadhead runs from the driver's previous drop to this pickup
+        driver = (self.driver_input.value or '').strip()
+        previous = await self.owner.repository.fetch_latest(driver, self.selected_date) if driver else None
+        if previous is not None:
+            deadhead = await asyncio.to_thread(estimate_deadhead, previous['destination'], origin_zip)
+            if deadhead is not None:
+                self.prefill(self.deadhead, 'deadhead', deadhead, untouched=('', '0'))
+            self.deadhead.helper_text = None if deadhead is not None else f"No estimate from {previous['destination']}"
+        self.update_calculations(None)
+
+
+    def prefill(self, field, key, value, untouched=('',)):
+        if field.value in untouched or field.value == self.estimates.get(key):
+            field.value = self.estimates[key] = str(round(value))
+
+
+    # Define Change of Date Format
+    def handle_change(self, e):
+        self.selected_date = e.control.value.strftime("%B %d, %Y")
+        self.page.update()
+
+
+    # Define Load Save Function
+    async def save_load(self, e):
+        owner = self.owner
+        try:
+            # Validator for empty fields
+            try:
+                new_load = build_load({
+                    'date': self.selected_date,
+                    'company_name': self.company_input.value,
+                    'driver_name': self.driver_input.value,
+                    'origin_zip': self.origin_zip.value,
+                    'origin_city': self.origin_city.value,
+                    'origin_state': self.origin_state.value,
+                    'dest_zip': self.dest_zip.value,
+                    'dest_city': self.dest_city.value,
+                    'dest_state': self.dest_state.value,
+                    'miles_driven': self.miles_driven.value,
+                    'deadhead': self.deadhead.value,
+                    'total_rate': self.total_rate.value,
+                }, owner.user_id)
+            except ValueError as ex:
+                show_message(self.page, owner.error_snackbar, str(ex))
+                return
+            # Adding new load
+            saved_load = await owner.repository.add(new_load)
+
+            # Clear form and hide sheet
+            self.reset_form()
+            self.bottom_sheet.open = False
+            self.page.update()
+            show_message(self.page, owner.success_snackbar, 'New load added successfully.')
+
+            # Refresh the table if a callback is provided
+            if self.refresh_callback:
+                self.refresh_callback(saved_load)
+
+        except Exception:
+            show_message(self.page, owner.error_snackbar, f"Make sure all fields are filled and are correct.")
+
+
+    # Define Reset Form Function
+    def reset_form(self):
+        for field in (self.company_input, self.driver_input, self.origin_zip, self.origin_city, self.origin_state,
+                      self.dest_zip, self.dest_city, self.dest_state, self.miles_driven, self.deadhead,
+                      self.total_miles, self.total_rate, self.rate_per_mile):
+            field.value = ""
+        self.miles_driven.helper_text = self.deadhead.helper_text = None
+        self.lane_benchmark.visible = False
+        self.estimates.clear()
+
+
+    # Define Form Dismissal
+    def close(self, e=None):
+        self.bottom_sheet.open = False
+        self.page.update()
+
+
+    # Define Form Displayment Function
+    def show(self, owner, refresh_callback = None):
+        if not owner.user_id or token_manager.session(self.page) is None:
+            show_message(self.page, owner.error_snackbar, "Please log in to add a load.")
+            self.page.go('/')
+            return
+        self.owner = owner
+        self.refresh_callback = refresh_callback
+        if self.selected_date is None:
+            self.selected_date = getattr(owner, 'selected_date', None)
+        # Build the dispatcher's lane benchmarks and import the ZIP table before both ZIPs are in
+        from lane_index import lane_index
+        self.page.run_thread(lane_index, owner.user_id)
+        self.page.run_thread(zip_cache.ensure_table)
+        if self.bottom_sheet not in self.page.overlay:
+            self.page.overlay.append(self.bottom_sheet)
+        self.bottom_sheet.open = True
+        self.page.update()
+
+
+def add_load(self, page: ft.Page, refresh_callback = None):
+    """Returns a click handler opening the session's add-load form on behalf of a page."""
+    form = page.session.get(ADD_LOAD_FORM_KEY)
+    if form is None:
+        form = AddLoadForm(page)
+        page.session.set(ADD_LOAD_FORM_KEY, form)
+    return lambda e: form.show(self, refresh_callback)
@@ -0,0 +1,166 @@
+# Imports
+import datetime
+
+
+RESOLUTIONS = ('weekday', 'day', 'week', 'month', 'quarter', 'year')
+CHART_RESOLUTIONS = ('day', 'week', 'month', 'quarter', 'year')  # Finest first
+DASHBOARD_RANGES = ('week', 'month', 'quarter', 'year', 'custom')
+MAX_CHART_POINTS = 31
+
+
+# Define Date Parsing
+def parse_date(value) -> datetime.date:
+    """Accepts a date, datetime, ISO 'YYYY-MM-DD[...]' or 'October 18, 2026' string."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return datetime.datetime.strptime(str(value), "%B %d, %Y").date()
+
+
+# Define Bucket Keys
+def bucket_key(value, resolution: str = 'day'):
+    """Maps a date onto its bucket: weekday index, day, or the first day of its week, month, quarter or year."""
+    date = parse_date(value)
+    if resolution == 'weekday':
+        return date.weekday()
+    if resolution == 'day':
+        return date
+    if resolution == 'week':
+        return date - datetime.timedelta(days=date.weekday())
+    if resolution == 'month':
+        return date.replace(day=1)
+    if resolution == 'quarter':
+        return date.replace(month=(date.month - 1) // 3 * 3 + 1, day=1)
+    if resolution == 'year':
+        return date.replace(month=1, day=1)
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+# Define Next Bucket (of a bucket key)
+def next_bucket(key: datetime.date, resolution: str) -> datetime.date:
+    if resolution == 'day':
+        return key + datetime.timedelta(days=1)
+    if resolution == 'week':
+        return key + datetime.timedelta(days=7)
+    months = {'month': 1, 'quarter': 3, 'year': 12}[resolution]
+    month = key.month - 1 + months
+    return key.replace(year=key.year + month // 12, month=month % 12 + 1)
+
+
+def bucket_keys(start, end, resolution: str) -> list:
+    """All bucket keys of start <= date < end, in order, including empty buckets."""
+    keys = []
+    key, end = bucket_key(start, resolution), parse_date(end)
+    while key < end:
+        keys.append(key)
+        key = next_bucket(key, resolution)
+    return keys
+
+
+# Define Dashboard Range Window (end is exclusive)
+def range_window(name: str, today=None, start=None, end=None) -> tuple:
+    """Returns (start, end) of the current week, month, quarter or year, or of a custom inclusive range."""
+    if name == 'custom':
+        start, end = parse_date(start), parse_date(end)
+        if end < start:
+            raise ValueError("The range ends before it starts")
+        return start, end + datetime.timedelta(days=1)
+    if name not in DASHBOARD_RANGES:
+        raise ValueError(f"Unknown range: {name}")
+    start = bucket_key(today or datetime.date.today(), name)
+    return start, next_bucket(start, name)
+
+
+# Define Range Resolution (finest buckets that keep the chart within max_points)
+def range_resolution(start, end, max_points: int = MAX_CHART_POINTS) -> str:
+    """Raises ValueError for ranges too long to chart even by year."""
+    days = (parse_date(end) - parse_date(start)).days
+    for resolution, bucket_days in zip(CHART_RESOLUTIONS, (1, 7, 31, 92, 366)):
+        # The day count rules out long ranges before their buckets are listed
+        if days / bucket_days <= max_points + 1 and len(bucket_keys(start, end, resolution)) <= max_points:
+            return resolution
+    raise ValueError(f"Ranges longer than {max_points} years cannot be charted")
+
+
+class Stats:
+    """Running count/sum/max/mean of one value column."""
+    __slots__ = ('count', 'sum', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def merge(self, count, total, top):
+        """Folds in an already aggregated bucket."""
+        self.count += count
+        self.sum += total
+        self.max = max(self.max, top)
+
+    def add(self, value):
+        self.count += 1
+        if value is not None:
+            self.sum += value
+            self.max = max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'sum': self.sum, 'max': self.max, 'mean': self.mean}
+
+
+# Define Bucketed Aggregation
+def aggregate(rows: list, value_key: str = 'total_rate', date_key: str = 'date', resolution: str = 'weekday') -> dict:
+    """Groups rows by date bucket and returns {bucket: {count, sum, max, mean}}."""
+    buckets = {}
+    for row in rows:
+        key = bucket_key(row[date_key], resolution)
+        stats = buckets.get(key)
+        if stats is None:
+            stats = buckets[key] = Stats()
+        stats.add(row.get(value_key))
+    return {key: stats.as_dict() for key, stats in buckets.items()}
+
+
+# Define Roll-Up of Pre-Aggregated Daily Buckets
+def rollup(daily: list, resolution: str = 'weekday', date_key: str = 'date') -> dict:
+    """Merges {date, count, sum, max} day buckets into coarser buckets; cost is O(days)."""
+    buckets = {}
+    for day in daily:
+        key = bucket_key(day[date_key], resolution)
+        stats = buckets.get(key)
+        if stats is None:
+            stats = buckets[key] = Stats()
+        stats.merge(day['count'], day['sum'], day['max'])
+    return {key: stats.as_dict() for key, stats in buckets.items()}
+
+
+# Define Whole-Window Total of Daily Buckets
+def total(daily: list) -> dict:
+    """Returns count/sum/max/mean over a list of {count, sum, max} buckets."""
+    stats = Stats()
+    for day in daily:
+        stats.merge(day['count'], day['sum'], day['max'])
+    return stats.as_dict()
+
+
+# Define Single-Statistic View of Buckets
+def series(buckets: dict, stat: str) -> dict:
+    """Extracts one statistic, e.g. series(aggregate(rows), 'sum') → {0: 1200.0, ...}."""
+    return {key: values[stat] for key, values in buckets.items()}
+
+
+# Define Optional pandas Path
+def to_dataframe(rows: list):
+    """Builds a pandas DataFrame for heavy analytics; pandas is imported only here."""
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    if 'date' in df:
+        df['date'] = pd.to_datetime(df['date'])
+    return df
@@ -0,0 +1,297 @@
+# Imports
+import threading
+import numpy as np
+from load_store import load_store
+from aggregation import parse_date
+
+
+PERCENTILES = (10, 25, 50, 75, 90)
+GROUPINGS = ('driver', 'company', 'lane')
+HISTORY_COLUMNS = [
+    'id', 'date', 'company_name', 'driver_name', 'origin', 'destination',
+    'miles_driven', 'deadhead', 'total_miles', 'total_rate', 'rate_per_mile'
+]
+NUMERIC_COLUMNS = {
+    'miles': 'miles_driven', 'deadhead': 'deadhead', 'total_miles': 'total_miles',
+    'total_rate': 'total_rate', 'rate_per_mile': 'rate_per_mile'
+}
+
+
+# Define Lane Label
+def lane_label(origin, destination) -> str:
+    return f"{origin} → {destination}"
+
+
+class LoadHistory:
+    """A dispatcher's loads as columnar NumPy arrays, sorted by date.
+
+    Text columns are integer-coded (labels in *_names), so grouping is a
+    bincount rather than a dict walk. Histories are never modified in place:
+    between() slices a date range with a binary search, and inserted(),
+    merged(), removed() and rekeyed() return updated copies, so a report
+    running in another thread always reads a consistent snapshot.
+    """
+
+    def __init__(self, rows: list = None):
+        columns = list(zip(*rows)) if rows else [()] * len(HISTORY_COLUMNS)
+        ids, dates, companies, drivers, origins, destinations = columns[:6]
+
+        self.codes = {by: {} for by in GROUPINGS}  # label -> code, shared by all copies
+        self.ids = np.array(ids, dtype=np.int64)
+        self.dates = np.array(dates, dtype='datetime64[D]')
+        self.company, self.company_names = self.encode('company', companies)
+        self.driver, self.driver_names = self.encode('driver', drivers)
+        self.lane, self.lane_names = self.encode('lane', [lane_label(o, d) for o, d in zip(origins, destinations)])
+        for name, values in zip(NUMERIC_COLUMNS, columns[6:]):
+            setattr(self, name, np.array(values, dtype=np.float64))
+
+
+    def __len__(self):
+        return len(self.dates)
+
+
+    # Define Category Encoding (labels -> integer codes)
+    def encode(self, by: str, labels) -> tuple:
+        index = self.codes[by]
+        codes = np.fromiter((index.setdefault(label, len(index)) for label in labels), dtype=np.int32, count=len(labels))
+        return codes, list(index)
+
+
+    def code(self, by: str, label: str) -> int:
+        index = self.codes[by]
+        if label not in index:
+            index[label] = len(index)
+            getattr(self, f'{by}_names').append(label)
+        return index[label]
+
+
+    # Define Row Selection (slice or mask over every column)
+    def select(self, rows) -> 'LoadHistory':
+        history = LoadHistory.__new__(LoadHistory)
+        for name, value in vars(self).items():
+            history.__dict__[name] = value[rows] if isinstance(value, np.ndarray) else value
+        return history
+
+
+    # Define Date Range Slice (start <= date < end)
+    def between(self, start=None, end=None) -> 'LoadHistory':
+        lo = np.searchsorted(self.dates, np.datetime64(parse_date(start), 'D')) if start else 0
+        hi = np.searchsorted(self.dates, np.datetime64(parse_date(end), 'D')) if end else len(self)
+        return self.select(slice(lo, hi))
+
+
+    """INCREMENTAL UPDATES"""
+
+    def inserted(self, load: dict) -> 'LoadHistory':
+        """Returns a copy with the load added (or replaced) in date order."""
+        return self.merged([load])
+
+
+    def merged(self, loads: list, dropped=()) -> 'LoadHistory':
+        """Returns a copy with the loads added (or replaced) and the dropped ids removed, in one pass."""
+        stale = np.isin(self.ids, [load['id'] for load in loads] + list(dropped))
+        history = self.select(~stale) if stale.any() else self.select(slice(None))
+        if not loads:
+            return history
+        loads = sorted(loads, key=lambda load: parse_date(load['date']))
+        dates = np.array([parse_date(load['date']) for load in loads], dtype='datetime64[D]')
+        positions = np.searchsorted(history.dates, dates, side='right')
+        values = {
+            'ids': [load['id'] for load in loads],
+            'dates': dates,
+            'company': [history.code('company', load['company_name']) for load in loads],
+            'driver': [history.code('driver', load['driver_name']) for load in loads],
+            'lane': [history.code('lane', lane_label(load['origin'], load['destination'])) for load in loads],
+            **{name: [float(load[field] or 0) for load in loads] for name, field in NUMERIC_COLUMNS.items()},
+        }
+        for name, column in values.items():
+            history.__dict__[name] = np.insert(history.__dict__[name], positions, column)
+        return history
+
+
+    def removed(self, load_id) -> 'LoadHistory':
+        keep = self.ids != load_id
+        return self if keep.all() else self.select(keep)
+
+
+    def rekeyed(self, old_id, new_id) -> 'LoadHistory':
+        """Returns a copy with old_id renamed; a server row that arrived first is dropped, not duplicated."""
+        if not (self.ids == old_id).any():
+            return self
+        history = self.removed(new_id).select(slice(None))
+        history.ids = np.where(history.ids == old_id, new_id, history.ids)
+        return history
+
+
+# Define Percentiles of One Column
+def percentiles(values: np.ndarray, qs: tuple = PERCENTILES) -> dict:
+    if not len(values):
+        return {q: 0.0 for q in qs}
+    return dict(zip(qs, np.percentile(values, qs).tolist()))
+
+
+# Define Rate per Mile Distribution
+def rate_distribution(history: LoadHistory, bins: int = 20, qs: tuple = PERCENTILES) -> dict:
+    """Returns mean, percentiles and a histogram of rate per mile."""
+    values = history.rate_per_mile
+    counts, edges = np.histogram(values, bins=bins) if len(values) else (np.zeros(0), np.zeros(0))
+    return {
+        'count': len(values),
+        'mean': float(values.mean()) if len(values) else 0.0,
+        'percentiles': percentiles(values, qs),
+        'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+    }
+
+
+# Define Deadhead Percentage
+def deadhead_ratio(history: LoadHistory, qs: tuple = PERCENTILES) -> dict:
+    """Returns overall deadhead % of total miles and percentiles of the per-load %."""
+    total_miles = history.total_miles.sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_load = np.where(history.total_miles > 0, history.deadhead / history.total_miles * 100, 0.0)
+    return {
+        'percent': float(history.deadhead.sum() / total_miles * 100) if total_miles else 0.0,
+        'percentiles': percentiles(per_load, qs),
+    }
+
+
+# Define Value Ranking (shared by every grouping of the same values)
+def rank_values(values: np.ndarray) -> tuple:
+    """Returns (values in ascending order, rank of each value)."""
+    order = np.argsort(values)
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.arange(len(values))
+    return values[order], ranks
+
+
+# Define Grouped Percentiles (one sort for all groups)
+def group_percentiles(codes: np.ndarray, values: np.ndarray, groups: int, qs: tuple = PERCENTILES,
+                      ranked: tuple = None) -> np.ndarray:
+    """Returns a (groups, len(qs)) array of linearly interpolated percentiles per group."""
+    result = np.zeros((groups, len(qs)))
+    if not len(values):
+        return result
+    ascending, ranks = ranked or rank_values(values)
+    # Sort (group, value rank) packed into one int64: groups in order, values ascending within each
+    size = len(values)
+    packed = np.sort(codes.astype(np.int64) * size + ranks)
+    sorted_values = ascending[packed % size]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    first, last = starts[present], starts[present] + counts[present] - 1
+    for column, q in enumerate(qs):
+        position = first + (last - first) * (q / 100)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, last)
+        fraction = position - below
+        result[present, column] = sorted_values[below] * (1 - fraction) + sorted_values[above] * fraction
+    return result
+
+
+# Define Revenue per Driver, Company or Lane
+def group_revenue(history: LoadHistory, by: str = 'driver', top: int = None, qs: tuple = PERCENTILES,
+                  ranked: tuple = None) -> list:
+    """Returns per-group loads, revenue, miles, rate per mile and its percentiles, by revenue descending."""
+    if by not in GROUPINGS:
+        raise ValueError(f"Unknown grouping: {by}")
+    codes, names = getattr(history, by), getattr(history, f'{by}_names')
+    groups = len(names)
+    loads = np.bincount(codes, minlength=groups)
+    revenue = np.bincount(codes, weights=history.total_rate, minlength=groups)
+    miles = np.bincount(codes, weights=history.total_miles, minlength=groups)
+    deadhead = np.bincount(codes, weights=history.deadhead, minlength=groups)
+    rpm_percentiles = group_percentiles(codes, history.rate_per_mile, groups, qs, ranked)
+
+    order = np.argsort(-revenue, kind='stable')
+    order = order[loads[order] > 0][:top]
+    return [
+        {
+            'key': names[i],
+            'loads': int(loads[i]),
+            'revenue': float(revenue[i]),
+            'miles': float(miles[i]),
+            'rate_per_mile': float(revenue[i] / miles[i]) if miles[i] else 0.0,
+            'deadhead_percent': float(deadhead[i] / miles[i] * 100) if miles[i] else 0.0,
+            'percentiles': dict(zip(qs, rpm_percentiles[i].tolist())),
+        }
+        for i in order
+    ]
+
+
+# Define Window Report (everything the dashboard panels show)
+def analytics_report(history: LoadHistory, start=None, end=None, top: int = 5) -> dict:
+    window = history.between(start, end)
+    ranked = rank_values(window.rate_per_mile)
+    return {
+        'rate_per_mile': rate_distribution(window),
+        'deadhead': deadhead_ratio(window),
+        'drivers': group_revenue(window, 'driver', top, ranked=ranked),
+        'companies': group_revenue(window, 'company', top, ranked=ranked),
+        'lanes': group_revenue(window, 'lane', top, ranked=ranked),
+    }
+
+
+# Define Cached History per Dispatcher (kept current from store events)
+history_cache = {}
+history_lock = threading.Lock()
+
+
+def watch_history(user_id: str, store = load_store) -> dict:
+    """Registers the cache entry and its change listener without building the history.
+
+    Pages subscribing to the store call this first, so the cache already
+    holds a change when their own listeners re-read the analytics.
+    """
+    with history_lock:
+        entry = history_cache.get(user_id)
+        if entry is not None:
+            return entry
+        entry = history_cache[user_id] = {'history': None, 'version': 0, 'lock': threading.Lock()}
+
+        def on_store_change(event, load, old):
+            if event == 'error':
+                return
+            with entry['lock']:
+                entry['version'] += 1
+                history = entry['history']
+                if history is None:
+                    return
+                if event in ('insert', 'update'):
+                    entry['history'] = history.inserted(load)
+                elif event == 'delete':
+                    entry['history'] = history.removed(load['id'])
+                elif event == 'rekey':
+                    entry['history'] = history.rekeyed(old, load['id'])
+                elif event == 'reload':
+                    # Batches (sync pulls, imports) only ever drop temporary ids; re-check those
+                    candidates = set(history.ids[history.ids < 0].tolist()) | {item['id'] for item in load}
+                    present = store.existing_ids(candidates)
+                    entry['history'] = history.merged([item for item in load if item['id'] in present], candidates - present)
+        entry['unsubscribe'] = store.subscribe(user_id, on_store_change)
+        return entry
+
+
+# Define History Release (the dispatcher's last session ended)
+def release_history(user_id: str):
+    with history_lock:
+        entry = history_cache.pop(user_id, None)
+    if entry is not None:
+        entry['unsubscribe']()
+
+
+def load_history(user_id: str, store = load_store) -> LoadHistory:
+    entry = watch_history(user_id, store)
+    with entry['lock']:
+        history, version = entry['history'], entry['version']
+    if history is not None:
+        return history
+    # Built outside the lock so store writers are never held up by a full read
+    history = LoadHistory(store.fetch_columns(user_id, HISTORY_COLUMNS))
+    with entry['lock']:
+        if entry['version'] == version:
+            entry['history'] = history
+    return history
+
+
+load_store.release_hooks.append(release_history)
@@ -0,0 +1,103 @@
+# Imports
+import threading
+from collections import OrderedDict
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
+
+
+CLIENT_POOL_SIZE = 64
+HTTP_TIMEOUT = httpx.Timeout(30, connect=5)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+class ClientPool:
+    """Supabase clients per dispatcher, all sharing one pooled HTTP client.
+
+    Each client carries its own auth headers, so sessions of different
+    dispatchers never overwrite each other's credentials, while keep-alive
+    connections are reused across all of them. Least recently used clients
+    are dropped beyond `size`.
+    """
+
+    def __init__(self, url: str, key: str, size: int = CLIENT_POOL_SIZE):
+        self.url = url
+        self.key = key
+        self.size = size
+        self.lock = threading.Lock()
+        self.clients = OrderedDict()        # user_id -> (client, access_token)
+        self.async_clients = OrderedDict()  # user_id -> (asyncio PostgREST client, access_token)
+        self.http_client = httpx.Client(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, follow_redirects=True)
+        self.async_http_client = None
+
+
+    # Define Client Creation (options are per client; the client mutates its headers)
+    def create(self) -> Client:
+        options = SyncClientOptions(
+            auto_refresh_token=False,
+            persist_session=False,
+            httpx_client=self.http_client,
+        )
+        return create_client(self.url, self.key, options=options)
+
+
+    # Define Unauthenticated Client (sign in, sign up, password reset)
+    def anonymous(self) -> Client:
+        """Returns a new client for one session's auth calls."""
+        return self.create()
+
+
+    # Define Dispatcher Client
+    def get(self, user_id: str, access_token: str) -> Client:
+        """Returns the dispatcher's client, authorized with the given access token."""
+        with self.lock:
+            entry = self.clients.get(user_id)
+            if entry is None:
+                client = self.create()
+            else:
+                client, current_token = entry
+                if current_token == access_token:
+                    self.clients.move_to_end(user_id)
+                    return client
+            client.options.headers['Authorization'] = f'Bearer {access_token}'
+            client.postgrest.auth(access_token)
+            self.clients[user_id] = (client, access_token)
+            self.clients.move_to_end(user_id)
+            while len(self.clients) > self.size:
+                self.clients.popitem(last=False)
+            return client
+
+
+    # Define Dispatcher asyncio PostgREST Client (for async page handlers)
+    def get_async(self, user_id: str, access_token: str) -> AsyncPostgrestClient:
+        """Returns the dispatcher's asyncio PostgREST client, authorized with the given access token."""
+        with self.lock:
+            if self.async_http_client is None:
+                self.async_http_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, follow_redirects=True)
+            entry = self.async_clients.get(user_id)
+            if entry is None:
+                client = AsyncPostgrestClient(
+                    f'{self.url}/rest/v1',
+                    headers={**DEFAULT_POSTGREST_CLIENT_HEADERS, 'apikey': self.key},
+                    http_client=self.async_http_client,
+                )
+            else:
+                client, current_token = entry
+                if current_token == access_token:
+                    self.async_clients.move_to_end(user_id)
+                    return client
+            client.auth(access_token)
+            self.async_clients[user_id] = (client, access_token)
+            self.async_clients.move_to_end(user_id)
+            while len(self.async_clients) > self.size:
+                self.async_clients.popitem(last=False)
+            return client
+
+
+    # Define Client Removal (e.g. on sign out)
+    def discard(self, user_id: str):
+        with self.lock:
+            self.clients.pop(user_id, None)
+            self.async_clients.pop(user_id, None)
@@ -0,0 +1,183 @@
+# Imports
+import re
+import bisect
+import threading
+from load_store import load_store
+from zip_lookup import zip_cache
+from aggregation import parse_date
+from store_index import StoreIndex, IndexRegistry
+
+
+LANE_GRANULARITIES = ('city', 'zip3', 'state')  # Finest first: the benchmark falls back in this order
+LANE_RECENT_RATES = 5
+
+
+# Define Place Normalization ("St. Louis,  mo" -> ('ST LOUIS', 'MO'))
+def place_key(place) -> tuple:
+    city, _, state = str(place or '').rpartition(',')
+    if not city:
+        city, state = state, ''
+    return ' '.join(re.findall(r'[A-Z0-9]+', city.upper())), ''.join(re.findall(r'[A-Z]+', state.upper()))
+
+
+class LaneStats:
+    """Running rate-per-mile statistics of one lane.
+
+    Rates are kept sorted for the median, and (date, id, rate) entries in
+    date order for the most recent rates, so both inserts and deletes are a
+    binary search away.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self.rates = []    # sorted rates per mile
+        self.entries = []  # (date, load id, rate) in date order
+
+
+    def __len__(self):
+        return len(self.rates)
+
+
+    def add(self, entry: tuple):
+        self.total += entry[2]
+        bisect.insort(self.rates, entry[2])
+        bisect.insort(self.entries, entry)
+
+
+    def remove(self, entry: tuple):
+        self.total -= entry[2]
+        del self.rates[bisect.bisect_left(self.rates, entry[2])]
+        del self.entries[bisect.bisect_left(self.entries, entry)]
+
+
+    # Define Summary
+    def summary(self, recent: int = LANE_RECENT_RATES) -> dict:
+        count = len(self.rates)
+        middle = count // 2
+        return {
+            'count': count,
+            'mean': self.total / count,
+            'median': self.rates[middle] if count % 2 else (self.rates[middle - 1] + self.rates[middle]) / 2,
+            'recent': [rate for _, _, rate in self.entries[-recent:]],  # Oldest first
+        }
+
+
+# Define Place ZIP3s (each place's most common ZIP3 among the ZIP cache's known ZIPs)
+def place_zip3s() -> dict:
+    best = {}
+    for city, state, prefix, count in zip_cache.place_zip3s():
+        place = place_key(f"{city}, {state}")
+        if count > best.get(place, (None, 0))[1]:
+            best[place] = (prefix, count)
+    return {place: prefix for place, (prefix, _) in best.items()}
+
+
+class LaneIndex(StoreIndex):
+    """Rate benchmarks of one dispatcher's lanes, at city, ZIP3 and state granularity.
+
+    Loads only store "City, ST", so a place's ZIP3 is the most common prefix
+    of its ZIPs in the ZIP cache; places the cache does not know are left
+    out at that granularity. The place to ZIP3 map is re-read whenever the
+    ZIP cache changes, and loads of places whose ZIP3 moved are re-filed.
+    """
+
+    def __init__(self, store = load_store):
+        super().__init__(store)
+        self.lock = threading.Lock()
+        self.lanes = {granularity: {} for granularity in LANE_GRANULARITIES}  # (origin, destination) -> LaneStats
+        self.docs = {}   # load id -> (entry, lane keys)
+        self.zip3s = {}  # place key -> ZIP3
+        self.zip3s_version = None
+
+
+    # Define Lane Keys of a Place Pair
+    def lane_keys(self, origin, destination, origin_zip: str = None, dest_zip: str = None) -> dict:
+        return self.place_lane_keys(place_key(origin), place_key(destination), origin_zip, dest_zip)
+
+
+    def place_lane_keys(self, origin: tuple, destination: tuple, origin_zip: str = None, dest_zip: str = None) -> dict:
+        origin_zip3 = origin_zip[:3] if origin_zip else self.zip3s.get(origin)
+        dest_zip3 = dest_zip[:3] if dest_zip else self.zip3s.get(destination)
+        return {
+            'city': (origin, destination),
+            'zip3': (origin_zip3, dest_zip3) if origin_zip3 and dest_zip3 else None,
+            'state': (origin[1], destination[1]),
+        }
+
+
+    # Define ZIP3 Map Refresh (one query, only after the ZIP cache changed)
+    def refresh_zip3s(self):
+        version = zip_cache.version
+        if version == self.zip3s_version:
+            return
+        zip3s = place_zip3s()
+        with self.lock:
+            moved = {place for place in zip3s.keys() | self.zip3s.keys() if zip3s.get(place) != self.zip3s.get(place)}
+            self.zip3s, self.zip3s_version = zip3s, version
+            if not moved:
+                return
+            # City lanes list their loads, so only the loads of moved places are visited
+            load_ids = [
+                load_id
+                for (origin, destination), stats in self.lanes['city'].items()
+                if origin in moved or destination in moved
+                for _, load_id, _ in stats.entries
+            ]
+            for load_id in load_ids:
+                entry, keys = self.docs[load_id]
+                self._remove(load_id)
+                self._add(entry, self.place_lane_keys(*keys['city']))
+
+
+    # Define Incremental Updates
+    def add(self, load: dict):
+        self.refresh_zip3s()
+        entry = (str(parse_date(load['date'])), load['id'], float(load['rate_per_mile'] or 0))
+        with self.lock:
+            self._remove(load['id'])
+            self._add(entry, self.lane_keys(load['origin'], load['destination']))
+
+
+    def _add(self, entry: tuple, keys: dict):
+        for granularity, key in keys.items():
+            if key is not None:
+                self.lanes[granularity].setdefault(key, LaneStats()).add(entry)
+        self.docs[entry[1]] = (entry, keys)
+
+
+    def remove(self, load_id):
+        with self.lock:
+            self._remove(load_id)
+
+
+    def _remove(self, load_id):
+        entry, keys = self.docs.pop(load_id, (None, {}))
+        for granularity, key in keys.items():
+            if key is None:
+                continue
+            stats = self.lanes[granularity][key]
+            stats.remove(entry)
+            if not stats:
+                del self.lanes[granularity][key]
+
+
+    # Define Benchmark Lookup
+    def benchmark(self, origin, destination, origin_zip: str = None, dest_zip: str = None,
+                  recent: int = LANE_RECENT_RATES) -> dict | None:
+        """Returns the finest lane with history: count, mean, median and recent rates, or None."""
+        self.refresh_zip3s()
+        keys = self.lane_keys(origin, destination, origin_zip, dest_zip)
+        with self.lock:
+            for granularity in LANE_GRANULARITIES:
+                stats = self.lanes[granularity].get(keys[granularity])
+                if stats:
+                    return {'granularity': granularity, **stats.summary(recent)}
+        return None
+
+
+lane_indexes = IndexRegistry(LaneIndex, ['id', 'date', 'origin', 'destination', 'rate_per_mile'])
+
+
+# Define Per-Dispatcher Index (built from the local replica on first use)
+def lane_index(user_id: str) -> LaneIndex:
+    return lane_indexes.get(user_id)
@@ -0,0 +1,250 @@
+# Imports
+import asyncio
+import logging
+import threading
+from config import SUPABASE_URL, SUPABASE_KEY
+from load_store import load_store, LOAD_COLUMNS
+from aggregation import parse_date
+
+
+REALTIME_JOIN_TIMEOUT = 15  # Seconds to wait for the server to confirm a channel join
+REALTIME_RETRY_DELAY = 30   # Seconds before a failed connect or join is retried
+
+logger = logging.getLogger(__name__)
+
+class LoadFeed:
+    """Base of Loads change feeds.
+
+    Handlers receive (event, record, old_record) with event 'INSERT', 'UPDATE'
+    or 'DELETE', mirroring Supabase Realtime postgres_changes payloads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handlers = {}
+
+
+    # Define Handler Registration
+    def subscribe(self, user_id: str, handler: callable) -> callable:
+        with self.lock:
+            self.handlers.setdefault(user_id, []).append(handler)
+
+        def unsubscribe():
+            with self.lock:
+                if handler in self.handlers.get(user_id, []):
+                    self.handlers[user_id].remove(handler)
+        return unsubscribe
+
+
+    # Define Event Dispatch
+    def dispatch(self, user_id: str | None, event: str, record: dict | None, old_record: dict | None = None):
+        """Delivers an event to a dispatcher's handlers, or to all when the owner is unknown."""
+        if user_id is None:
+            handlers = [handler for handlers in self.handlers.values() for handler in handlers]
+        else:
+            handlers = list(self.handlers.get(user_id, []))
+        for handler in handlers:
+            handler(event, record, old_record)
+
+
+    # Define Remote Watch (no-op for in-process feeds)
+    def watch(self, user_id: str, access_token: str = None):
+        pass
+
+
+    # Define Remote Unwatch (no-op for in-process feeds)
+    def unwatch(self, user_id: str):
+        pass
+
+
+class LocalPublisher(LoadFeed):
+    """In-process stand-in for Supabase Realtime, used in tests and without a database.
+
+    Like Realtime deletes, a DELETE carrying only the old id reaches every dispatcher.
+    """
+
+    # Define Event Publishing
+    def publish(self, event: str, record: dict | None, old_record: dict | None = None):
+        user_id = (record or old_record or {}).get('dispatcher_name')
+        self.dispatch(user_id, event, record, old_record)
+
+
+class SupabaseRealtimeFeed(LoadFeed):
+    """Supabase Realtime postgres_changes feed for the Loads table.
+
+    The websocket clients run on one asyncio loop in a daemon thread. Each
+    dispatcher gets its own client, authorized with their own token, and one
+    channel filtered on dispatcher_name. A client or channel is only kept
+    once it is connected or joined; failed attempts are logged and retried.
+    """
+
+    def __init__(self, url: str, key: str):
+        super().__init__()
+        self.url = url
+        self.key = key
+        self.clients = {}     # user_id -> (client, access_token it is authorized with)
+        self.channels = {}    # user_id -> joined channel
+        self.tokens = {}      # user_id -> latest access token
+        self.watched = set()
+        self.join_locks = {}  # user_id -> asyncio.Lock, used on the loop only
+        self.retrying = set()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True, name='loads-realtime').start()
+
+
+    # Define Remote Watch
+    def watch(self, user_id: str, access_token: str = None):
+        with self.lock:
+            self.watched.add(user_id)
+            if access_token:
+                self.tokens[user_id] = access_token
+        future = asyncio.run_coroutine_threadsafe(self._join(user_id), self.loop)
+        future.add_done_callback(lambda future: self._joined(user_id, future))
+
+
+    # Define Join Failure Handling (logged, retried once per delay)
+    def _joined(self, user_id: str, future):
+        error = None if future.cancelled() else future.exception()
+        if error is None:
+            return
+        with self.lock:
+            if user_id in self.retrying:
+                return
+            self.retrying.add(user_id)
+        logger.warning("Realtime join for %s failed, retrying in %ss: %r", user_id, REALTIME_RETRY_DELAY, error)
+
+        def retry():
+            with self.lock:
+                self.retrying.discard(user_id)
+                if user_id not in self.watched:
+                    return
+            self.watch(user_id)
+
+        timer = threading.Timer(REALTIME_RETRY_DELAY, retry)
+        timer.daemon = True
+        timer.start()
+
+
+    # Define Channel Join
+    async def _join(self, user_id: str):
+        from realtime import AsyncRealtimeClient
+
+        async with self.join_locks.setdefault(user_id, asyncio.Lock()):
+            with self.lock:
+                access_token = self.tokens.get(user_id)
+            client, current_token = self.clients.get(user_id, (None, None))
+            if client is None:
+                client = AsyncRealtimeClient(f'{self.url}/realtime/v1', token=self.key)
+                await client.connect()
+                self.clients[user_id] = (client, None)
+            if access_token and access_token != current_token:
+                await client.set_auth(access_token)
+                self.clients[user_id] = (client, access_token)
+            if user_id in self.channels:
+                return
+
+            # Delete events cannot be filtered server-side; ownership is checked locally
+            channel = client.channel(f'loads:{user_id}')
+            for event in ('INSERT', 'UPDATE'):
+                channel.on_postgres_changes(
+                    event,
+                    schema='public',
+                    table='Loads',
+                    filter=f'dispatcher_name=eq.{user_id}',
+                    callback=lambda payload: self._on_change(user_id, payload),
+                )
+            channel.on_postgres_changes(
+                'DELETE',
+                schema='public',
+                table='Loads',
+                callback=lambda payload: self._on_change(user_id, payload),
+            )
+            try:
+                await self._subscribe(channel)
+            except Exception:
+                # Start over with a new connection on the retry
+                del self.clients[user_id]
+                await client.close()
+                raise
+            self.channels[user_id] = channel
+
+
+    # Define Remote Unwatch (the dispatcher's last session ended)
+    def unwatch(self, user_id: str):
+        with self.lock:
+            self.watched.discard(user_id)
+            self.tokens.pop(user_id, None)
+        asyncio.run_coroutine_threadsafe(self._leave(user_id), self.loop)
+
+
+    # Define Channel Leave (after any join in progress)
+    async def _leave(self, user_id: str):
+        async with self.join_locks.setdefault(user_id, asyncio.Lock()):
+            with self.lock:
+                if user_id in self.watched:
+                    # Signed in again meanwhile
+                    return
+            self.channels.pop(user_id, None)
+            client, _ = self.clients.pop(user_id, (None, None))
+            if client is not None:
+                await client.close()
+
+
+    # Define Channel Subscription (waits for the server's confirmation)
+    async def _subscribe(self, channel):
+        from realtime import RealtimeSubscribeStates
+
+        joined = self.loop.create_future()
+
+        def on_state(state, error):
+            if joined.done():
+                return
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                joined.set_result(None)
+            else:
+                joined.set_exception(error or ConnectionError(f"Channel join ended in state {state}"))
+
+        await channel.subscribe(on_state)
+        await asyncio.wait_for(joined, REALTIME_JOIN_TIMEOUT)
+
+
+    # Define Payload Handling
+    def _on_change(self, user_id: str, payload: dict):
+        data = payload['data']
+        self.dispatch(user_id, data['type'], data.get('record'), data.get('old_record'))
+
+
+# Define Feed Bridging into the Local Replica
+def attach_store(feed: LoadFeed, store, user_id: str) -> callable:
+    """Applies feed events to the local replica, whose listeners update the pages."""
+
+    def handle(event, record, old_record):
+        if event == 'DELETE':
+            store.remove_remote(user_id, (old_record or {}).get('id'))
+        elif record:
+            load = {column: record.get(column) for column in LOAD_COLUMNS}
+            load['date'] = str(parse_date(load['date']))
+            store.apply_remote(user_id, [load])
+
+    return feed.subscribe(user_id, handle)
+
+
+load_feed = SupabaseRealtimeFeed(SUPABASE_URL, SUPABASE_KEY) if SUPABASE_URL and SUPABASE_KEY else LocalPublisher()
+attached_users = {}  # user_id -> detach
+
+
+# Define Realtime Start for a Dispatcher
+def start_realtime(user_id: str, access_token: str = None):
+    """Subscribes the dispatcher's local replica to pushed Loads changes (idempotent)."""
+    if user_id not in attached_users:
+        attached_users[user_id] = attach_store(load_feed, load_store, user_id)
+    load_feed.watch(user_id, access_token)
+
+
+# Define Realtime Stop for a Dispatcher
+def stop_realtime(user_id: str):
+    """Closes the dispatcher's Realtime connection and detaches their local replica."""
+    load_feed.unwatch(user_id)
+    detach = attached_users.pop(user_id, None)
+    if detach:
+        detach()
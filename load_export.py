@@ -0,0 +1,94 @@
+# Imports
+import os
+import csv
+from load_store import LOAD_COLUMNS
+from aggregation import parse_date
+
+
+EXPORT_PAGE_SIZE = 1000
+EXPORT_FORMATS = ('csv', 'parquet')
+
+
+# Define Paged Remote Read
+def iter_remote_pages(client, user_id: str, start=None, end=None, page_size: int = EXPORT_PAGE_SIZE, load_filter=None):
+    """Yields a dispatcher's loads page by page, continuing after the last id seen.
+
+    Keyset paging keeps every request equally cheap however deep the export goes;
+    only one page is held in memory at a time.
+    """
+    last_id = 0
+    while True:
+        if load_filter:
+            query = load_filter.apply(load_filter.select(client, ', '.join(LOAD_COLUMNS)))
+        else:
+            query = client.table('Loads').select(', '.join(LOAD_COLUMNS))
+        query = query.eq('dispatcher_name', user_id)
+        if start:
+            query = query.gte('date', str(start))
+        if end:
+            query = query.lt('date', str(end))
+        rows = query.gt('id', last_id).order('id').limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]['id']
+
+
+# Define CSV Writer
+def write_csv(pages, path: str, on_progress: callable = None) -> int:
+    written = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LOAD_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for rows in pages:
+            writer.writerows(rows)
+            written += len(rows)
+            if on_progress:
+                on_progress(written)
+    return written
+
+
+# Define Parquet Writer (one row group per page)
+def write_parquet(pages, path: str, on_progress: callable = None) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires the 'pyarrow' package")
+
+    schema = pa.schema([
+        ('id', pa.int64()), ('date', pa.date32()), ('company_name', pa.string()),
+        ('driver_name', pa.string()), ('origin', pa.string()), ('destination', pa.string()),
+        ('miles_driven', pa.float64()), ('deadhead', pa.float64()), ('total_miles', pa.float64()),
+        ('total_rate', pa.float64()), ('rate_per_mile', pa.float64()), ('dispatcher_name', pa.string()),
+    ])
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in pages:
+            for row in rows:
+                row['date'] = parse_date(row['date'])
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            written += len(rows)
+            if on_progress:
+                on_progress(written)
+    return written
+
+
+# Define Export
+def export_loads(client, user_id: str, path: str, start=None, end=None, on_progress: callable = None,
+                 load_filter=None, fmt: str = None) -> int:
+    """Streams a dispatcher's loads (optionally start <= date < end) to a CSV or Parquet file.
+
+    fmt is one of EXPORT_FORMATS; without it the path's extension decides,
+    defaulting to CSV. load_filter (a LoadFilter) is applied server-side.
+    Returns the number of rows written; on_progress(rows_written) runs after each page.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.') or 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        fmt = 'csv'
+    pages = iter_remote_pages(client, user_id, start, end, load_filter=load_filter)
+    if fmt == 'parquet':
+        return write_parquet(pages, path, on_progress)
+    return write_csv(pages, path, on_progress)
@@ -0,0 +1,166 @@
+# Imports
+import json
+import asyncio
+import datetime
+from aggregation import parse_date
+from load_search import search_index, matches_query, tokenize, SEARCH_FIELDS, SEARCH_PUSHDOWN, SEARCH_FUNCTION
+
+
+class LoadFilter:
+    """Loads page filter predicates.
+
+    The same predicates compile to PostgREST filters for server queries, to SQL
+    for the local replica and to a Python check for pushed row changes.
+    Dates are inclusive; text filters are case-insensitive substrings and
+    states match the "City, ST" suffix of origin/destination. search is a
+    typo-tolerant query over company, driver, origin and destination.
+    """
+
+    def __init__(self, start_date=None, end_date=None, driver: str = None, company: str = None,
+                 origin_state: str = None, dest_state: str = None, min_rate_per_mile: float = None,
+                 search: str = None):
+        self.start_date = parse_date(start_date) if start_date else None
+        self.end_date = parse_date(end_date) if end_date else None
+        self.driver = driver.strip() if driver and driver.strip() else None
+        self.company = company.strip() if company and company.strip() else None
+        self.origin_state = origin_state.strip().upper() if origin_state and origin_state.strip() else None
+        self.dest_state = dest_state.strip().upper() if dest_state and dest_state.strip() else None
+        self.min_rate_per_mile = float(min_rate_per_mile) if min_rate_per_mile not in (None, '') else None
+        self.search = ' '.join(tokenize(search)) or None
+
+
+    def __bool__(self):
+        return any(value is not None for value in vars(self).values())
+
+
+    def __eq__(self, other):
+        return isinstance(other, LoadFilter) and vars(self) == vars(other)
+
+
+    # Define PostgREST Translation
+    def select(self, client, columns: str = '*'):
+        """Starts a Loads query; searches go through the pg_trgm function when pushed down."""
+        if self.search and SEARCH_PUSHDOWN:
+            return client.rpc(SEARCH_FUNCTION, {'search': self.search}).select(columns)
+        return client.table('Loads').select(columns)
+
+
+    def apply(self, query):
+        """Adds the predicates to a PostgREST select query."""
+        if self.search and not SEARCH_PUSHDOWN:
+            # Substring fallback: every word must appear in one of the searched fields
+            for token in self.search.split():
+                query = query.or_(','.join(f'{field}.ilike.*{token}*' for field in SEARCH_FIELDS))
+        if self.start_date:
+            query = query.gte('date', str(self.start_date))
+        if self.end_date:
+            query = query.lt('date', str(self.end_date + datetime.timedelta(days=1)))
+        if self.driver:
+            query = query.ilike('driver_name', f'*{self.driver}*')
+        if self.company:
+            query = query.ilike('company_name', f'*{self.company}*')
+        if self.origin_state:
+            query = query.ilike('origin', f'*, {self.origin_state}')
+        if self.dest_state:
+            query = query.ilike('destination', f'*, {self.dest_state}')
+        if self.min_rate_per_mile is not None:
+            query = query.gte('rate_per_mile', self.min_rate_per_mile)
+        return query
+
+
+    # Define SQL Translation (local replica)
+    def to_sql(self, user_id: str = None) -> tuple:
+        """Returns (' AND ...' clause, params) for the local loads table."""
+        clauses, params = [], []
+        if self.search:
+            clauses.append("id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(search_index(user_id).search(self.search)))
+        if self.start_date:
+            clauses.append("date >= ?")
+            params.append(str(self.start_date))
+        if self.end_date:
+            clauses.append("date <= ?")
+            params.append(str(self.end_date))
+        if self.driver:
+            clauses.append("driver_name LIKE ?")
+            params.append(f'%{self.driver}%')
+        if self.company:
+            clauses.append("company_name LIKE ?")
+            params.append(f'%{self.company}%')
+        if self.origin_state:
+            clauses.append("origin LIKE ?")
+            params.append(f'%, {self.origin_state}')
+        if self.dest_state:
+            clauses.append("destination LIKE ?")
+            params.append(f'%, {self.dest_state}')
+        if self.min_rate_per_mile is not None:
+            clauses.append("rate_per_mile >= ?")
+            params.append(self.min_rate_per_mile)
+        return ''.join(f" AND {clause}" for clause in clauses), params
+
+
+    # Define Python Check
+    def matches(self, load: dict) -> bool:
+        date = parse_date(load['date'])
+        if self.start_date and date < self.start_date:
+            return False
+        if self.end_date and date > self.end_date:
+            return False
+        if self.driver and self.driver.lower() not in (load.get('driver_name') or '').lower():
+            return False
+        if self.company and self.company.lower() not in (load.get('company_name') or '').lower():
+            return False
+        if self.origin_state and not (load.get('origin') or '').upper().endswith(f', {self.origin_state}'):
+            return False
+        if self.dest_state and not (load.get('destination') or '').upper().endswith(f', {self.dest_state}'):
+            return False
+        if self.min_rate_per_mile is not None and (load.get('rate_per_mile') or 0) < self.min_rate_per_mile:
+            return False
+        if self.search and not matches_query(load, self.search):
+            return False
+        return True
+
+
+class LatestQuery:
+    """Debounced asyncio query runner that only delivers the latest result.
+
+    Each run supersedes the previous one: its task is cancelled whether it
+    is still waiting out the debounce or already awaiting the query.
+    """
+
+    def __init__(self, debounce: float = 0.3):
+        self.debounce = debounce
+        self.task = None
+
+
+    # Define Query Run (awaited on the page's event loop)
+    async def run(self, query: callable, on_result: callable, on_error: callable = None):
+        if self.task and not self.task.done():
+            self.task.cancel()
+        self.task = asyncio.current_task()
+        try:
+            await asyncio.sleep(self.debounce)
+            result = await query()
+        except asyncio.CancelledError:
+            return
+        except Exception as ex:
+            if on_error:
+                on_error(ex)
+            return
+        on_result(result)
+
+
+# Define Remote Keyset Page Query (sync or asyncio client alike)
+def remote_page_query(client, user_id: str, load_filter: LoadFilter = None, cursor: tuple = None, page_size: int = 25,
+                      sort_field: str = 'date', descending: bool = True):
+    """Builds the query for one page of filtered loads ordered by (sort_field, id), after a (value, id) cursor."""
+    load_filter = load_filter or LoadFilter()
+    query = load_filter.apply(load_filter.select(client).eq('dispatcher_name', user_id))
+    if cursor:
+        value, cursor_id = cursor
+        op = 'lt' if descending else 'gt'
+        # Quote the value so commas or parentheses in names don't break the filter
+        value = '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+        query = query.or_(f"{sort_field}.{op}.{value},and({sort_field}.eq.{value},id.{op}.{cursor_id})")
+    query = query.order(sort_field, desc=descending).order('id', desc=descending)
+    return query.limit(page_size)
@@ -0,0 +1,160 @@
+# Imports
+import os
+import csv
+from load_store import load_store
+from zip_lookup import lookup_zip
+from add_load_form import build_load
+from mileage import estimate_zip_miles, suspicious_miles
+
+
+IMPORT_BATCH_SIZE = 500
+
+# Accepted alternative column headers
+COLUMN_ALIASES = {
+    'company': 'company_name',
+    'broker': 'company_name',
+    'driver': 'driver_name',
+    'pickup_zip': 'origin_zip',
+    'delivery_zip': 'dest_zip',
+    'destination_zip': 'dest_zip',
+    'destination_city': 'dest_city',
+    'destination_state': 'dest_state',
+    'miles': 'miles_driven',
+    'rate': 'total_rate',
+}
+
+
+class ImportReport:
+    """Outcome of a bulk import: imported count, per-row errors and warnings."""
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.errors = []
+        self.warnings = []
+
+    def add_error(self, line: int, message: str):
+        self.errors.append((line, message))
+
+    def add_warning(self, line: int, message: str):
+        self.warnings.append((line, message))
+
+    def write_errors(self, path: str):
+        """Writes the per-row errors, then the warnings of imported rows, to a CSV file."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'error'])
+            writer.writerows(self.errors)
+            writer.writerows((line, f"Imported with warning: {message}") for line, message in self.warnings)
+
+
+# Define Header Normalization
+def normalize_header(name) -> str:
+    key = str(name or '').strip().lower().replace(' ', '_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+# Define Streaming Row Readers
+def read_csv_rows(path: str):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [normalize_header(name) for name in next(reader, [])]
+        for values in reader:
+            yield dict(zip(header, values))
+
+
+def read_xlsx_rows(path: str):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Excel import requires the 'openpyxl' package")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [normalize_header(name) for name in next(rows, [])]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(path: str):
+    """Yields one dict per data row, keyed by normalized column name."""
+    if os.path.splitext(path)[1].lower() in ('.xlsx', '.xlsm'):
+        return read_xlsx_rows(path)
+    return read_csv_rows(path)
+
+
+# Define Row Preparation
+def prepare_row(row: dict) -> dict:
+    """Fills origin/destination city and state from ZIP (or "City, ST") when missing."""
+    values = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items()}
+    if values.get('deadhead') in (None, ''):
+        values['deadhead'] = 0
+
+    for prefix, combined in (('origin', 'origin'), ('dest', 'destination')):
+        zip_key, city_key, state_key = f'{prefix}_zip', f'{prefix}_city', f'{prefix}_state'
+        if values.get(zip_key) not in (None, ''):
+            values[zip_key] = str(values[zip_key]).split('.')[0].zfill(5)
+        if values.get(city_key) and values.get(state_key):
+            continue
+        if values.get(combined) and ',' in str(values[combined]):
+            city, state = str(values[combined]).rsplit(',', 1)
+            values[city_key], values[state_key] = city.strip(), state.strip()
+        elif values.get(zip_key):
+            info = lookup_zip(values[zip_key])
+            if info is None:
+                raise ValueError(f"Unknown ZIP code {values[zip_key]}")
+            values[city_key], values[state_key] = info['city'], info['state']
+    return values
+
+
+# Define Miles Check of a Batch (offline estimates from ZIP centroids)
+def check_miles(loads: list, routes: list, report: ImportReport):
+    lines, origin_zips, dest_zips = zip(*routes)
+    estimates = estimate_zip_miles(list(origin_zips), list(dest_zips))
+    flagged = suspicious_miles([load['miles_driven'] for load in loads], estimates)
+    for i in flagged.nonzero()[0]:
+        report.add_warning(lines[i], f"{loads[i]['miles_driven']:.0f} miles; about {estimates[i]:.0f} expected")
+
+
+# Define Bulk Import
+def import_loads(path: str, user_id: str, on_progress: callable = None,
+                 batch_size: int = IMPORT_BATCH_SIZE, store = load_store) -> ImportReport:
+    """Streams a CSV/XLSX file into the local store in multi-row batches.
+
+    Rows are validated with the same rules as the add-load form; invalid rows
+    are skipped and reported. on_progress(report) is called after each batch.
+    """
+    report = ImportReport()
+    batch = []
+    routes = []  # (line, origin ZIP, destination ZIP) of each batched load
+
+    def flush():
+        check_miles(batch, routes, report)
+        store.add_many(batch)
+        report.imported += len(batch)
+        batch.clear()
+        routes.clear()
+        if on_progress:
+            on_progress(report)
+
+    for line, row in enumerate(read_rows(path), start=2):
+        if not any(value not in (None, '') for value in row.values()):
+            continue
+        report.processed += 1
+        try:
+            values = prepare_row(row)
+            batch.append(build_load(values, user_id))
+            routes.append((line, values['origin_zip'], values['dest_zip']))
+        except Exception as ex:
+            report.add_error(line, str(ex))
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    elif on_progress:
+        on_progress(report)
+    return report
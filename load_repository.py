@@ -0,0 +1,104 @@
+# Imports
+import os
+import asyncio
+from config import client_pool
+from load_store import load_store
+from load_filters import remote_page_query
+from aggregation import aggregate, rollup
+from analytics import load_history, analytics_report
+
+
+# Aggregate remote summaries in Postgres (requires PostgREST aggregates: pgrst.db_aggregates_enabled)
+SUMMARY_PUSHDOWN = os.environ.get('SUMMARY_PUSHDOWN', '') == '1'
+REMOTE_PAGE_SIZE = 1000
+
+
+class LoadRepository:
+    """Async data access for one signed-in session, awaited from Flet async handlers.
+
+    Local replica reads and writes run in worker threads (SQLite is
+    blocking); remote reads go through the dispatcher's asyncio PostgREST
+    client. Nothing here blocks the event loop, so independent queries can
+    run concurrently with asyncio.gather.
+    """
+
+    def __init__(self, session, store = load_store):
+        self.session = session
+        self.user_id = session.user_id
+        self.store = store
+
+
+    # Define asyncio Client (re-authorized after token refreshes)
+    @property
+    def rest(self):
+        return client_pool.get_async(self.user_id, self.session.access_token)
+
+
+    """SYNC"""
+
+    async def ensure_initialized(self):
+        """Waits for the first pull of this dispatcher's loads on this device."""
+        await asyncio.to_thread(self.store.ensure_initialized, self.session.client, self.user_id)
+
+
+    def is_initialized(self) -> bool:
+        return self.store.is_initialized(self.user_id)
+
+
+    """READS"""
+
+    async def fetch_page(self, cursor: tuple = None, page_size: int = 25, load_filter=None,
+                         sort_field: str = 'date', descending: bool = True) -> list:
+        """Reads one page from the replica, or from Supabase until the replica has synced."""
+        if self.is_initialized():
+            return await asyncio.to_thread(
+                self.store.fetch_page, self.user_id, cursor, page_size, load_filter, sort_field, descending
+            )
+        query = remote_page_query(self.rest, self.user_id, load_filter, cursor, page_size, sort_field, descending)
+        return (await query.execute()).data
+
+
+    async def fetch_summary(self, start, end, resolution: str = 'day') -> list:
+        return await asyncio.to_thread(self.store.fetch_summary, self.user_id, start, end, resolution)
+
+
+    async def fetch_remote_summary(self, start, end, resolution: str = 'day') -> list:
+        """The buckets of fetch_summary, read from Supabase until the replica has synced."""
+        query = lambda columns: self.rest.table('Loads').select(columns).eq(
+            'dispatcher_name', self.user_id
+        ).gte('date', str(start)).lt('date', str(end))
+        if SUMMARY_PUSHDOWN:
+            daily = (await query('date, count(), total_rate.sum(), total_rate.max()').execute()).data
+            buckets = rollup([{**day, 'sum': day['sum'] or 0, 'max': day['max'] or 0} for day in daily], resolution)
+        else:
+            rows, offset = [], 0
+            while True:
+                page = (await query('date, total_rate').order('id').range(offset, offset + REMOTE_PAGE_SIZE - 1).execute()).data
+                rows.extend(page)
+                if len(page) < REMOTE_PAGE_SIZE:
+                    break
+                offset += REMOTE_PAGE_SIZE
+            buckets = aggregate(rows, resolution=resolution)
+        return [{'date': key, **stats} for key, stats in sorted(buckets.items())]
+
+
+    async def fetch_latest(self, driver_name: str, date=None) -> dict | None:
+        """The driver's latest load on or before a date, from the replica."""
+        return await asyncio.to_thread(self.store.fetch_latest, self.user_id, driver_name, date)
+
+
+    async def fetch_analytics(self, start=None, end=None, top: int = 5) -> dict:
+        """Rate per mile, deadhead and revenue rankings for start <= date < end, from the replica."""
+        return await asyncio.to_thread(
+            lambda: analytics_report(load_history(self.user_id, self.store), start, end, top)
+        )
+
+
+    """WRITES"""
+
+    async def add(self, load: dict) -> dict:
+        return await asyncio.to_thread(self.store.add, load)
+
+
+    async def delete(self, load_id: int):
+        await asyncio.to_thread(self.store.delete, self.user_id, load_id)
@@ -0,0 +1,159 @@
+# Imports
+import os
+import re
+import threading
+from load_store import load_store
+from store_index import StoreIndex, IndexRegistry
+
+
+SEARCH_FIELDS = ['company_name', 'driver_name', 'origin', 'destination']
+SEARCH_THRESHOLD = 0.3  # Trigram similarity for a typo match (pg_trgm's default)
+
+# Push searches down to Postgres (requires SEARCH_FUNCTION_SQL on the database)
+SEARCH_PUSHDOWN = os.environ.get('SEARCH_PUSHDOWN', '') == '1'
+SEARCH_FUNCTION = 'search_loads'
+SEARCH_FUNCTION_SQL = '''
+create extension if not exists pg_trgm;
+create index if not exists loads_search_trgm on "Loads" using gin (
+    (company_name || ' ' || driver_name || ' ' || origin || ' ' || destination) gin_trgm_ops
+);
+create or replace function search_loads(search text) returns setof "Loads"
+language sql stable as $$
+    select * from "Loads"
+    where search <% (company_name || ' ' || driver_name || ' ' || origin || ' ' || destination)
+$$;
+'''
+
+
+# Define Tokenization
+def tokenize(text) -> list:
+    return re.findall(r'[a-z0-9]+', str(text or '').lower())
+
+
+def trigrams(token: str) -> set:
+    """Padded trigrams of a word, as pg_trgm builds them."""
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_tokens(load: dict) -> set:
+    return {token for field in SEARCH_FIELDS for token in tokenize(load.get(field))}
+
+
+# Define Word Match Score (prefix match for search-as-you-type, else trigram similarity)
+def word_score(query_token: str, token: str, query_grams: set = None, shared: int = None) -> float:
+    if token.startswith(query_token):
+        return 1.0
+    if len(query_token) < 3:
+        return 0.0
+    query_grams = query_grams or trigrams(query_token)
+    token_grams = trigrams(token)
+    if shared is None:
+        shared = len(query_grams & token_grams)
+    return shared / (len(query_grams) + len(token_grams) - shared)
+
+
+# Define Single Load Check (for rows pushed while a search is active)
+def matches_query(load: dict, query: str) -> bool:
+    """True if every query word matches some word of the load."""
+    tokens = load_tokens(load)
+    return all(
+        any(word_score(query_token, token) >= SEARCH_THRESHOLD for token in tokens)
+        for query_token in tokenize(query)
+    )
+
+
+class SearchIndex(StoreIndex):
+    """In-memory search index over one dispatcher's loads.
+
+    Words of the searched fields map to load ids (inverted index), and
+    trigrams map to words, so a query word only scores the vocabulary words
+    sharing a trigram with it rather than every load.
+    """
+
+    def __init__(self, store = load_store):
+        super().__init__(store)
+        self.lock = threading.Lock()
+        self.docs = {}      # load id -> words
+        self.postings = {}  # word -> load ids
+        self.grams = {}     # trigram -> words
+
+
+    # Define Incremental Updates
+    def add(self, load: dict):
+        with self.lock:
+            self._remove(load['id'])
+            tokens = load_tokens(load)
+            self.docs[load['id']] = tokens
+            for token in tokens:
+                if token not in self.postings:
+                    self.postings[token] = set()
+                    for gram in trigrams(token):
+                        self.grams.setdefault(gram, set()).add(token)
+                self.postings[token].add(load['id'])
+
+
+    def remove(self, load_id):
+        with self.lock:
+            self._remove(load_id)
+
+
+    def _remove(self, load_id):
+        for token in self.docs.pop(load_id, ()):
+            ids = self.postings[token]
+            ids.discard(load_id)
+            if ids:
+                continue
+            del self.postings[token]
+            for gram in trigrams(token):
+                words = self.grams.get(gram)
+                if words is not None:
+                    words.discard(token)
+                    if not words:
+                        del self.grams[gram]
+
+
+    # Define Query
+    def search(self, query: str, limit: int = None) -> list:
+        """Returns load ids matching every query word, best matches first."""
+        scores = None
+        with self.lock:
+            for query_token in tokenize(query):
+                token_scores = self._match_word(query_token)
+                word_hits = {}
+                for token, score in token_scores.items():
+                    for load_id in self.postings[token]:
+                        if score > word_hits.get(load_id, 0):
+                            word_hits[load_id] = score
+                if scores is None:
+                    scores = word_hits
+                else:
+                    scores = {load_id: scores[load_id] + score for load_id, score in word_hits.items() if load_id in scores}
+                if not scores:
+                    return []
+        if scores is None:
+            return []
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return ranked[:limit] if limit else ranked
+
+
+    def _match_word(self, query_token: str) -> dict:
+        query_grams = trigrams(query_token)
+        shared = {}
+        for gram in query_grams:
+            for token in self.grams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        matches = {}
+        for token, count in shared.items():
+            score = word_score(query_token, token, query_grams, count)
+            if score >= SEARCH_THRESHOLD:
+                matches[token] = score
+        return matches
+
+
+search_indexes = IndexRegistry(SearchIndex, ['id'] + SEARCH_FIELDS)
+
+
+# Define Per-Dispatcher Index (built from the local replica on first use)
+def search_index(user_id: str) -> SearchIndex:
+    return search_indexes.get(user_id)
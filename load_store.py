@@ -0,0 +1,728 @@
+# Imports
+import os
+import json
+import time
+import sqlite3
+import threading
+from postgrest.exceptions import APIError
+from aggregation import parse_date
+
+
+LOAD_STORE_PATH = os.environ.get('LOAD_STORE_PATH', 'loads.sqlite3')
+SYNC_INTERVAL = 30
+SYNC_MAX_BACKOFF = 600  # Seconds; retryable failures back off exponentially up to this
+PULL_PAGE_SIZE = 1000
+RECONCILE_EVERY = 10  # Full id reconciliation (remote deletes) every N syncs
+
+LOAD_FIELDS = [
+    'date', 'company_name', 'driver_name', 'origin', 'destination', 'miles_driven',
+    'deadhead', 'total_miles', 'total_rate', 'rate_per_mile', 'dispatcher_name'
+]
+LOAD_COLUMNS = ['id'] + LOAD_FIELDS
+
+# Server errors that can never succeed as sent; anything else (auth, rate limits, 5xx) stays queued
+REJECTED_STATUSES = (400, 409, 422)
+REJECTED_SQLSTATE_CLASSES = ('22', '23', '42', 'P0')  # Data exceptions, constraints, bad columns, trigger errors
+AUTH_ERROR_CODES = ('42501', 'PGRST3')                # Insufficient privilege (401/403) and JWT errors
+
+# SQL bucket of a daily summary date (first day of its day, week, month, quarter or year)
+SUMMARY_BUCKETS = {
+    'day': "date",
+    'week': "date(date, 'weekday 0', '-6 days')",
+    'month': "strftime('%Y-%m-01', date)",
+    'quarter': "printf('%s-%02d-01', strftime('%Y', date), (CAST(strftime('%m', date) AS INTEGER) - 1) / 3 * 3 + 1)",
+    'year': "strftime('%Y-01-01', date)",
+}
+
+
+# Define Server Error Classification
+def is_auth_error(error: APIError) -> bool:
+    """True for expired or rejected credentials (HTTP 401/403)."""
+    code = error.code
+    return code in (401, 403) or str(code or '').startswith(AUTH_ERROR_CODES)
+
+
+def is_rejection(error: APIError) -> bool:
+    """True for permanent constraint or validation errors, which roll the write back."""
+    code = error.code
+    if isinstance(code, int) or str(code or '').isdigit() and len(str(code)) == 3:
+        # No JSON body (gateway or proxy error page): only the HTTP status is known
+        return int(code) in REJECTED_STATUSES
+    code = str(code or '')
+    if is_auth_error(error):
+        return False
+    if code.startswith('PGRST'):
+        # PGRST1xx request and PGRST2xx schema errors; connection (0xx) and internal (X) ones are transient
+        return code.startswith(('PGRST1', 'PGRST2'))
+    return code.startswith(REJECTED_SQLSTATE_CLASSES)
+
+
+class LoadStore:
+    """Local SQLite replica of dispatchers' loads with an outbox synced to Supabase.
+
+    All reads are served locally. Writes are applied locally at once and queued
+    in the outbox; a background worker pushes them and pulls remote changes.
+    Locally created loads carry a negative id until the server assigns one.
+
+    Subscribers receive (event, load, old) with event one of 'insert',
+    'update' (old is the previous load), 'delete', 'rekey' (old is the
+    temporary id), 'reload' (many rows changed; load is the list of them,
+    empty once a first pull completes) or 'error' (load is a message).
+    """
+
+    def __init__(self, path: str = LOAD_STORE_PATH):
+        self.lock = threading.RLock()
+        self.listeners = {}
+        self.workers = {}
+        self.sync_locks = {}  # user_id -> lock held for one sync cycle
+        self.release_hooks = []  # callables(user_id) dropping in-memory state kept per dispatcher
+        self.on_auth_error = None  # callable(user_id) -> bool, refreshes a rejected access token
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS loads (
+                id INTEGER PRIMARY KEY, date TEXT, company_name TEXT, driver_name TEXT,
+                origin TEXT, destination TEXT, miles_driven REAL, deadhead REAL,
+                total_miles REAL, total_rate REAL, rate_per_mile REAL, dispatcher_name TEXT
+            );
+            CREATE INDEX IF NOT EXISTS loads_dispatcher_date ON loads (dispatcher_name, date, id);
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT, dispatcher_name TEXT,
+                op TEXT, load_id INTEGER, payload TEXT
+            );
+            CREATE TABLE IF NOT EXISTS watermarks (dispatcher_name TEXT PRIMARY KEY, last_id INTEGER);
+        ''')
+        self._create_summary()
+        self._create_initialized()
+        self.db.commit()
+
+
+    # Define Daily Summary Table (backfilled from existing loads on creation)
+    def _create_summary(self):
+        exists = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_summary'"
+        ).fetchone()
+        if exists:
+            return
+        self.db.executescript('''
+            CREATE TABLE daily_summary (
+                dispatcher_name TEXT, date TEXT, count INTEGER, sum REAL, max REAL,
+                PRIMARY KEY (dispatcher_name, date)
+            );
+            INSERT INTO daily_summary
+                SELECT dispatcher_name, date, COUNT(*), COALESCE(SUM(total_rate), 0), COALESCE(MAX(total_rate), 0)
+                FROM loads GROUP BY dispatcher_name, date;
+        ''')
+
+
+    # Define Initialized Dispatchers Table (devices synced before it existed count as initialized)
+    def _create_initialized(self):
+        exists = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'initialized'"
+        ).fetchone()
+        if exists:
+            return
+        self.db.executescript('''
+            CREATE TABLE initialized (dispatcher_name TEXT PRIMARY KEY);
+            INSERT INTO initialized SELECT dispatcher_name FROM watermarks;
+        ''')
+
+
+    """SUBSCRIPTIONS"""
+
+    # Define Listener Registration
+    def subscribe(self, user_id: str, callback: callable) -> callable:
+        """Registers a change listener for a dispatcher; returns an unsubscribe function."""
+        with self.lock:
+            self.listeners.setdefault(user_id, []).append(callback)
+
+        def unsubscribe():
+            with self.lock:
+                if callback in self.listeners.get(user_id, []):
+                    self.listeners[user_id].remove(callback)
+        return unsubscribe
+
+
+    # Define Listener Notification (called without the lock held)
+    def notify(self, user_id: str, event: str, load=None, old=None):
+        for callback in list(self.listeners.get(user_id, [])):
+            try:
+                callback(event, load, old)
+            except Exception:
+                pass
+
+
+    """READS"""
+
+    # Define Keyset Page Read
+    def fetch_page(self, user_id: str, cursor: tuple = None, page_size: int = 25, load_filter=None,
+                   sort_field: str = 'date', descending: bool = True) -> list:
+        """Returns loads ordered by (sort_field, id), continuing after a (value, id) cursor.
+
+        load_filter (a LoadFilter) narrows the rows with the same predicates
+        the Loads page pushes down to PostgREST.
+        """
+        if sort_field not in LOAD_FIELDS:
+            raise ValueError(f"Cannot sort by {sort_field}")
+        sql = f"SELECT {', '.join(LOAD_COLUMNS)} FROM loads WHERE dispatcher_name = ?"
+        args = [user_id]
+        if load_filter:
+            clause, params = load_filter.to_sql(user_id)
+            sql += clause
+            args += params
+        op, direction = ('<', 'DESC') if descending else ('>', 'ASC')
+        if cursor:
+            sql += f" AND ({sort_field} {op} ? OR ({sort_field} = ? AND id {op} ?))"
+            args += [cursor[0], cursor[0], cursor[1]]
+        sql += f" ORDER BY {sort_field} {direction}, id {direction} LIMIT ?"
+        args.append(page_size)
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql, args)]
+
+
+    # Define Driver's Latest Load (on or before a date)
+    def fetch_latest(self, user_id: str, driver_name: str, date=None) -> dict | None:
+        with self.lock:
+            row = self.db.execute(
+                f"SELECT {', '.join(LOAD_COLUMNS)} FROM loads "
+                "WHERE dispatcher_name = ? AND driver_name = ? AND date <= ? ORDER BY date DESC, id DESC LIMIT 1",
+                (user_id, driver_name, str(parse_date(date)) if date else '9999-12-31')
+            ).fetchone()
+        return dict(row) if row else None
+
+
+    # Define Full Read (e.g. to build an in-memory index)
+    def fetch_all(self, user_id: str, columns: list = None) -> list:
+        columns = columns or LOAD_COLUMNS
+        with self.lock:
+            return [
+                dict(row) for row in self.db.execute(
+                    f"SELECT {', '.join(columns)} FROM loads WHERE dispatcher_name = ?", (user_id,)
+                )
+            ]
+
+
+    # Define Columnar Read (plain tuples in date order, for bulk analytics)
+    def fetch_columns(self, user_id: str, columns: list) -> list:
+        with self.lock:
+            cursor = self.db.cursor()
+            cursor.row_factory = None
+            return cursor.execute(
+                f"SELECT {', '.join(columns)} FROM loads WHERE dispatcher_name = ? ORDER BY date, id", (user_id,)
+            ).fetchall()
+
+
+    # Define Bucketed Summary Read (one row per bucket, rolled up in SQLite)
+    def fetch_summary(self, user_id: str, start, end, resolution: str = 'day') -> list:
+        """Returns {date, count, sum, max} per bucket with start <= date < end; date is the bucket's first day."""
+        bucket = SUMMARY_BUCKETS[resolution]
+        with self.lock:
+            return [
+                dict(row) for row in self.db.execute(
+                    f"SELECT {bucket} AS date, SUM(count) AS count, SUM(sum) AS sum, MAX(max) AS max FROM daily_summary "
+                    f"WHERE dispatcher_name = ? AND date >= ? AND date < ? GROUP BY {bucket} ORDER BY 1",
+                    (user_id, str(start), str(end))
+                )
+            ]
+
+
+    # Define Single Read
+    def get(self, load_id: int) -> dict | None:
+        with self.lock:
+            row = self.db.execute(
+                f"SELECT {', '.join(LOAD_COLUMNS)} FROM loads WHERE id = ?", (load_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+
+    # Define Membership Check (which of the given ids are stored)
+    def existing_ids(self, ids) -> set:
+        with self.lock:
+            return {
+                row[0] for row in self.db.execute(
+                    "SELECT id FROM loads WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(list(ids)),)
+                )
+            }
+
+
+    """LOCAL WRITES"""
+
+    # Define Row Upsert (caller holds the lock)
+    def _upsert(self, load: dict):
+        self._delete_row(load['id'])
+        self.db.execute(
+            f"INSERT OR REPLACE INTO loads ({', '.join(LOAD_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(LOAD_COLUMNS))})",
+            [load.get(column) for column in LOAD_COLUMNS]
+        )
+        self._adjust_summary(load, 1)
+
+
+    # Define Row Deletion (caller holds the lock)
+    def _delete_row(self, load_id: int):
+        load = self.get(load_id)
+        if load:
+            self.db.execute("DELETE FROM loads WHERE id = ?", (load_id,))
+            self._adjust_summary(load, -1)
+
+
+    # Define Daily Summary Maintenance (caller holds the lock)
+    def _adjust_summary(self, load: dict, sign: int):
+        """Adds (sign=1) or removes (sign=-1) one load's contribution to its day's bucket."""
+        user_id, date = load['dispatcher_name'], load['date']
+        rate = load.get('total_rate') or 0
+        bucket = self.db.execute(
+            "SELECT count, sum, max FROM daily_summary WHERE dispatcher_name = ? AND date = ?",
+            (user_id, date)
+        ).fetchone()
+        count, total, top = bucket if bucket else (0, 0, 0)
+        count += sign
+        total += sign * rate
+        if count <= 0:
+            self.db.execute("DELETE FROM daily_summary WHERE dispatcher_name = ? AND date = ?", (user_id, date))
+            return
+        if sign > 0:
+            top = max(top, rate)
+        elif rate >= top:
+            # The day's top rate was removed; only that day's loads are rescanned
+            top = self.db.execute(
+                "SELECT COALESCE(MAX(total_rate), 0) FROM loads WHERE dispatcher_name = ? AND date = ?",
+                (user_id, date)
+            ).fetchone()[0]
+        self.db.execute(
+            "INSERT OR REPLACE INTO daily_summary VALUES (?, ?, ?, ?, ?)",
+            (user_id, date, count, total, top)
+        )
+
+
+    # Define Load Creation
+    def add(self, load: dict) -> dict:
+        """Stores a new load locally under a temporary id and queues its insert."""
+        load = {field: load.get(field) for field in LOAD_FIELDS}
+        load['date'] = str(parse_date(load['date']))
+        with self.lock:
+            lowest = self.db.execute("SELECT MIN(id) FROM loads").fetchone()[0] or 0
+            load['id'] = min(lowest, 0) - 1
+            self._upsert(load)
+            self.db.execute(
+                "INSERT INTO outbox (dispatcher_name, op, load_id, payload) VALUES (?, 'insert', ?, ?)",
+                (load['dispatcher_name'], load['id'], json.dumps(load))
+            )
+            self.db.commit()
+        self.notify(load['dispatcher_name'], 'insert', load)
+        self.wake(load['dispatcher_name'])
+        return load
+
+
+    # Define Bulk Load Creation
+    def add_many(self, loads: list) -> list:
+        """Stores several new loads locally and queues them as one multi-row insert."""
+        if not loads:
+            return []
+        loads = [{field: load.get(field) for field in LOAD_FIELDS} for load in loads]
+        user_id = loads[0]['dispatcher_name']
+        with self.lock:
+            lowest = min(self.db.execute("SELECT MIN(id) FROM loads").fetchone()[0] or 0, 0)
+            for offset, load in enumerate(loads, start=1):
+                load['date'] = str(parse_date(load['date']))
+                load['id'] = lowest - offset
+                self._upsert(load)
+            self.db.execute(
+                "INSERT INTO outbox (dispatcher_name, op, load_id, payload) VALUES (?, 'insert_batch', NULL, ?)",
+                (user_id, json.dumps(loads))
+            )
+            self.db.commit()
+        self.notify(user_id, 'reload', loads)
+        self.wake(user_id)
+        return loads
+
+
+    # Define Removal of a Queued Load from a Pending Batch (caller holds the lock)
+    def _cancel_batched_insert(self, user_id: str, load_id: int) -> bool:
+        batches = self.db.execute(
+            "SELECT seq, payload FROM outbox WHERE op = 'insert_batch' AND dispatcher_name = ?", (user_id,)
+        ).fetchall()
+        for seq, payload in batches:
+            loads = json.loads(payload)
+            remaining = [load for load in loads if load['id'] != load_id]
+            if len(remaining) == len(loads):
+                continue
+            if remaining:
+                self.db.execute("UPDATE outbox SET payload = ? WHERE seq = ?", (json.dumps(remaining), seq))
+            else:
+                self.db.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+            return True
+        return False
+
+
+    # Define Load Deletion
+    def delete(self, user_id: str, load_id: int) -> dict | None:
+        """Deletes a load locally and queues the remote delete.
+
+        Deleting a load whose insert has not been pushed yet cancels both.
+        """
+        with self.lock:
+            load = self.get(load_id)
+            if load is None:
+                return None
+            self._delete_row(load_id)
+            pending = self.db.execute(
+                "DELETE FROM outbox WHERE op = 'insert' AND load_id = ?", (load_id,)
+            ).rowcount
+            if not pending and load_id < 0:
+                pending = self._cancel_batched_insert(user_id, load_id)
+            if not pending:
+                self.db.execute(
+                    "INSERT INTO outbox (dispatcher_name, op, load_id, payload) VALUES (?, 'delete', ?, ?)",
+                    (user_id, load_id, json.dumps(load))
+                )
+            self.db.commit()
+        self.notify(user_id, 'delete', load)
+        self.wake(user_id)
+        return load
+
+
+    """REMOTE CHANGES"""
+
+    # Define Remote Upsert
+    def apply_remote(self, user_id: str, loads: list):
+        """Stores loads received from the server and notifies listeners of real changes."""
+        if not loads:
+            return
+        changes = []
+        with self.lock:
+            pending_deletes = {
+                row[0] for row in self.db.execute(
+                    "SELECT load_id FROM outbox WHERE op = 'delete' AND dispatcher_name = ?", (user_id,)
+                )
+            }
+            for load in loads:
+                if load['id'] in pending_deletes:
+                    continue
+                previous = self.get(load['id'])
+                if previous == {column: load.get(column) for column in LOAD_COLUMNS}:
+                    continue
+                self._upsert(load)
+                changes.append((self.get(load['id']), previous))
+            self.db.commit()
+        if len(changes) > 1:
+            self.notify(user_id, 'reload', [load for load, _ in changes])
+        elif changes:
+            load, previous = changes[0]
+            self.notify(user_id, 'insert' if previous is None else 'update', load, previous)
+
+
+    # Define Remote Deletion
+    def remove_remote(self, user_id: str, load_id: int):
+        """Drops a load that no longer exists on the server."""
+        with self.lock:
+            load = self.get(load_id)
+            if load is None or load['dispatcher_name'] != user_id:
+                return
+            self._delete_row(load_id)
+            self.db.commit()
+        self.notify(user_id, 'delete', load)
+
+
+    """SYNCHRONIZATION"""
+
+    # Define Outbox Push
+    def push(self, client, user_id: str):
+        """Sends queued writes in order. Permanent rejections drop the write and
+        roll the local change back; any other error leaves it and everything
+        after it queued, and is raised to the sync worker to retry."""
+        while True:
+            with self.lock:
+                entry = self.db.execute(
+                    "SELECT seq, op, load_id, payload FROM outbox WHERE dispatcher_name = ? ORDER BY seq LIMIT 1",
+                    (user_id,)
+                ).fetchone()
+            if entry is None:
+                return
+            seq, op, load_id, payload = entry
+            load = json.loads(payload)
+
+            try:
+                if op == 'insert':
+                    new_load = {field: load[field] for field in LOAD_FIELDS}
+                    response = client.table('Loads').insert(new_load).execute()
+                elif op == 'insert_batch':
+                    new_loads = [{field: item[field] for field in LOAD_FIELDS} for item in load]
+                    response = client.table('Loads').insert(new_loads).execute()
+                else:
+                    response = client.table('Loads').delete().eq('id', load_id).execute()
+            except APIError as ex:
+                if not is_rejection(ex):
+                    raise
+                self._reject(user_id, seq, op, load, ex)
+                continue
+
+            if op == 'insert':
+                self._confirm_insert(user_id, seq, load, response.data[0])
+            elif op == 'insert_batch':
+                self._confirm_batch(user_id, seq, load, response.data)
+            elif not response.data:
+                # Row level security filters what a delete may touch and answers 200 with no rows
+                self._reject(user_id, seq, op, load, 'no rows were deleted')
+            else:
+                with self.lock:
+                    self.db.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+                    self.db.commit()
+
+
+    # Define Insert Confirmation (temporary id → server id)
+    def _confirm_insert(self, user_id: str, seq: int, load: dict, remote: dict):
+        with self.lock:
+            cancelled = self.db.execute("DELETE FROM outbox WHERE seq = ?", (seq,)).rowcount == 0
+            if cancelled:
+                # Deleted locally while the insert was in flight
+                self.db.execute(
+                    "INSERT INTO outbox (dispatcher_name, op, load_id, payload) VALUES (?, 'delete', ?, ?)",
+                    (user_id, remote['id'], json.dumps(remote))
+                )
+            else:
+                remote['date'] = str(parse_date(remote['date']))
+                self._delete_row(load['id'])
+                self._upsert(remote)
+            self.db.commit()
+        if not cancelled:
+            self.notify(user_id, 'rekey', self.get(remote['id']), load['id'])
+
+
+    # Define Batch Insert Confirmation (rows are returned in insert order)
+    def _confirm_batch(self, user_id: str, seq: int, loads: list, remotes: list):
+        confirmed = []
+        with self.lock:
+            self.db.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+            for load, remote in zip(loads, remotes):
+                if self.get(load['id']) is None:
+                    # Deleted locally while the batch was in flight
+                    self.db.execute(
+                        "INSERT INTO outbox (dispatcher_name, op, load_id, payload) VALUES (?, 'delete', ?, ?)",
+                        (user_id, remote['id'], json.dumps(remote))
+                    )
+                    continue
+                remote['date'] = str(parse_date(remote['date']))
+                self._delete_row(load['id'])
+                self._upsert(remote)
+                confirmed.append(self.get(remote['id']))
+            self.db.commit()
+        self.notify(user_id, 'reload', confirmed)
+
+
+    # Define Rejected Write Rollback
+    def _reject(self, user_id: str, seq: int, op: str, load, error):
+        with self.lock:
+            self.db.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+            if op == 'insert_batch':
+                for item in load:
+                    self._delete_row(item['id'])
+            elif op == 'insert':
+                self._delete_row(load['id'])
+            else:
+                self._upsert(load)
+            self.db.commit()
+        if op == 'insert_batch':
+            self.notify(user_id, 'reload', load)
+            self.notify(user_id, 'error', f"Server rejected an import of {len(load)} loads: {error}")
+            return
+        self.notify(user_id, 'delete' if op == 'insert' else 'insert', load)
+        self.notify(user_id, 'error', f"Server rejected {op} of a load: {error}")
+
+
+    # Define Incremental Pull (by id watermark)
+    def pull(self, client, user_id: str):
+        """Fetches loads created remotely since the last pull, in pages."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT last_id FROM watermarks WHERE dispatcher_name = ?", (user_id,)
+            ).fetchone()
+        last_id = row[0] if row else 0
+
+        while True:
+            response = client.table('Loads').select(', '.join(LOAD_COLUMNS)).eq(
+                'dispatcher_name', user_id
+            ).gt('id', last_id).order('id').limit(PULL_PAGE_SIZE).execute()
+            loads = response.data
+            for load in loads:
+                load['date'] = str(parse_date(load['date']))
+            self.apply_remote(user_id, loads)
+            last_id = loads[-1]['id'] if loads else last_id
+            self._set_watermark(user_id, last_id)
+            if len(loads) < PULL_PAGE_SIZE:
+                self._set_initialized(user_id)
+                return
+
+
+    # Define Watermark Store
+    def _set_watermark(self, user_id: str, last_id: int):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?)", (user_id, last_id))
+            self.db.commit()
+
+
+    # Define First-Use Initialization
+    def is_initialized(self, user_id: str) -> bool:
+        """True once a first pull of this dispatcher's loads has completed on this device."""
+        with self.lock:
+            return self.db.execute(
+                "SELECT 1 FROM initialized WHERE dispatcher_name = ?", (user_id,)
+            ).fetchone() is not None
+
+
+    def _set_initialized(self, user_id: str):
+        """Records a completed first pull; listeners get an empty 'reload' to switch to the replica."""
+        with self.lock:
+            first = self.db.execute(
+                "INSERT OR IGNORE INTO initialized VALUES (?)", (user_id,)
+            ).rowcount
+            self.db.commit()
+        if first:
+            self.notify(user_id, 'reload', [])
+
+
+    def ensure_initialized(self, client, user_id: str):
+        """Blocks on a first pull if this dispatcher has never been synced on this device."""
+        if self.is_initialized(user_id):
+            return
+        try:
+            self.pull(client, user_id)
+        except Exception:
+            pass
+
+
+    # Define Remote Deletion Reconciliation
+    def reconcile(self, client, user_id: str):
+        """Removes synced local loads whose ids no longer exist remotely."""
+        remote_ids = set()
+        start = 0
+        while True:
+            response = client.table('Loads').select('id').eq(
+                'dispatcher_name', user_id
+            ).order('id').range(start, start + PULL_PAGE_SIZE - 1).execute()
+            remote_ids.update(row['id'] for row in response.data)
+            if len(response.data) < PULL_PAGE_SIZE:
+                break
+            start += PULL_PAGE_SIZE
+
+        with self.lock:
+            local_ids = [
+                row[0] for row in self.db.execute(
+                    "SELECT id FROM loads WHERE dispatcher_name = ? AND id > 0", (user_id,)
+                )
+            ]
+        for load_id in local_ids:
+            if load_id not in remote_ids:
+                self.remove_remote(user_id, load_id)
+
+
+    # Define Background Sync Start
+    def start_sync(self, user_id: str, client):
+        """Starts the dispatcher's sync worker, or hands it a newly authorized client."""
+        with self.lock:
+            worker = self.workers.get(user_id)
+            if worker is None:
+                worker = self.workers[user_id] = SyncWorker(self, user_id)
+                worker.start()
+        if worker.client is not client:
+            # Page visits with the same client sync on the regular interval, not at once;
+            # a new client (e.g. a refreshed token) ends any backoff
+            worker.client = client
+            worker.retry_at = 0
+            worker.wake.set()
+        return worker
+
+
+    # Define Sync Stop (the dispatcher's last session ended; the outbox waits for the next one)
+    def stop_sync(self, user_id: str):
+        with self.lock:
+            worker = self.workers.pop(user_id, None)
+        if worker:
+            worker.stop()
+
+
+    # Define Dispatcher Release (their last session ended; the replica itself is kept)
+    def release(self, user_id: str):
+        """Stops the dispatcher's sync and drops the caches and indexes kept for them."""
+        self.stop_sync(user_id)
+        for hook in list(self.release_hooks):
+            hook(user_id)
+        with self.lock:
+            if not self.listeners.get(user_id, True):
+                del self.listeners[user_id]
+
+
+    # Define Per-Dispatcher Sync Lock (a stopping worker never pushes alongside its successor)
+    def sync_lock(self, user_id: str) -> threading.Lock:
+        with self.lock:
+            return self.sync_locks.setdefault(user_id, threading.Lock())
+
+
+    # Define Worker Wake-Up After a Local Write
+    def wake(self, user_id: str):
+        worker = self.workers.get(user_id)
+        if worker:
+            worker.wake.set()
+
+
+class SyncWorker(threading.Thread):
+    """Pushes the outbox and pulls remote changes for one dispatcher.
+
+    Failed syncs are retried with exponential backoff; local writes during a
+    backoff wait for it to end. Auth errors ask the store's on_auth_error
+    hook for a fresh token. A stopped worker finishes its current sync
+    and exits.
+    """
+
+    def __init__(self, store: LoadStore, user_id: str):
+        super().__init__(daemon=True, name=f'load-sync-{user_id}')
+        self.store = store
+        self.user_id = user_id
+        self.client = None
+        self.wake = threading.Event()
+        self.syncs = 0
+        self.failures = 0
+        self.retry_at = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            backoff = self.retry_at - time.monotonic()
+            self.wake.wait(backoff if backoff > 0 else SYNC_INTERVAL)
+            self.wake.clear()
+            if self.stopped.is_set() or self.client is None or time.monotonic() < self.retry_at:
+                continue
+            try:
+                self.sync()
+                self.failures = 0
+            except APIError as ex:
+                if is_auth_error(ex) and self.failures == 0 and self.refresh_token():
+                    # First auth failure: retry at once with the refreshed token
+                    self.failures = 1
+                    self.wake.set()
+                else:
+                    self.back_off()
+            except Exception:
+                # Offline or transient failure; the outbox stays queued
+                self.back_off()
+
+    def sync(self):
+        with self.store.sync_lock(self.user_id):
+            self.store.push(self.client, self.user_id)
+            self.store.pull(self.client, self.user_id)
+            if self.syncs % RECONCILE_EVERY == 0:
+                self.store.reconcile(self.client, self.user_id)
+        self.syncs += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+
+    def refresh_token(self) -> bool:
+        return self.store.on_auth_error is not None and self.store.on_auth_error(self.user_id)
+
+    def back_off(self):
+        self.failures += 1
+        self.retry_at = time.monotonic() + min(SYNC_INTERVAL * 2 ** (self.failures - 1), SYNC_MAX_BACKOFF)
+
+load_store = LoadStore()
@@ -0,0 +1,250 @@
+# Imports
+import flet as ft
+from assets.styles import *
+
+
+# Define Table Columns
+LOAD_COLUMNS = [
+    'Date', 'Company Name', 'Driver Name', 'Origin', 'Destination', 'Miles Driven',
+    'Deadhead', 'Total Miles', 'Total Rate', 'Rate per Mile', 'Actions'
+]
+MILES_COLUMN = LOAD_COLUMNS.index('Miles Driven')
+
+
+# Define Cell Values for a Load
+def load_cell_values(load: dict) -> list:
+    """Returns the displayed text of each data cell for a load."""
+    return [
+        str(load['date']),
+        load['company_name'],
+        load['driver_name'],
+        load['origin'],
+        load['destination'],
+        str(load['miles_driven']),
+        str(load['deadhead']),
+        str(load['total_miles']),
+        load['total_rate'],
+        f"{load['rate_per_mile']:.2f}",
+    ]
+
+
+# Define Sortable Fields (by column index) and their Value Types
+SORT_FIELDS = [
+    'date', 'company_name', 'driver_name', 'origin', 'destination', 'miles_driven',
+    'deadhead', 'total_miles', 'total_rate', 'rate_per_mile'
+]
+NUMERIC_FIELDS = {'miles_driven', 'deadhead', 'total_miles', 'total_rate', 'rate_per_mile'}
+DEFAULT_SORT = ('date', True)  # Newest first, matching the Loads query
+
+
+# Define Row Ordering Key (field value, then id, as in the keyset queries)
+def load_order_key(load: dict, field: str = 'date') -> tuple:
+    value = load.get(field)
+    if field in NUMERIC_FIELDS:
+        value = float(value or 0)
+    else:
+        value = str(value or '')
+    return (value, load['id'] or 0)
+
+
+class LoadTable:
+    """Keyed row model over the Loads DataTable.
+
+    Rows are kept by load id so inserts, deletes and updates touch only the
+    affected DataRow instead of rebuilding the whole table. Each row's typed
+    sort key is cached, so re-sorting only reorders the existing row controls.
+    Loads whose miles look wrong can be flagged with their estimated miles.
+    """
+
+    def __init__(self, on_delete: callable, on_sort: callable = None):
+        self.on_delete = on_delete
+        self.on_sort = on_sort
+        self.loads = {}
+        self.rows = {}
+        self.keys = {}
+        self.flags = {}  # load id -> estimated miles
+        self.sort_field, self.descending = DEFAULT_SORT
+        self.has_more = False
+        self.table = ft.DataTable(
+            sort_column_index=SORT_FIELDS.index(self.sort_field),
+            sort_ascending=not self.descending,
+            columns=[
+                ft.DataColumn(
+                    ft.Text(column, font_family = 'lato-bold', size = buttonFontSize),
+                    numeric = index < len(SORT_FIELDS) and SORT_FIELDS[index] in NUMERIC_FIELDS,
+                    on_sort = self.handle_sort if index < len(SORT_FIELDS) else None,
+                )
+                for index, column in enumerate(LOAD_COLUMNS)
+            ],
+            rows=[],
+        )
+
+
+    def __len__(self):
+        return len(self.rows)
+
+
+    def __contains__(self, load_id):
+        return load_id in self.rows
+
+
+    # Define Header Click
+    def handle_sort(self, e: ft.DataColumnSortEvent):
+        field = SORT_FIELDS[e.column_index]
+        if self.on_sort:
+            self.on_sort(field, not e.ascending)
+        else:
+            self.sort(field, not e.ascending)
+            self.table.update()
+
+
+    # Define Sort Order Change
+    def set_sort(self, field: str, descending: bool):
+        """Changes the sort order used for inserts without reordering rows."""
+        self.sort_field, self.descending = field, descending
+        self.table.sort_column_index = SORT_FIELDS.index(field)
+        self.table.sort_ascending = not descending
+        self.keys = {load_id: load_order_key(load, field) for load_id, load in self.loads.items()}
+
+
+    # Define Client-Side Sort
+    def sort(self, field: str, descending: bool):
+        """Reorders the existing row controls by the cached typed keys."""
+        self.set_sort(field, descending)
+        self.table.rows = sorted(self.table.rows, key=lambda row: self.keys[row.data], reverse=descending)
+
+
+    # Define Ordering Check
+    def precedes(self, key: tuple, other: tuple) -> bool:
+        return key > other if self.descending else key < other
+
+
+    # Define Row Construction
+    def build_row(self, load: dict) -> ft.DataRow:
+        load_id = load.get('id')
+        cells = [
+            ft.DataCell(ft.Text(value, font_family = 'lato-light'))
+            for value in load_cell_values(load)
+        ]
+        self.style_miles(cells[MILES_COLUMN].content, load_id)
+        cells.append(
+            ft.DataCell(
+                ft.ElevatedButton(
+                    "Delete",
+                    on_click=lambda e, load_id = load_id: self.on_delete(load_id),
+                    icon = ft.Icons.DELETE_OUTLINE_ROUNDED,
+                    icon_color = defaultFontColor,
+                    bgcolor=defaultRedButtonColor,
+                    color=defaultFontColor,
+                    style=ft.ButtonStyle(
+                        shape=ft.RoundedRectangleBorder(radius=8),
+                        text_style=ft.TextStyle(
+                            size=buttonFontSize,
+                            font_family='lato-regular',
+                        )
+                    )
+                )
+            )
+        )
+        return ft.DataRow(cells = cells, data = load_id)
+
+
+    # Define Full Replacement
+    def set(self, loads: list):
+        """Replaces all rows, e.g. when the first page is (re)loaded."""
+        self.loads.clear()
+        self.rows.clear()
+        self.keys.clear()
+        self.table.rows = []
+        self.extend(loads)
+
+
+    # Define Page Append
+    def extend(self, loads: list):
+        """Appends rows from the next page, skipping loads already shown."""
+        for load in loads:
+            if load['id'] in self.rows:
+                continue
+            row = self.build_row(load)
+            self.loads[load['id']] = load
+            self.rows[load['id']] = row
+            self.keys[load['id']] = load_order_key(load, self.sort_field)
+            self.table.rows.append(row)
+
+
+    # Define Single Insert
+    def insert(self, load: dict) -> bool:
+        """Inserts one row at its ordered position.
+
+        Loads older than the last loaded row are skipped while more pages
+        remain; they will arrive with pagination.
+        """
+        if load['id'] in self.rows:
+            return self.update(load)
+
+        key = load_order_key(load, self.sort_field)
+        index = len(self.table.rows)
+        for i, row in enumerate(self.table.rows):
+            if self.precedes(key, self.keys[row.data]):
+                index = i
+                break
+        if index == len(self.table.rows) and self.has_more:
+            return False
+
+        row = self.build_row(load)
+        self.loads[load['id']] = load
+        self.rows[load['id']] = row
+        self.keys[load['id']] = key
+        self.table.rows.insert(index, row)
+        return True
+
+
+    # Define Single Removal
+    def remove(self, load_id) -> dict | None:
+        """Removes one row; returns its load, or None if it was not shown."""
+        row = self.rows.pop(load_id, None)
+        if row is None:
+            return None
+        self.table.rows.remove(row)
+        self.keys.pop(load_id, None)
+        return self.loads.pop(load_id)
+
+
+    # Define Id Change (temporary local id → server id)
+    def rekey(self, old_id, load: dict) -> bool:
+        """Replaces the row stored under a temporary id with the confirmed load."""
+        if self.remove(old_id) is None:
+            return False
+        return self.insert(load)
+
+
+    # Define Single Update
+    def update(self, load: dict) -> bool:
+        """Rewrites the cell values of an existing row in place."""
+        row = self.rows.get(load['id'])
+        if row is None:
+            return False
+        self.flags.pop(load['id'], None)
+        if load_order_key(load, self.sort_field) != self.keys[load['id']]:
+            self.remove(load['id'])
+            return self.insert(load)
+        self.loads[load['id']] = load
+        for cell, value in zip(row.cells, load_cell_values(load)):
+            cell.content.value = value
+        self.style_miles(row.cells[MILES_COLUMN].content, load['id'])
+        return True
+
+
+    # Define Suspicious Miles Flags
+    def flag_miles(self, estimates: dict):
+        """Marks the miles of the given loads (load id -> estimated miles) and clears all others."""
+        self.flags = dict(estimates)
+        for load_id, row in self.rows.items():
+            self.style_miles(row.cells[MILES_COLUMN].content, load_id)
+
+
+    def style_miles(self, text: ft.Text, load_id):
+        estimate = self.flags.get(load_id)
+        text.color = None if estimate is None else ft.Colors.RED_400
+        text.tooltip = None if estimate is None else f"Estimated about {estimate:,.0f} mi from the ZIP centroids"
+        text.font_family = 'lato-light' if estimate is None else 'lato-bold'
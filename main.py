@@ -1,4 +1,5 @@
 # Imports
+import sys
 import flet as ft
 from router import Router
 from config import db_init_successful
@@ -12,8 +13,16 @@ if not db_init_successful:
 # New code ends
 
 
+# Define Session End (the token manager is only loaded once someone has logged in)
+def close_session(page: ft.Page):
+    token_manager = sys.modules.get('token_manager')
+    if token_manager:
+        token_manager.token_manager.forget(page.session_id)
+
+
 # Define main function
 def main(page: ft.Page):
+    page.on_close = lambda e: close_session(page)
     app_router = Router(page)
     page.go(INITIAL_ROUTE)
 
@@ -0,0 +1,84 @@
+# Imports
+import numpy as np
+from zip_lookup import zip_cache
+from lane_index import place_key
+
+
+EARTH_RADIUS_MILES = 3958.8
+CIRCUITY_FACTOR = 1.2       # Road miles per great-circle mile on typical US freight lanes
+MILES_TOLERANCE = 0.3       # Relative gap from the estimate at which miles look wrong
+MILES_MIN_DIFFERENCE = 75   # Absolute gap below which short hauls are never flagged
+
+
+# Define Great-Circle Distance (arrays or scalars, degrees in, miles out)
+def haversine_miles(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+# Define Road Miles Estimate
+def road_miles(lat1, lon1, lat2, lon2, circuity: float = CIRCUITY_FACTOR):
+    """Haversine distance scaled by a circuity factor; NaN where a coordinate is unknown."""
+    return haversine_miles(lat1, lon1, lat2, lon2) * circuity
+
+
+# Define Coordinate Arrays (NaN where unknown; each distinct key is looked up once)
+def coordinates(keys: list, known: dict) -> tuple:
+    unique, inverse = np.unique(np.asarray(keys, dtype=str), return_inverse=True)
+    table = np.array([known.get(key, (np.nan, np.nan)) for key in unique], dtype=np.float64).reshape(-1, 2)
+    return table[inverse.ravel(), 0], table[inverse.ravel(), 1]
+
+
+def zip_coordinates(zip_codes: list) -> tuple:
+    return coordinates(zip_codes, zip_cache.centroids(zip_codes))
+
+
+def place_coordinates(places: list) -> tuple:
+    """Coordinates of "City, ST" places, from the centroid of their known ZIPs."""
+    by_key = {place_key(f"{city}, {state}"): (latitude, longitude) for city, state, latitude, longitude in zip_cache.place_centroids()}
+    known = {place: by_key[place_key(place)] for place in set(places) if place_key(place) in by_key}
+    return coordinates(places, known)
+
+
+# Define Single Estimates (for the add-load form)
+def estimate_miles(origin_zip: str, dest_zip: str) -> float | None:
+    """Estimated road miles between two ZIPs, or None if either has no coordinates."""
+    estimate = estimate_zip_miles([origin_zip], [dest_zip])[0]
+    return None if np.isnan(estimate) else float(estimate)
+
+
+def estimate_deadhead(previous_destination: str, origin_zip: str) -> float | None:
+    """Estimated empty miles from a previous drop ("City, ST") to a pickup ZIP."""
+    lat1, lon1 = place_coordinates([previous_destination])
+    lat2, lon2 = zip_coordinates([origin_zip])
+    estimate = road_miles(lat1, lon1, lat2, lon2)[0]
+    return None if np.isnan(estimate) else float(estimate)
+
+
+# Define Bulk Estimates
+def estimate_zip_miles(origin_zips: list, dest_zips: list) -> np.ndarray:
+    return road_miles(*zip_coordinates(origin_zips), *zip_coordinates(dest_zips))
+
+
+def estimate_place_miles(origins: list, destinations: list) -> np.ndarray:
+    return road_miles(*place_coordinates(origins), *place_coordinates(destinations))
+
+
+# Define Suspicious Miles Check
+def suspicious_miles(miles, estimates, tolerance: float = MILES_TOLERANCE,
+                     min_difference: float = MILES_MIN_DIFFERENCE) -> np.ndarray:
+    """Boolean mask of miles too far from their estimate; unknown estimates are never flagged."""
+    miles, estimates = np.asarray(miles, dtype=np.float64), np.asarray(estimates, dtype=np.float64)
+    gap = np.abs(miles - estimates)
+    with np.errstate(invalid='ignore'):
+        return (gap > min_difference) & (gap > tolerance * estimates)
+
+
+def check_loads(loads: list) -> list:
+    """Returns (load, estimated miles) for stored loads whose miles look wrong."""
+    if not loads:
+        return []
+    estimates = estimate_place_miles([load['origin'] for load in loads], [load['destination'] for load in loads])
+    flagged = suspicious_miles([load['miles_driven'] or 0 for load in loads], estimates)
+    return [(loads[i], float(estimates[i])) for i in np.flatnonzero(flagged)]
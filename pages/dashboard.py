@@ -1,45 +1,271 @@
 # Imports
 import flet as ft 
 from flet_route import Params, Basket
-from config import supabase
+from token_manager import token_manager
+from load_repository import LoadRepository
+from load_store import load_store
 from assets.styles import *
-import pandas as pd
+import asyncio
 import datetime
 import math
-from helper_functions import show_message, create_snackbar, create_logo, create_sidebar, add_load, create_header
+from aggregation import total, series, parse_date, bucket_keys, range_window, range_resolution, DASHBOARD_RANGES
+from load_events import start_realtime
+from analytics import watch_history
+from query_cache import dashboard_cache, watch_dashboard_cache
+from helper_functions import show_message, create_snackbar, create_logo, create_sidebar, create_header
+from add_load_form import add_load
+
+
+DASHBOARD_TILE_TIMEOUT = 5  # Seconds before a tile shows its error state
+RANGE_LABELS = {'week': 'This Week', 'month': 'This Month', 'quarter': 'This Quarter', 'year': 'This Year'}
+RESOLUTION_TITLES = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly', 'quarter': 'Quarterly', 'year': 'Yearly'}
 
 
 class DispatcherMain:
     def __init__(self):
         self.error_snackbar = create_snackbar(ft.Colors.RED_600)
         self.success_snackbar = create_snackbar(ft.Colors.GREEN_600)
-        self.supabase = supabase
+        self.supabase = None
+        self.repository = None
+        self.range_name = 'week'
+        self.custom_range = (None, None)
+        self.titles = []
     
     
-    # Create Chart Function
-    def create_weekly_chart(self, agg_function, left_axis_label_func, stroke_color, title):
-        res = self.supabase.table('Loads').select(
-            'date, total_rate'
-        ).gte(
-            'date', str(self.this_monday)
-        ).lt(
-            'date', str(self.next_monday)
-        ).eq(
-            'dispatcher_name', self.user_id
-        ).execute()
-
-        empty_data = {'date': [], 'total_rate': []}
-        df = pd.DataFrame(empty_data)
-
-        df = pd.concat([df, pd.DataFrame(res.data)], ignore_index=True)
-
-        # Data Manipulation
-        df['date'] = pd.to_datetime(df['date'])
-        df['weekday'] = df['date'].dt.weekday
-        daily_totals = df.groupby('weekday')['total_rate'].agg(agg_function).to_dict()
-        
+    # Define Range Selection (bucket size adapts so charts stay within MAX_CHART_POINTS)
+    def set_range(self, name: str, start=None, end=None):
+        """Raises ValueError, leaving the current range, if the dates do not parse or span too long."""
+        window = range_window(name, start=start, end=end)
+        resolution = range_resolution(*window)
+        self.start, self.end = window
+        self.range_name = name
+        if name == 'custom':
+            self.custom_range = (start, end)
+        self.resolution = resolution
+        self.buckets = bucket_keys(self.start, self.end, self.resolution)
+
+
+    def range_label(self) -> str:
+        if self.range_name != 'custom':
+            return RANGE_LABELS[self.range_name]
+        last = self.end - datetime.timedelta(days=1)
+        return f"{self.start.strftime('%b %d, %Y')} – {last.strftime('%b %d, %Y')}"
+
+
+    # Define Cached Range Query (shared by tiles, reused across visits until a write in the window)
+    async def cached(self, name: str, loader: callable):
+        start, end, resolution = self.start, self.end, self.resolution
+        return await dashboard_cache.get(
+            self.user_id, (name, start, end, resolution), start, end, lambda: loader(start, end, resolution)
+        )
+
+
+    # Define Bucketed Summary Fetch (aggregated remotely until the first pull completes)
+    async def fetch_buckets(self):
+        if not self.repository.is_initialized():
+            return await self.cached('remote summary', self.repository.fetch_remote_summary)
+        return await self.cached('summary', self.repository.fetch_summary)
+
+
+    # Define Totals Fetch (count, sum, max) from the range's bucketed summary
+    async def fetch_totals(self):
+        return total(await self.fetch_buckets())
+
+
+    # Define Series Fetch (one value per bucket)
+    async def fetch_series(self, stat: str):
+        buckets = await self.fetch_buckets()
+        return series({parse_date(bucket['date']): bucket for bucket in buckets}, stat)
+
+
+    # Define Rate and Revenue Analytics Fetch (needs every load; None until the first pull completes)
+    async def fetch_range_analytics(self):
+        if not self.repository.is_initialized():
+            return None
+        return await self.cached('analytics', lambda start, end, resolution: self.repository.fetch_analytics(start, end, top=5))
+
+
+    # Define Window Membership of a Load
+    def in_window(self, load: dict | None) -> bool:
+        return load is not None and self.start <= parse_date(load['date']) < self.end
+
+
+    # Define Handling of Local Replica Changes
+    def on_store_change(self, event, load, old):
+        if event == 'reload':
+            # An empty reload marks the first pull as complete: switch every tile to the replica
+            changed = not load or any(self.in_window(item) for item in load)
+        elif event in ('insert', 'delete'):
+            changed = self.in_window(load)
+        elif event == 'update':
+            changed = self.in_window(load) or self.in_window(old)
+        else:
+            changed = False
+        if changed:
+            # The summary store already holds the change; re-reading is a bounded number of buckets
+            self.page.run_task(self.load_stats)
+
+
+    # Define Dashboard Tiles: (slot, loader, render)
+    def tiles(self):
+        resolution, label = RESOLUTION_TITLES[self.resolution], self.range_label()
+        return [
+            (self.count_slot, self.fetch_totals, lambda totals: self.stat_text(totals['count'])),
+            (self.sum_slot, self.fetch_totals, lambda totals: self.stat_text(f"$ {totals['sum']}")),
+            (self.max_slot, self.fetch_totals, lambda totals: self.stat_text(f"$ {totals['max']}")),
+            (self.sum_chart_slot, lambda: self.fetch_series('sum'), lambda values: self.create_chart(
+                values, 'sum', lambda y: f"${int(y/1000)}k", ft.Colors.TEAL, f'{resolution} Total Rate ({label})')),
+            (self.count_chart_slot, lambda: self.fetch_series('count'), lambda values: self.create_chart(
+                values, 'count', lambda y: f"{int(y)}", ft.Colors.BLUE, f'{resolution} Load Volume ({label})')),
+            (self.rate_slot, self.fetch_range_analytics, lambda report: self.rate_panel(report)),
+            (self.drivers_slot, self.fetch_range_analytics, lambda report: self.ranking_panel(report['drivers'])),
+            (self.companies_slot, self.fetch_range_analytics, lambda report: self.ranking_panel(report['companies'])),
+            (self.lanes_slot, self.fetch_range_analytics, lambda report: self.ranking_panel(report['lanes'])),
+        ]
+
+
+    # Define Statistics Loading: every tile fills independently (runs after the view is shown)
+    async def load_stats(self):
+        await asyncio.gather(*(self.fill(*tile) for tile in self.tiles()))
+
+
+    # Define Single Tile Fill (keeps the current content until the new one arrives)
+    async def fill(self, slot, loader, render):
+        window = (self.start, self.end)
+        try:
+            result = await asyncio.wait_for(loader(), DASHBOARD_TILE_TIMEOUT)
+            if window != (self.start, self.end):
+                # The range changed meanwhile; its own fill renders this tile
+                return
+            slot.content = render(result) if result is not None else self.tile_notice('Syncing loads...')
+        except asyncio.TimeoutError:
+            slot.content = self.tile_error('Timed out', slot, loader, render)
+        except Exception:
+            slot.content = self.tile_error('Unavailable', slot, loader, render)
+        self.page.update()
+
+
+    # Define Tile Placeholder
+    def skeleton(self, width, height):
+        return ft.Container(
+            width = width,
+            height = height,
+            bgcolor = ft.Colors.with_opacity(0.1, defaultFontColor),
+            border_radius = 8,
+        )
+
+
+    # Define Tile Notice
+    def tile_notice(self, message):
+        return ft.Text(message, color = defaultFontColor, size=bodyFontSize, font_family='lato-light')
+
+
+    # Define Tile Error State (with retry)
+    def tile_error(self, message, slot, loader, render):
+        return ft.Row(
+            controls = [
+                ft.Icon(ft.Icons.ERROR_OUTLINE_ROUNDED, color = defaultFontColor),
+                ft.Text(message, color = defaultFontColor, size=bodyFontSize, font_family='lato-light'),
+                ft.IconButton(
+                    icon = ft.Icons.REFRESH_ROUNDED,
+                    tooltip = 'Retry',
+                    icon_color = defaultFontColor,
+                    on_click = lambda e: self.page.run_task(self.fill, slot, loader, render),
+                ),
+            ],
+            alignment = ft.MainAxisAlignment.CENTER,
+        )
+
+
+    # Define Statistic Text
+    def stat_text(self, value):
+        return ft.Text(value, color = defaultFontColor, size=statsFontsize, font_family='lato-bold')
+
+
+    # Define Rate per Mile and Deadhead Panel
+    def rate_panel(self, report):
+        rates = report['rate_per_mile']['percentiles']
+        deadhead = report['deadhead']
+        return ft.Column(
+            controls = [
+                self.stat_text(f"$ {rates[50]:.2f}/mi"),
+                ft.Text(f"p25 $ {rates[25]:.2f} · p75 $ {rates[75]:.2f}", color = defaultFontColor, size=bodyFontSize, font_family='lato-light'),
+                ft.Text(f"Deadhead {deadhead['percent']:.1f}%", color = defaultFontColor, size=bodyFontSize, font_family='lato-regular'),
+            ],
+            alignment = ft.MainAxisAlignment.CENTER,
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing = 4,
+        )
+
+
+    # Define Revenue Ranking Panel (drivers, companies or lanes)
+    def ranking_panel(self, groups):
+        if not groups:
+            return ft.Text('No loads yet', color = defaultFontColor, size=bodyFontSize, font_family='lato-light')
+        return ft.Column(
+            controls = [
+                ft.Row(
+                    controls = [
+                        ft.Text(group['key'], expand = True, no_wrap = True, overflow = ft.TextOverflow.ELLIPSIS,
+                                color = defaultFontColor, size=bodyFontSize, font_family='lato-regular'),
+                        ft.Text(f"$ {group['revenue']:,.0f}", color = defaultFontColor, size=bodyFontSize, font_family='lato-bold'),
+                        ft.Text(f"$ {group['rate_per_mile']:.2f}/mi", color = defaultFontColor, size=bodyFontSize, font_family='lato-light'),
+                    ],
+                    spacing = 10,
+                )
+                for group in groups
+            ],
+            spacing = 4,
+        )
+
+
+    # Define Tile Title (follows the selected range)
+    def title_text(self, template: str):
+        title = ft.Text(template.format(range=self.range_label()), color = defaultFontColor, size=bodyFontSize, font_family='lato-light')
+        self.titles.append((title, template))
+        return title
+
+
+    def update_titles(self):
+        for title, template in self.titles:
+            title.value = template.format(range=self.range_label())
+
+
+    # Define Analytics Panel Container
+    def analytics_panel(self, title, slot):
+        return ft.Container(
+            expand = 2,
+            padding = 15,
+            bgcolor = defaultButtonColor,
+            border_radius = 10,
+            content = ft.Column(
+                controls = [
+                    title,
+                    slot,
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            ),
+        )
+
+
+    # Define Bucket Axis Label
+    def bucket_label(self, key: datetime.date) -> str:
+        if self.resolution == 'day':
+            return key.strftime('%a') if self.range_name == 'week' else key.strftime('%b %d')
+        if self.resolution == 'week':
+            return key.strftime('%b %d')
+        if self.resolution == 'month':
+            return key.strftime('%b') if self.range_name == 'year' else key.strftime("%b '%y")
+        if self.resolution == 'quarter':
+            return f"Q{(key.month - 1) // 3 + 1} '{key.strftime('%y')}"
+        return key.strftime('%Y')
+
+
+    # Create Chart Function (one point per bucket of the selected range)
+    def create_chart(self, bucket_totals, agg_function, left_axis_label_func, stroke_color, title):
+
         # Set max y-axis value
-        max_rate = max(daily_totals.values(), default=0)
+        max_rate = max(bucket_totals.values(), default=0)
         if agg_function == 'sum':
             y_max_chart = math.ceil(max_rate / 1000) * 1000 if max_rate > 0 else 1000 
         elif agg_function == 'count':
@@ -48,8 +274,8 @@ class DispatcherMain:
 
         # Data Points
         data_points = [
-            ft.LineChartDataPoint(x=i, y=daily_totals.get(i, 0))
-            for i in range(7)
+            ft.LineChartDataPoint(x=i, y=bucket_totals.get(key, 0))
+            for i, key in enumerate(self.buckets)
         ]
 
         # Define Line Data
@@ -69,15 +295,12 @@ class DispatcherMain:
             )
         )
 
-        # Axes
+        # Axes (about eight labels at most, whatever the bucket count)
+        label_step = math.ceil(len(self.buckets) / 8)
         bottom_axis_labels = [
-            ft.ChartAxisLabel(value=0, label=ft.Text("Mon")),
-            ft.ChartAxisLabel(value=1, label=ft.Text("Tue")),
-            ft.ChartAxisLabel(value=2, label=ft.Text("Wed")),
-            ft.ChartAxisLabel(value=3, label=ft.Text("Thu")),
-            ft.ChartAxisLabel(value=4, label=ft.Text("Fri")),
-            ft.ChartAxisLabel(value=5, label=ft.Text("Sat")),
-            ft.ChartAxisLabel(value=6, label=ft.Text("Sun")),
+            ft.ChartAxisLabel(value=i, label=ft.Text(self.bucket_label(key)))
+            for i, key in enumerate(self.buckets)
+            if i % label_step == 0
         ]
         left_axis_labels = [
             ft.ChartAxisLabel(
@@ -97,20 +320,15 @@ class DispatcherMain:
             min_y=0,
             max_y=y_max_chart,
             min_x=0,
-            max_x=6,
+            max_x=max(len(self.buckets) - 1, 1),
         )
 
-        return ft.Container(
-            expand = 5,
-            height = 300,
-            padding = 30,
-            content=ft.Column([
+        return ft.Column([
                 ft.Text(title, font_family='lato-bold', size=20),
                 chart
             ],
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,              
-            spacing=10),
-        )
+            spacing=10)
         
     
     # Define Page View
@@ -124,43 +342,115 @@ class DispatcherMain:
         page.fonts = {'lato-bold': 'assets/Lato-Bold.ttf', 'lato-regular': 'assets/Lato-Regular.ttf',
                       'lato-light': 'assets/Lato-Light.ttf'}
         
-        # Retrieve Values from Client Storage
-        self.user_id = page.client_storage.get('user_id')
-        access_token = page.client_storage.get('access_token')
-        refresh_token = page.client_storage.get('refresh_token')
+        # Retrieve the Session (cached per page session, refreshed in the background)
+        session = token_manager.session(page)
         
         # Log out User if not Logged in
-        if not access_token or not refresh_token or not self.user_id:
+        if session is None:
             show_message(page, self.error_snackbar, "Session expired. Please log in again.")
             page.go('/')
             return
+        self.user_id = session.user_id
+        access_token = session.access_token
         
         
-        today = datetime.date.today()
-        date_since_monday = today.weekday()
-        self.this_monday = today - datetime.timedelta(days=date_since_monday)
-        self.next_monday = self.this_monday + datetime.timedelta(days=7)
+        # Get the Dispatcher's Authorized Client
+        self.supabase = session.client
+
+        # Start Background Sync of the Local Replica
+        self.repository = LoadRepository(session)
+        load_store.start_sync(self.user_id, self.supabase)
+        start_realtime(self.user_id, access_token)
         
         
-        # Define Load Count
-        def count_loads(self, this_monday, next_monday):
-            n_loads = self.supabase.table('Loads').select('*', count='exact').gte('date', str(this_monday)).lt('date', str(next_monday)).eq('dispatcher_name', self.user_id).execute()    
-            return n_loads.count
+        # Selected Range (kept across visits in this session)
+        self.set_range(self.range_name, *self.custom_range)
         
-    
-        # Define Rate Sum
-        def sum_weekly_rate(self, this_monday, next_monday):
-            res = self.supabase.table('Loads').select('total_rate').gte('date', str(this_monday)).lt('date', str(next_monday)).eq('dispatcher_name', self.user_id).execute()    
-            return sum(row['total_rate'] for row in res.data if row['total_rate'] is not None)
         
-        
-        # Define Rate Sum
-        def top_rate(self, this_monday, next_monday):
-            rates = self.supabase.table('Loads').select('total_rate').gte('date', str(this_monday)).lt('date', str(next_monday)).eq('dispatcher_name', self.user_id).execute()    
-            return max([row['total_rate'] for row in rates.data if row['total_rate'] is not None], default=0)
+        # Range Statistics: placeholders, filled in by load_stats once the view is shown
+        self.page = page
+        self.titles = []
+        self.count_slot = ft.Container(content = self.skeleton(120, statsFontsize))
+        self.sum_slot = ft.Container(content = self.skeleton(160, statsFontsize))
+        self.max_slot = ft.Container(content = self.skeleton(160, statsFontsize))
+        self.sum_chart_slot = ft.Container(expand = 5, height = 300, padding = 30, content = self.skeleton(None, 240))
+        self.count_chart_slot = ft.Container(expand = 5, height = 300, padding = 30, content = self.skeleton(None, 240))
+        self.charts_row = ft.Row(expand=6, controls=[self.sum_chart_slot, self.count_chart_slot])
+        self.rate_slot = ft.Container(content = self.skeleton(160, statsFontsize))
+        self.drivers_slot = ft.Container(content = self.skeleton(None, 120))
+        self.companies_slot = ft.Container(content = self.skeleton(None, 120))
+        self.lanes_slot = ft.Container(content = self.skeleton(None, 120))
+        self.analytics_row = ft.Container(
+            expand = 3,
+            padding = ft.padding.symmetric(horizontal = 30),
+            content = ft.Row(
+                spacing = 30,
+                controls = [
+                    self.analytics_panel(self.title_text('Rate per Mile {range}'), self.rate_slot),
+                    self.analytics_panel(self.title_text('Top Drivers by Revenue'), self.drivers_slot),
+                    self.analytics_panel(self.title_text('Top Companies by Revenue'), self.companies_slot),
+                    self.analytics_panel(self.title_text('Top Lanes by Revenue'), self.lanes_slot),
+                ],
+            ),
+        )
+
+        # Follow Changes Pushed into the Local Replica (caches invalidated first)
+        watch_history(self.user_id)
+        watch_dashboard_cache(self.user_id)
+        session.listen('dashboard', self.on_store_change)
             
         
-        # Weekly Statistics Container
+        # Define Range Change
+        async def change_range(e):
+            custom = range_dropdown.value == 'custom'
+            range_from.visible = range_to.visible = custom
+            if custom:
+                await apply_custom_range()
+                return
+            self.set_range(range_dropdown.value)
+            await refresh_range()
+
+
+        async def apply_custom_range(e=None):
+            try:
+                parse_date(range_from.value), parse_date(range_to.value)
+            except ValueError:
+                # Wait until both dates parse
+                page.update()
+                return
+            try:
+                self.set_range('custom', range_from.value, range_to.value)
+            except ValueError as ex:
+                # Reversed or too long to chart
+                range_to.error_text = str(ex)
+                page.update()
+                return
+            range_to.error_text = None
+            await refresh_range()
+
+
+        async def refresh_range():
+            self.update_titles()
+            page.update()
+            await self.load_stats()
+
+
+        # Range Selector
+        range_dropdown = ft.Dropdown(
+            label = "Range",
+            width = 160,
+            value = self.range_name,
+            options = [ft.dropdown.Option(key = name, text = name.title()) for name in DASHBOARD_RANGES],
+            on_change = change_range,
+        )
+        range_from = ft.TextField(label = "From (YYYY-MM-DD)", width = 170, value = self.custom_range[0],
+                                  visible = self.range_name == 'custom', on_submit = apply_custom_range, on_blur = apply_custom_range)
+        range_to = ft.TextField(label = "To (YYYY-MM-DD)", width = 170, value = self.custom_range[1],
+                                visible = self.range_name == 'custom', on_submit = apply_custom_range, on_blur = apply_custom_range)
+        range_row = ft.Row(controls = [range_dropdown, range_from, range_to], spacing = 10)
+        
+        
+        # Range Statistics Container
         weekly_stats = ft.Container(
             expand = 2,
             padding = 30,
@@ -174,8 +464,8 @@ class DispatcherMain:
                         border_radius = 10,
                         content = ft.Column(
                             controls = [    
-                                ft.Text('Total Loads This Week', color = defaultFontColor, size=bodyFontSize, font_family='lato-light'),
-                                ft.Text(count_loads(self, self.this_monday, self.next_monday), color = defaultFontColor, size=statsFontsize, font_family='lato-bold'),
+                                self.title_text('Total Loads {range}'),
+                                self.count_slot,
                             ],
                             alignment = ft.MainAxisAlignment.CENTER,
                             horizontal_alignment=ft.CrossAxisAlignment.CENTER
@@ -188,8 +478,8 @@ class DispatcherMain:
                         border_radius = 10,
                         content = ft.Column(
                             controls = [    
-                                ft.Text('Total Rate This Week', color = defaultFontColor, size=bodyFontSize, font_family='lato-light'),
-                                ft.Text(f'$ {sum_weekly_rate(self, self.this_monday, self.next_monday)}', color = defaultFontColor, size=statsFontsize, font_family='lato-bold'),
+                                self.title_text('Total Rate {range}'),
+                                self.sum_slot,
                             ],
                             alignment = ft.MainAxisAlignment.CENTER,
                             horizontal_alignment=ft.CrossAxisAlignment.CENTER
@@ -202,8 +492,8 @@ class DispatcherMain:
                         border_radius = 10,
                         content = ft.Column(
                             controls = [    
-                                ft.Text('Top Rate of This Week', color = defaultFontColor, size=bodyFontSize, font_family='lato-light'),
-                                ft.Text(f'$ {top_rate(self, self.this_monday, self.next_monday)}', color = defaultFontColor, size=statsFontsize, font_family='lato-bold'),
+                                self.title_text('Top Rate {range}'),
+                                self.max_slot,
                             ],
                             alignment = ft.MainAxisAlignment.CENTER,
                             horizontal_alignment=ft.CrossAxisAlignment.CENTER
@@ -229,6 +519,10 @@ class DispatcherMain:
         )
         
 
+        page.run_task(self.load_stats)
+        if not self.repository.is_initialized():
+            page.run_task(self.repository.ensure_initialized)
+
         return ft.View(
             '/dashboard',
             bgcolor = defaultBackgroundColor,
@@ -262,14 +556,10 @@ class DispatcherMain:
                                 controls = [
                                     create_header('Dashboard', add_load(self, page)),
                                     ft.Divider(),
+                                    range_row,
                                     weekly_stats,
-                                    ft.Row(
-                                        expand=8,
-                                        controls = [
-                                            self.create_weekly_chart('sum', lambda y: f"${int(y/1000)}k", ft.Colors.TEAL, 'Daily Total Rate (Current Week)'),
-                                            self.create_weekly_chart('count', lambda y: f"{int(y)}", ft.Colors.BLUE, 'Daily Load Volume (Current Week)')
-                                        ]
-                                    )
+                                    self.charts_row,
+                                    self.analytics_row
                                 ],
                                 expand=True
                             )
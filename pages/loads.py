@@ -1,16 +1,44 @@
 # Imports
 import flet as ft
 from flet_route import Params, Basket
-from config import supabase
+from token_manager import token_manager
+from load_store import load_store
+from load_events import start_realtime
+import os
+import asyncio
 import datetime
-from helper_functions import show_message, create_snackbar, create_logo, create_sidebar, add_load, create_header
+from helper_functions import show_message, create_snackbar, create_logo, create_sidebar, create_header
+from add_load_form import add_load
+from load_table import LoadTable, DEFAULT_SORT
+from load_import import import_loads
+from load_export import export_loads, EXPORT_FORMATS
+from load_filters import LoadFilter, LatestQuery
+from load_repository import LoadRepository
+from load_search import search_index
+from aggregation import parse_date
 from assets.styles import *
 
+
+PAGE_SIZES = [10, 25, 50, 100]
+DEFAULT_PAGE_SIZE = 25
+
+
 class MyLoads:
     def __init__(self):
-        self.supabase = supabase
+        self.supabase = None
+        self.repository = None
         self.user_id = None
         self.selected_date = datetime.date.today()
+        self.page_size = DEFAULT_PAGE_SIZE
+        self.cursor = None
+        self.has_more = False
+        self.loading = False
+        self.prefetch = None
+        self.load_filter = LoadFilter()
+        self.sort = DEFAULT_SORT
+        self.filter_query = LatestQuery()
+        self.file_picker = ft.FilePicker()
+        self.export_picker = ft.FilePicker()
         self.error_snackbar = create_snackbar(ft.Colors.RED_600)
         self.success_snackbar = create_snackbar(ft.Colors.GREEN_600)
     
@@ -24,92 +52,76 @@ class MyLoads:
         page.fonts = {'lato-bold': 'assets/Lato-Bold.ttf', 'lato-regular': 'assets/Lato-Regular.ttf',
                       'lato-light': 'assets/Lato-Light.ttf'}
         
-        # Retrieve Values from Client Storage
-        self.user_id = page.client_storage.get('user_id')
-        access_token = page.client_storage.get('access_token')
-        refresh_token = page.client_storage.get('refresh_token')
+        # Retrieve the Session (cached per page session, refreshed in the background)
+        session = token_manager.session(page)
         
         # Log out User if not Logged in
-        if not access_token or not refresh_token or not self.user_id:
+        if session is None:
             show_message(page, self.error_snackbar, "Session expired. Please log in again.")
             page.go('/')
             return
+        self.user_id = session.user_id
+        access_token = session.access_token
         
-        # Set the Session
-        self.supabase.auth.set_session(access_token, refresh_token)
-        self.supabase.postgrest.auth(access_token)
+        # Get the Dispatcher's Authorized Client
+        self.supabase = session.client
+
+        # Start Background Sync of the Local Replica
+        self.repository = LoadRepository(session)
+        load_store.start_sync(self.user_id, self.supabase)
+        start_realtime(self.user_id, access_token)
+        page.run_thread(search_index, self.user_id)
         
         
-        # Define Load Fetching from Database
-        def fetch_loads():
+        # Define Load Fetching (keyset pagination on the sort column, id). Served from the local
+        # replica; filtered and ordered on the server until this device has pulled its first copy.
+        async def fetch_loads(cursor=None, page_size=None, load_filter=None, sort=None):
+            load_filter = self.load_filter if load_filter is None else load_filter
+            sort_field, descending = sort or self.sort
+            return await self.repository.fetch_page(cursor, page_size or self.page_size, load_filter, sort_field, descending)
+
+
+        # Define Background Prefetch of the Next Page
+        def start_prefetch():
+            if self.prefetch:
+                self.prefetch[1].cancel()
+            self.prefetch = None
+            if self.has_more:
+                key = (self.cursor, self.load_filter, self.sort)
+                self.prefetch = (key, asyncio.ensure_future(
+                    fetch_loads(self.cursor, self.page_size, self.load_filter, self.sort)))
+
+
+        # Define Cursor Bookkeeping for a Fetched Page
+        def accept_page(loads):
+            self.has_more = len(loads) == self.page_size
+            if loads:
+                self.cursor = (loads[-1][self.sort[0]], loads[-1]['id'])
+            start_prefetch()
+            return loads
+
+
+        # Define Page Retrieval (uses the prefetched page when it matches)
+        async def next_page():
             try:
-                response = self.supabase.table("Loads").select("*").eq("dispatcher_name", self.user_id).order('date', desc=True).limit(10).execute()
-                loads_data = response.data
-                return loads_data
+                if self.prefetch and self.prefetch[0] == (self.cursor, self.load_filter, self.sort):
+                    loads = await self.prefetch[1]
+                else:
+                    loads = await fetch_loads(self.cursor)
             except Exception as e:
                 show_message(page, self.error_snackbar, f'Fetch error: {e}')
+                self.has_more = False
                 return []
-        
-        
-        # Define Table Display 
-        def populate_table():
-            loads = fetch_loads()
-            rows = []
-            # Loop through loads
-            for load in loads:
-                load_id = load.get('id')
-                # Insert load into the table
-                rows.append(
-                    ft.DataRow(
-                        cells = [
-                            ft.DataCell(ft.Text(str(load['date']), font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(load['company_name'], font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(load['driver_name'], font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(load['origin'], font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(load['destination'], font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(str(load['miles_driven']), font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(str(load['deadhead']), font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(str(load['total_miles']), font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(load['total_rate'], font_family = 'lato-light')),
-                            ft.DataCell(ft.Text(f"{load['rate_per_mile']:.2f}", font_family = 'lato-light')),
-                            ft.DataCell(
-                                ft.ElevatedButton(
-                                    "Delete",
-                                    on_click=lambda e, load_id = load_id: delete_alert_dialog(load_id),
-                                    icon = ft.Icons.DELETE_OUTLINE_ROUNDED,
-                                    icon_color = defaultFontColor,
-                                    bgcolor=defaultRedButtonColor,
-                                    color=defaultFontColor,
-                                    style=ft.ButtonStyle(
-                                        shape=ft.RoundedRectangleBorder(radius=8),
-                                        text_style=ft.TextStyle(
-                                            size=buttonFontSize,
-                                            font_family='lato-regular',
-                                        )
-                                    )
-                                    
-                                )
-                            ),
-                        ]
-                    )
-                )
-            return rows
-        
-        
+            return accept_page(loads)
+
+
         # Define Alert Dialog for Load Deletion
         def delete_alert_dialog(load_id):
             
-            # Handle Deletion
-            def handle_delete(e):
-                try:
-                    self.supabase.postgrest.auth(access_token)
-                    self.supabase.table('Loads').delete().eq('id', load_id).execute()
-                    existing_loads.rows = populate_table()
-                    existing_loads.update()
-                    page.close(dialog)
-                    show_message(page, self.success_snackbar, 'Load was deleted successfully')
-                except Exception as ex:
-                    show_message(page, self.error_snackbar, f'Error deleting a load: {ex}')
+            # Handle Deletion (applied locally at once, pushed by the sync worker)
+            async def handle_delete(e):
+                page.close(dialog)
+                await self.repository.delete(load_id)
             
             
             # Handle Dismissal
@@ -131,39 +143,408 @@ class MyLoads:
         
         
             
+        # Define Column Sorting: reorder the held rows when all are loaded,
+        # otherwise re-query the first page in the new order. Like every change
+        # to the table, it runs on the page's event loop.
+        def handle_sort(field, descending):
+            page.run_task(apply_sort, field, descending)
+
+
+        async def apply_sort(field, descending):
+            self.sort = (field, descending)
+            if load_table.has_more:
+                await refresh_loads()
+                return
+            load_table.sort(field, descending)
+            if len(load_table):
+                last = load_table.loads[load_table.table.rows[-1].data]
+                self.cursor = (last[field], last['id'])
+            existing_loads.update()
+
+
         # Define Table for Existing Loads
-        existing_loads = ft.DataTable(
-            sort_column_index=0,
-            sort_ascending=True,
-            columns=[
-                ft.DataColumn(ft.Text('Date', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Company Name', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Driver Name', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Origin', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Destination', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Miles Driven', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Deadhead', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Total Miles', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Total Rate', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Rate per Mile', font_family = 'lato-bold', size = buttonFontSize)),
-                ft.DataColumn(ft.Text('Actions', font_family = 'lato-bold', size = buttonFontSize)),
-            ],
-            rows=populate_table()
-        )
+        load_table = LoadTable(on_delete=delete_alert_dialog, on_sort=handle_sort)
+        existing_loads = load_table.table
+
+
+        # Define Table Display 
+        async def populate_table():
+            self.cursor = None
+            if self.prefetch:
+                self.prefetch[1].cancel()
+            self.prefetch = None
+            loads = await next_page()
+            load_table.set_sort(*self.sort)
+            load_table.set(loads)
+            load_table.has_more = self.has_more
 
 
         # Define Refresh Function for Existing Loads
-        def refresh_loads():
-            existing_loads.rows = populate_table()
-            existing_loads.update()
+        async def refresh_loads():
+            await populate_table()
+            load_more_button.visible = self.has_more
+            page.update()
+
+
+        # Define First Load (runs on the event loop after the view is shown). Until this device has
+        # pulled its first copy the page is read from Supabase; the pull runs in the background.
+        async def first_load():
+            task_status.value = "Loading loads..."
+            task_progress.visible = True
+            page.update()
+            try:
+                await refresh_loads()
+            finally:
+                task_progress.visible = False
+                page.update()
+            if not self.repository.is_initialized():
+                page.run_task(self.repository.ensure_initialized)
+
+
+        # Define Application of Local Replica Changes (events arrive on sync, realtime and
+        # worker threads; the table is only changed on the page's event loop, between pages)
+        def on_store_change(event, load, old):
+            page.run_task(apply_store_change, event, load, old)
+
+
+        def apply_row(load):
+            if not self.load_filter.matches(load):
+                return load_table.remove(load['id']) is not None
+            return load_table.insert(load)
+
+
+        async def apply_store_change(event, load, old):
+            changed = False
+            if event == 'error':
+                show_message(page, self.error_snackbar, load)
+                return
+            if event == 'reload' and not self.repository.is_initialized():
+                # Batches of a first pull are not shown until it completes (an empty 'reload')
+                return
+            if event == 'reload' and not load:
+                # The first pull completed: switch from the remote pages to the replica
+                await refresh_loads()
+                return
+            if event == 'reload':
+                # Batches only ever drop temporary ids; re-check those and the batch's own,
+                # keeping the pages already scrolled through
+                candidates = {load_id for load_id in load_table.loads if load_id < 0} | {item['id'] for item in load}
+                present = load_store.existing_ids(candidates)
+                for load_id in candidates - present:
+                    changed = load_table.remove(load_id) is not None or changed
+                for item in load:
+                    if item['id'] in present:
+                        changed = apply_row(item) or changed
+            elif event in ('insert', 'update'):
+                changed = apply_row(load)
+            elif event == 'delete':
+                changed = load_table.remove(load['id']) is not None
+            elif event == 'rekey':
+                changed = load_table.rekey(old, load)
+            if changed:
+                existing_loads.update()
+
+        session.listen('loads', on_store_change)
+
+
+        # Define Loading of the Next Page
+        async def load_more(e=None):
+            if self.loading or not self.has_more:
+                return
+            self.loading = True
+            try:
+                load_table.extend(await next_page())
+                load_table.has_more = self.has_more
+                load_more_button.visible = self.has_more
+                page.update()
+            finally:
+                self.loading = False
+
+
+        # Define Infinite Scroll
+        async def handle_scroll(e: ft.OnScrollEvent):
+            if e.pixels >= e.max_scroll_extent - 200:
+                await load_more()
+
+
+        # Define Page Size Change
+        async def change_page_size(e):
+            self.page_size = int(e.control.value)
+            await refresh_loads()
+
+
+        # Define Filter Application (debounced; a newer filter discards stale results)
+        def show_filtered(load_filter, loads):
+            if load_filter != self.load_filter:
+                return
+            self.cursor = None
+            load_table.set_sort(*self.sort)
+            load_table.set(accept_page(loads))
+            load_table.has_more = self.has_more
+            load_more_button.visible = self.has_more
+            page.update()
+
+
+        def filter_failed(ex):
+            show_message(page, self.error_snackbar, f'Fetch error: {ex}')
+
+
+        async def apply_filter(e=None):
+            try:
+                load_filter = LoadFilter(
+                    search=filter_search.value,
+                    start_date=filter_from.value,
+                    end_date=filter_to.value,
+                    driver=filter_driver.value,
+                    company=filter_company.value,
+                    origin_state=filter_origin.value,
+                    dest_state=filter_dest.value,
+                    min_rate_per_mile=filter_rate.value,
+                )
+            except ValueError:
+                # Wait until the typed value parses
+                return
+            if load_filter == self.load_filter:
+                return
+            self.load_filter = load_filter
+            await self.filter_query.run(
+                lambda: fetch_loads(None, self.page_size, load_filter),
+                on_result=lambda loads: show_filtered(load_filter, loads),
+                on_error=filter_failed,
+            )
+
+
+        async def clear_filter(e):
+            for field in filter_fields:
+                field.value = ""
+            page.update()
+            await apply_filter()
+
+
+        # Define Bulk Import
+        def run_import(path):
+            def progress(report):
+                task_status.value = f"Imported {report.imported} of {report.processed} rows..."
+                page.update()
+
+            task_progress.visible = True
+            page.update()
+            try:
+                report = import_loads(path, self.user_id, on_progress=progress)
+            except Exception as ex:
+                show_message(page, self.error_snackbar, f'Import failed: {ex}')
+                return
+            finally:
+                task_progress.visible = False
+                page.update()
+
+            if report.errors or report.warnings:
+                error_path = f"{os.path.splitext(path)[0]}.errors.csv"
+                report.write_errors(error_path)
+                show_message(page, self.error_snackbar,
+                             f'Imported {report.imported} loads; {len(report.errors)} rows failed, '
+                             f'{len(report.warnings)} have suspicious miles (see {error_path})')
+            else:
+                show_message(page, self.success_snackbar, f'Imported {report.imported} loads')
+
+
+        def handle_file_picked(e: ft.FilePickerResultEvent):
+            if e.files and e.files[0].path:
+                page.run_thread(run_import, e.files[0].path)
+
+
+        self.file_picker.on_result = handle_file_picked
+        if self.file_picker not in page.overlay:
+            page.overlay.append(self.file_picker)
+        import_button = ft.TextButton(
+            "Import",
+            icon=ft.Icons.UPLOAD_FILE_ROUNDED,
+            on_click=lambda e: self.file_picker.pick_files(
+                dialog_title="Import loads",
+                allowed_extensions=['csv', 'xlsx'],
+            ),
+            style=ft.ButtonStyle(
+                color=defaultFontColor,
+                text_style=ft.TextStyle(size=buttonFontSize, font_family='lato-regular')
+            )
+        )
+        task_status = ft.Text("", font_family='lato-light', size=smallFontSize)
+        task_progress = ft.Row(
+            controls=[ft.ProgressRing(width=16, height=16, stroke_width=2), task_status],
+            visible=False,
+        )
+
+
+        # Define Streaming Export
+        def run_export(path, start, end, fmt):
+            def progress(written):
+                task_status.value = f"Exported {written} loads..."
+                page.update()
+
+            task_progress.visible = True
             page.update()
+            try:
+                written = export_loads(self.supabase, self.user_id, path, start, end, on_progress=progress,
+                                       load_filter=self.load_filter, fmt=fmt)
+                show_message(page, self.success_snackbar, f'Exported {written} loads to {path}')
+            except Exception as ex:
+                show_message(page, self.error_snackbar, f'Export failed: {ex}')
+            finally:
+                task_progress.visible = False
+                page.update()
+
+
+        # Define Export Options Dialog
+        def export_dialog(e):
+            start_input = ft.TextField(label="From (YYYY-MM-DD)", width=200)
+            end_input = ft.TextField(label="To (YYYY-MM-DD)", width=200)
+            format_dropdown = ft.Dropdown(
+                label="Format",
+                width=200,
+                value=EXPORT_FORMATS[0],
+                options=[ft.dropdown.Option(fmt) for fmt in EXPORT_FORMATS],
+            )
+
+            def handle_export(e):
+                try:
+                    start = parse_date(start_input.value) if start_input.value else None
+                    # The "To" date is inclusive
+                    end = parse_date(end_input.value) + datetime.timedelta(days=1) if end_input.value else None
+                except ValueError:
+                    show_message(page, self.error_snackbar, 'Dates must be in YYYY-MM-DD format')
+                    return
+                page.close(dialog)
+                fmt = format_dropdown.value
+                self.export_picker.on_result = lambda r: (
+                    page.run_thread(run_export, r.path, start, end, fmt) if r.path else None
+                )
+                self.export_picker.save_file(
+                    dialog_title="Export loads",
+                    file_name=f"loads.{fmt}",
+                    allowed_extensions=[fmt],
+                )
+
+            dialog = ft.AlertDialog(
+                modal=True,
+                title=ft.Text("Export loads", font_family = 'lato-regular'),
+                content=ft.Column([start_input, end_input, format_dropdown], tight=True),
+                actions=[
+                    ft.TextButton("Export", on_click=handle_export),
+                    ft.TextButton("Cancel", on_click=lambda e: page.close(dialog)),
+                ],
+                actions_alignment=ft.MainAxisAlignment.END
+            )
+            page.open(dialog)
+
+
+        if self.export_picker not in page.overlay:
+            page.overlay.append(self.export_picker)
+        export_button = ft.TextButton(
+            "Export",
+            icon=ft.Icons.DOWNLOAD_ROUNDED,
+            on_click=export_dialog,
+            style=ft.ButtonStyle(
+                color=defaultFontColor,
+                text_style=ft.TextStyle(size=buttonFontSize, font_family='lato-regular')
+            )
+        )
+
+
+        # Define Suspicious Miles Check (every stored load against its offline estimate)
+        def run_miles_check():
+            from mileage import check_loads
+
+            task_status.value = "Checking miles..."
+            task_progress.visible = True
+            page.update()
+            try:
+                flagged = check_loads(load_store.fetch_all(self.user_id, ['id', 'origin', 'destination', 'miles_driven']))
+            except Exception as ex:
+                show_message(page, self.error_snackbar, f'Miles check failed: {ex}')
+                return
+            finally:
+                task_progress.visible = False
+                page.update()
+            page.run_task(show_flags, {load['id']: estimate for load, estimate in flagged})
+            if flagged:
+                show_message(page, self.error_snackbar, f'{len(flagged)} loads have suspicious miles (flagged in red)')
+            else:
+                show_message(page, self.success_snackbar, 'All miles look plausible')
+
+
+        async def show_flags(estimates):
+            load_table.flag_miles(estimates)
+            existing_loads.update()
+
+
+        check_button = ft.TextButton(
+            "Check miles",
+            icon=ft.Icons.RULE_ROUNDED,
+            on_click=lambda e: page.run_thread(run_miles_check),
+            style=ft.ButtonStyle(
+                color=defaultFontColor,
+                text_style=ft.TextStyle(size=buttonFontSize, font_family='lato-regular')
+            )
+        )
+
+
+        # Define Pagination Controls
+        load_more_button = ft.TextButton(
+            "Load more",
+            on_click=load_more,
+            icon=ft.Icons.EXPAND_MORE_ROUNDED,
+            visible=self.has_more,
+            style=ft.ButtonStyle(
+                color=defaultFontColor,
+                text_style=ft.TextStyle(size=buttonFontSize, font_family='lato-regular')
+            )
+        )
+        page_size_dropdown = ft.Dropdown(
+            label="Rows per page",
+            width=160,
+            value=str(self.page_size),
+            options=[ft.dropdown.Option(str(size)) for size in PAGE_SIZES],
+            on_change=change_page_size,
+        )
+
+        # Define Filter Bar
+        def filter_field(label, width, value=None):
+            return ft.TextField(
+                label=label,
+                value=value,
+                width=width,
+                dense=True,
+                text_size=smallFontSize,
+                on_change=apply_filter,
+            )
+
+        filter_search = filter_field("Search", 220, self.load_filter.search)
+        filter_search.prefix_icon = ft.Icons.SEARCH_ROUNDED
+        filter_from = filter_field("From (YYYY-MM-DD)", 150, self.load_filter.start_date and str(self.load_filter.start_date))
+        filter_to = filter_field("To (YYYY-MM-DD)", 150, self.load_filter.end_date and str(self.load_filter.end_date))
+        filter_driver = filter_field("Driver", 140, self.load_filter.driver)
+        filter_company = filter_field("Company", 140, self.load_filter.company)
+        filter_origin = filter_field("Origin ST", 90, self.load_filter.origin_state)
+        filter_dest = filter_field("Dest ST", 90, self.load_filter.dest_state)
+        filter_rate = filter_field("Min $/mi", 90,
+                                   None if self.load_filter.min_rate_per_mile is None else str(self.load_filter.min_rate_per_mile))
+        filter_fields = [filter_search, filter_from, filter_to, filter_driver, filter_company, filter_origin, filter_dest, filter_rate]
+        filter_bar = ft.Row(
+            controls = filter_fields + [
+                ft.IconButton(icon=ft.Icons.FILTER_ALT_OFF_ROUNDED, tooltip="Clear filters", on_click=clear_filter),
+            ],
+            wrap = True,
+        )
+
 
         # Define New Load
         def new_load(e):
-            show_form = add_load(self, page, refresh_callback=refresh_loads)
+            show_form = add_load(self, page)
             show_form(e)
 
-        
+
+        page.run_task(first_load)
+
         return ft.View(
             '/loadsPage',
             bgcolor = defaultBackgroundColor,
@@ -196,9 +577,25 @@ class MyLoads:
                                         controls = [
                                             create_header('Loads', new_load),
                                             ft.Divider(),
-                                            ft.Container(
-                                                content = existing_loads,
-                                                padding = ft.padding.all(10)),
+                                            ft.Row(
+                                                controls = [
+                                                    ft.Container(content = filter_bar, expand = True),
+                                                    task_progress, import_button, export_button, check_button, page_size_dropdown,
+                                                ],
+                                                alignment = ft.MainAxisAlignment.END,
+                                            ),
+                                            ft.Column(
+                                                controls = [
+                                                    ft.Container(
+                                                        content = existing_loads,
+                                                        padding = ft.padding.all(10)),
+                                                    load_more_button,
+                                                ],
+                                                scroll = ft.ScrollMode.AUTO,
+                                                on_scroll = handle_scroll,
+                                                horizontal_alignment = ft.CrossAxisAlignment.CENTER,
+                                                expand = True,
+                                            ),
                                         ],
                                         horizontal_alignment = ft.CrossAxisAlignment.CENTER,
                                     ),
@@ -1,8 +1,7 @@
 # Imports
 import os
 import flet as ft
-#from config import supabase
-from config import supabase
+from config import client_pool
 from flet_route import Params, Basket
 from assets.styles import *
 from helper_functions import show_message, validate_email, create_snackbar, create_logo
@@ -10,7 +9,7 @@ from helper_functions import show_message, validate_email, create_snackbar, crea
 
 class LoginPage:
     def __init__(self):
-        self.supabase = supabase
+        self.supabase = client_pool.anonymous() if client_pool else None
         self.error_snackbar = create_snackbar(ft.Colors.RED_600)
         self.success_snackbar = create_snackbar(ft.Colors.GREEN_600)
 
@@ -73,6 +72,9 @@ class LoginPage:
         def reset_form():
             self.password_input.content.value = ''
 
+        # The token manager loads the replica and realtime, so it is imported once a login is attempted
+        from token_manager import token_manager
+
         # Log in User if Success
         try:
             response = self.supabase.auth.sign_in_with_password({'email': email, 'password': password})
@@ -81,6 +83,7 @@ class LoginPage:
             page.client_storage.set('user_id', user_id)
             page.client_storage.set('access_token', session.access_token)
             page.client_storage.set('refresh_token', session.refresh_token)
+            token_manager.start(page, user_id, session.access_token, session.refresh_token, session.expires_at)
             reset_form()
             page.go('/dashboard')  
         except Exception as error:
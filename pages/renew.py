@@ -1,12 +1,12 @@
 import flet as ft
-from config import supabase
+from config import client_pool
 from flet_route import Params, Basket
 from assets.styles import *
 from helper_functions import show_message, validate_email, create_snackbar, create_logo
 
 class RenewCredentials:
     def __init__(self):
-        self.supabase = supabase
+        self.supabase = client_pool.anonymous() if client_pool else None
         self.error_snackbar = create_snackbar(ft.Colors.RED_600)
         self.success_snackbar = create_snackbar(ft.Colors.GREEN_600)
         
@@ -1,6 +1,6 @@
 # Imports
 import flet as ft
-from config import supabase
+from config import client_pool
 from flet_route import Params, Basket
 from assets.styles import *
 from helper_functions import show_message, validate_email, create_snackbar, create_logo
@@ -8,7 +8,7 @@ from helper_functions import show_message, validate_email, create_snackbar, crea
 
 class SignupPage:
     def __init__(self):
-        self.supabase = supabase
+        self.supabase = client_pool.anonymous() if client_pool else None
         self.error_snackbar = create_snackbar(ft.Colors.RED_600)
         self.success_snackbar = create_snackbar(ft.Colors.GREEN_600)
     
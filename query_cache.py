@@ -0,0 +1,102 @@
+# Imports
+import time
+import asyncio
+import threading
+from load_store import load_store
+from aggregation import parse_date
+
+
+DASHBOARD_CACHE_TTL = 120  # Seconds; writes invalidate earlier, this only bounds missed changes
+
+
+class QueryCache:
+    """Per-dispatcher cache of query results over date windows, with TTL.
+
+    Entries are keyed by the caller (query name, window, resolution...) and
+    remember their [start, end) window, so a change to one date only drops
+    the results whose window covers it. Concurrent requests for the same key
+    share one in-flight query.
+    """
+
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}  # user_id -> {key: {'future', 'start', 'end', 'expires_at'}}
+
+
+    # Define Cached Read
+    async def get(self, user_id: str, key, start, end, loader: callable):
+        """Returns the cached result for key, running loader() on a miss or after expiry."""
+        now = time.monotonic()
+        with self.lock:
+            entries = self.entries.setdefault(user_id, {})
+            for stale in [k for k, entry in entries.items() if entry['expires_at'] <= now]:
+                del entries[stale]
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = {
+                    'future': asyncio.ensure_future(loader()),
+                    'start': parse_date(start),
+                    'end': parse_date(end),
+                    'expires_at': now + self.ttl,
+                }
+        try:
+            # Shielded: a caller timing out does not cancel the shared query
+            return await asyncio.shield(entry['future'])
+        except Exception:
+            with self.lock:
+                if self.entries.get(user_id, {}).get(key) is entry:
+                    del self.entries[user_id][key]
+            raise
+
+
+    # Define Invalidation (one date, or everything of a dispatcher)
+    def invalidate(self, user_id: str, date=None):
+        date = parse_date(date) if date else None
+        with self.lock:
+            entries = self.entries.get(user_id, {})
+            for key in [k for k, entry in entries.items() if date is None or entry['start'] <= date < entry['end']]:
+                del entries[key]
+
+
+    # Define Store Change Handling
+    def on_store_change(self, user_id: str, event: str, load, old):
+        if event in ('insert', 'delete'):
+            self.invalidate(user_id, load['date'])
+        elif event == 'update':
+            self.invalidate(user_id, load['date'])
+            self.invalidate(user_id, old['date'] if old else None)
+        elif event == 'reload' and not load:
+            # A first pull completed: results read remotely until now are dropped
+            self.invalidate(user_id)
+        elif event == 'reload':
+            for date in {item['date'] for item in load}:
+                self.invalidate(user_id, date)
+
+
+dashboard_cache = QueryCache()
+watched_users = {}  # user_id -> unsubscribe
+watched_users_lock = threading.Lock()
+
+
+# Define Per-Dispatcher Invalidation (register before page listeners re-read)
+def watch_dashboard_cache(user_id: str, cache: QueryCache = dashboard_cache, store = load_store):
+    with watched_users_lock:
+        if user_id in watched_users:
+            return
+        watched_users[user_id] = store.subscribe(
+            user_id, lambda event, load, old: cache.on_store_change(user_id, event, load, old)
+        )
+
+
+# Define Cache Release (the dispatcher's last session ended)
+def release_dashboard_cache(user_id: str, cache: QueryCache = dashboard_cache):
+    with watched_users_lock:
+        unsubscribe = watched_users.pop(user_id, None)
+    if unsubscribe:
+        unsubscribe()
+    with cache.lock:
+        cache.entries.pop(user_id, None)
+
+
+load_store.release_hooks.append(release_dashboard_cache)
@@ -1,28 +1,79 @@
-# Imports 
+# Imports
+import importlib
+import threading
 import flet as ft
 from flet_route import Routing, path
-from pages.login import LoginPage
-from pages.signup import SignupPage
-from pages.dashboard import DispatcherMain
-from pages.renew import RenewCredentials
-from pages.loads import MyLoads
-from pages.setup_db import SetupDBPage
+
+
+# Route Registry: url, clear, page module, page class
+ROUTES = [
+    ('/', True, 'pages.login', 'LoginPage'),
+    ('/signup', False, 'pages.signup', 'SignupPage'),
+    ('/setup_db', False, 'pages.setup_db', 'SetupDBPage'),
+    ('/dashboard', True, 'pages.dashboard', 'DispatcherMain'),
+    ('/renew', False, 'pages.renew', 'RenewCredentials'),
+    ('/loadsPage', False, 'pages.loads', 'MyLoads'),
+]
+
+# Routes likely to be opened next, warmed in the background after a route renders
+PREWARM_ROUTES = {
+    '/': ['/dashboard'],
+    '/signup': ['/'],
+    '/setup_db': ['/'],
+    '/renew': ['/'],
+    '/dashboard': ['/loadsPage'],
+    '/loadsPage': ['/dashboard'],
+}
+
+
+class LazyPage:
+    """Imports a page module and instantiates its class on first use."""
+
+    def __init__(self, module: str, class_name: str):
+        self.module = module
+        self.class_name = class_name
+        self.instance = None
+        self.lock = threading.Lock()
+
+
+    # Define Page Loading
+    def load(self):
+        with self.lock:
+            if self.instance is None:
+                page_class = getattr(importlib.import_module(self.module), self.class_name)
+                self.instance = page_class()
+        return self.instance
+
 
 class Router:
     def __init__(self, page: ft.Page):
         self.page = page
+        self.pages = {url: LazyPage(module, class_name) for url, _, module, class_name in ROUTES}
         self.app_routes = [
-            path(url='/', clear=True, view=LoginPage().view),
-            path(url='/signup', clear=False, view=SignupPage().view),
-            path(url='/setup_db', clear=False, view=SetupDBPage().view),
-            path(url='/dashboard', clear=True, view=DispatcherMain().view),
-            path(url='/renew', clear=False, view=RenewCredentials().view),
-            path(url='/loadsPage', clear=False, view=MyLoads().view),
-            
+            path(url=url, clear=clear, view=self.lazy_view(url))
+            for url, clear, _, _ in ROUTES
         ]
 
         Routing(
             page=self.page,
             app_routes=self.app_routes,
         )
-        #self.page.go(self.page.route)
\ No newline at end of file
+        #self.page.go(self.page.route)
+
+
+    # Define Lazy View
+    def lazy_view(self, url: str):
+        def view(page, params, basket):
+            result = self.pages[url].load().view(page, params, basket)
+            page.run_thread(self.prewarm, url)
+            return result
+        return view
+
+
+    # Define Background Prewarming of Likely-Next Routes
+    def prewarm(self, url: str):
+        for next_url in PREWARM_ROUTES.get(url, []):
+            try:
+                self.pages[next_url].load()
+            except Exception:
+                pass
@@ -0,0 +1,109 @@
+# Imports
+import threading
+from load_store import load_store
+
+
+class StoreIndex:
+    """Base of in-memory indexes over one dispatcher's loads, kept current from store events.
+
+    Subclasses implement add(load) and remove(load_id) and keep the indexed
+    load ids as the keys of self.docs.
+    """
+
+    def __init__(self, store = load_store):
+        self.store = store
+        self.docs = {}
+        self.unsubscribe = lambda: None
+
+
+    def __len__(self):
+        return len(self.docs)
+
+
+    # Define Store Change Handling
+    def on_store_change(self, event: str, load, old):
+        if event in ('insert', 'update'):
+            self.add(load)
+        elif event == 'delete':
+            self.remove(load['id'])
+        elif event == 'rekey':
+            self.remove(old)
+            self.add(load)
+        elif event == 'reload':
+            # Batches only ever drop temporary ids; re-check those and the batch's own
+            candidates = {load_id for load_id in list(self.docs) if load_id < 0} | {item['id'] for item in load}
+            present = self.store.existing_ids(candidates)
+            for load_id in candidates - present:
+                self.remove(load_id)
+            for item in load:
+                if item['id'] in present:
+                    self.add(item)
+
+
+class IndexRegistry:
+    """One index per dispatcher, built from the local replica on first use.
+
+    The build runs outside the registry lock, so building one dispatcher's
+    index never holds up lookups of the others; concurrent first uses of the
+    same dispatcher wait for the one build. Indexes are dropped with the
+    store's release of their dispatcher.
+    """
+
+    def __init__(self, index_class: type, columns: list, store = load_store):
+        self.index_class = index_class
+        self.columns = columns
+        self.store = store
+        self.lock = threading.Lock()
+        self.indexes = {}  # user_id -> (index, built event)
+        store.release_hooks.append(self.release)
+
+
+    # Define Index Lookup
+    def get(self, user_id: str):
+        with self.lock:
+            entry = self.indexes.get(user_id)
+            building = entry is None
+            if building:
+                entry = self.indexes[user_id] = (self.index_class(self.store), threading.Event())
+        index, built = entry
+        if not building:
+            built.wait()
+            with self.lock:
+                if self.indexes.get(user_id) is not entry:
+                    # The build failed or the index was released; try again
+                    return self.get(user_id)
+            return index
+        try:
+            self.build(user_id, index)
+        except Exception:
+            with self.lock:
+                if self.indexes.get(user_id) is entry:
+                    del self.indexes[user_id]
+            raise
+        finally:
+            built.set()
+        with self.lock:
+            released = self.indexes.get(user_id) is not entry
+        if released:
+            # Released while building; serve this caller but stop following the store
+            index.unsubscribe()
+        return index
+
+
+    # Define Index Build (subscribed first, so changes made during the read are not missed)
+    def build(self, user_id: str, index: StoreIndex):
+        index.unsubscribe = self.store.subscribe(user_id, index.on_store_change)
+        try:
+            for load in self.store.fetch_all(user_id, self.columns):
+                index.add(load)
+        except Exception:
+            index.unsubscribe()
+            raise
+
+
+    # Define Index Release (the dispatcher's last session ended)
+    def release(self, user_id: str):
+        with self.lock:
+            entry = self.indexes.pop(user_id, None)
+        if entry is not None and entry[1].is_set():
+            entry[0].unsubscribe()
@@ -0,0 +1,10 @@
+# Test setup: an in-memory replica and no Supabase project, so nothing touches disk or network
+import os
+import sys
+
+os.environ['LOAD_STORE_PATH'] = ':memory:'
+os.environ['ZIP_CACHE_PATH'] = ':memory:'
+os.environ['ZIP_TABLE_PATH'] = ''  # Tests seed the ZIPs they use; the bundled table is tested on its own
+os.environ['SUPABASE_URL'] = ''
+os.environ['SUPABASE_KEY'] = ''
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,21 @@
+# Imports
+import pytest
+from aggregation import range_resolution, range_window, bucket_keys, MAX_CHART_POINTS
+
+
+@pytest.mark.parametrize('start, end, resolution', [
+    ('2026-03-01', '2026-03-31', 'day'),
+    ('2026-01-01', '2026-07-01', 'week'),
+    ('2024-01-01', '2026-07-01', 'month'),
+    ('2020-01-01', '2026-01-01', 'quarter'),
+    ('1996-01-01', '2026-01-01', 'year'),
+])
+def test_range_resolution_keeps_charts_within_max_points(start, end, resolution):
+    assert range_resolution(start, end) == resolution
+    assert len(bucket_keys(start, end, resolution)) <= MAX_CHART_POINTS
+
+
+def test_ranges_too_long_to_chart_are_rejected():
+    start, end = range_window('custom', start='1950-01-01', end='2026-12-31')
+    with pytest.raises(ValueError):
+        range_resolution(start, end)
@@ -0,0 +1,52 @@
+# Imports
+import pytest
+from load_store import LoadStore
+from analytics import LoadHistory, HISTORY_COLUMNS, watch_history, load_history, history_cache
+
+
+USER = 'dispatcher@example.com'
+
+
+def new_load(load_id: int, date: str, **values) -> dict:
+    return {
+        'id': load_id, 'date': date, 'company_name': 'Acme', 'driver_name': 'Ann', 'origin': 'Dallas, TX',
+        'destination': 'Tulsa, OK', 'miles_driven': 260, 'deadhead': 20, 'total_miles': 280,
+        'total_rate': 700, 'rate_per_mile': 2.5, 'dispatcher_name': USER, **values
+    }
+
+
+@pytest.fixture
+def store():
+    history_cache.pop(USER, None)
+    return LoadStore(':memory:')
+
+
+def test_rekey_after_the_server_row_arrived_first():
+    history = LoadHistory().inserted(new_load(-1, '2026-03-02')).inserted(new_load(101, '2026-03-02'))
+
+    history = history.rekeyed(-1, 101)
+
+    assert history.ids.tolist() == [101]
+
+
+def test_merged_keeps_date_order_and_drops_ids():
+    history = LoadHistory().merged([new_load(1, '2026-03-05'), new_load(-1, '2026-03-01'), new_load(2, '2026-03-03')])
+
+    history = history.merged([new_load(3, '2026-03-04'), new_load(2, '2026-03-06', total_rate=900)], dropped=[-1])
+
+    assert history.ids.tolist() == [3, 1, 2]
+    assert history.total_rate.tolist() == [700, 700, 900]
+    assert [str(date) for date in history.dates] == ['2026-03-04', '2026-03-05', '2026-03-06']
+
+
+def test_batch_changes_update_the_cached_history(store):
+    watch_history(USER, store)
+    store.add_many([new_load(None, '2026-03-02'), new_load(None, '2026-03-03')])
+    assert len(load_history(USER, store)) == 2
+
+    store.apply_remote(USER, [new_load(101, '2026-03-01'), new_load(102, '2026-03-04')])
+    history = history_cache[USER]['history']
+
+    assert history is not None
+    assert history.ids.tolist() == [101, -1, -2, 102]
+    assert history.ids.tolist() == [row[0] for row in store.fetch_columns(USER, HISTORY_COLUMNS)]
@@ -0,0 +1,62 @@
+# Imports
+import pytest
+from load_store import LoadStore
+from zip_lookup import zip_cache
+from lane_index import LaneIndex
+from store_index import IndexRegistry
+
+
+USER = 'dispatcher@example.com'
+COLUMNS = ['id', 'date', 'origin', 'destination', 'rate_per_mile']
+
+
+def new_load(origin: str, destination: str, rate: float, **values) -> dict:
+    return {
+        'date': '2026-03-02', 'company_name': 'Acme', 'driver_name': 'Ann', 'origin': origin,
+        'destination': destination, 'miles_driven': 260, 'deadhead': 20, 'total_miles': 280,
+        'total_rate': rate * 260, 'rate_per_mile': rate, 'dispatcher_name': USER, **values
+    }
+
+
+@pytest.fixture
+def store():
+    zip_cache.db.execute('DELETE FROM zips')
+    zip_cache.version += 1
+    return LoadStore(':memory:')
+
+
+def test_index_follows_store_changes(store):
+    store.add(new_load('Dallas, TX', 'Tulsa, OK', 2.0))
+    registry = IndexRegistry(LaneIndex, COLUMNS, store)
+    index = registry.get(USER)
+    assert registry.get(USER) is index
+
+    load = store.add(new_load('Dallas, TX', 'Tulsa, OK', 3.0))
+    assert index.benchmark('Dallas, TX', 'Tulsa, OK')['median'] == 2.5
+
+    store.delete(USER, load['id'])
+    assert index.benchmark('Dallas, TX', 'Tulsa, OK')['count'] == 1
+
+
+def test_batch_reload_drops_rejected_temporary_ids(store):
+    index = IndexRegistry(LaneIndex, COLUMNS, store).get(USER)
+    loads = store.add_many([new_load('Dallas, TX', 'Tulsa, OK', 2.0), new_load('Dallas, TX', 'Tulsa, OK', 4.0)])
+    assert len(index) == 2
+
+    store._reject(USER, 0, 'insert_batch', loads, 'rejected')
+
+    assert len(index) == 0
+    assert index.benchmark('Dallas, TX', 'Tulsa, OK') is None
+
+
+def test_loads_are_refiled_when_their_place_gets_a_zip3(store):
+    store.add(new_load('Dallas, TX', 'Tulsa, OK', 2.0))
+    index = IndexRegistry(LaneIndex, COLUMNS, store).get(USER)
+    assert index.benchmark('Irving, TX', 'Broken Arrow, OK', '75202', '74104')['granularity'] == 'state'
+
+    zip_cache.set('75201', {'city': 'Dallas', 'state': 'TX'})
+    zip_cache.set('74103', {'city': 'Tulsa', 'state': 'OK'})
+
+    benchmark = index.benchmark('Irving, TX', 'Broken Arrow, OK', '75202', '74104')
+    assert benchmark['granularity'] == 'zip3'
+    assert benchmark['count'] == 1
@@ -0,0 +1,65 @@
+# Imports
+import csv
+import pytest
+from load_export import export_loads
+
+
+USER = 'dispatcher@example.com'
+
+
+class FakeLoads:
+    """Serves Loads rows to the keyset pages of iter_remote_pages."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.after = 0
+        self.size = None
+
+    def table(self, name):
+        return FakeLoads(self.rows)
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def execute(self):
+        rows = [dict(row) for row in self.rows if row['id'] > self.after][:self.size]
+        return type('Response', (), {'data': rows})
+
+
+ROWS = [
+    {'id': load_id, 'date': '2026-03-02', 'company_name': 'Acme', 'driver_name': 'Ann', 'origin': 'Dallas, TX',
+     'destination': 'Tulsa, OK', 'miles_driven': 260.0, 'deadhead': 20.0, 'total_miles': 280.0,
+     'total_rate': 700.0, 'rate_per_mile': 2.5, 'dispatcher_name': USER}
+    for load_id in range(1, 4)
+]
+
+
+def test_format_choice_wins_over_the_path(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'loads'
+
+    assert export_loads(FakeLoads(ROWS), USER, str(path), fmt='parquet') == 3
+    assert pq.read_table(path).column('id').to_pylist() == [1, 2, 3]
+
+
+def test_extension_decides_without_a_format(tmp_path):
+    path = tmp_path / 'loads.CSV'
+
+    export_loads(FakeLoads(ROWS), USER, str(path))
+
+    with open(path, newline='') as f:
+        assert [row['id'] for row in csv.DictReader(f)] == ['1', '2', '3']
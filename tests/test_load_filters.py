@@ -0,0 +1,105 @@
+# Imports
+import re
+import pytest
+from load_store import load_store
+from load_filters import LoadFilter
+
+
+USER = 'filters@example.com'
+
+LOADS = [
+    # id, date, company, driver, origin, destination, rate per mile
+    (1, '2026-03-01', 'Acme Freight', 'Ann Lee', 'Dallas, TX', 'Tulsa, OK', 2.50),
+    (2, '2026-03-02', 'Acme Freight', 'Bob Stone', 'Houston, TX', 'Denver, CO', 1.90),
+    (3, '2026-03-02', 'Blue Line Logistics', 'Ann Lee', 'Tulsa, OK', 'Dallas, TX', 3.10),
+    (4, '2026-03-05', 'Blue Line Logistics', 'Carla Diaz', 'Denver, CO', 'Phoenix, AZ', 2.05),
+    (5, '2026-03-09', 'Crete Carrier', 'Bob Stone', 'Phoenix, AZ', 'Houston, TX', 2.75),
+    (6, '2026-03-10', 'crete carrier', 'Dan Okafor', 'Austin, tx', 'Memphis, TN', 1.60),
+    (7, '2026-03-15', 'Dakota Hauling', 'Ann Leeds', 'Memphis, TN', 'Austin, TX', 2.20),
+    (8, '2026-03-31', 'Acme Freight', 'Carla Diaz', 'Tulsa, OK', 'Denver, CO', 2.00),
+]
+
+
+class FakeRest:
+    """Evaluates the PostgREST filters LoadFilter.apply adds, with PostgREST's semantics."""
+
+    def __init__(self):
+        self.predicates = []
+
+    def add(self, predicate):
+        self.predicates.append(predicate)
+        return self
+
+    def gte(self, column, value):
+        return self.add(lambda row: row[column] >= type(row[column])(value))
+
+    def lt(self, column, value):
+        return self.add(lambda row: row[column] < type(row[column])(value))
+
+    def ilike(self, column, pattern):
+        return self.add(lambda row: ilike(row[column], pattern))
+
+    def or_(self, filters):
+        conditions = [condition.split('.', 2) for condition in filters.split(',')]
+        return self.add(lambda row: any(ilike(row[column], pattern) for column, _, pattern in conditions))
+
+    def ids(self, rows) -> set:
+        return {row['id'] for row in rows if all(predicate(row) for predicate in self.predicates)}
+
+
+def ilike(value, pattern) -> bool:
+    regex = '.*'.join(re.escape(part) for part in pattern.split('*'))
+    return re.fullmatch(regex, value, re.IGNORECASE | re.DOTALL) is not None
+
+
+@pytest.fixture(scope='module')
+def rows():
+    rows = [
+        {'id': load_id, 'date': date, 'company_name': company, 'driver_name': driver, 'origin': origin,
+         'destination': destination, 'miles_driven': 500, 'deadhead': 0, 'total_miles': 500,
+         'total_rate': 500 * rate, 'rate_per_mile': rate, 'dispatcher_name': USER}
+        for load_id, date, company, driver, origin, destination, rate in LOADS
+    ]
+    load_store.apply_remote(USER, rows)
+    return rows
+
+
+def filtered_ids(rows, load_filter) -> tuple:
+    """The ids each compilation selects: Python check, local SQL, PostgREST."""
+    python = {row['id'] for row in rows if load_filter.matches(row)}
+    sql = {load['id'] for load in load_store.fetch_page(USER, page_size=100, load_filter=load_filter)}
+    rest = load_filter.apply(FakeRest()).ids(rows)
+    return python, sql, rest
+
+
+# The three compilations agree
+@pytest.mark.parametrize('values, expected', [
+    ({}, {1, 2, 3, 4, 5, 6, 7, 8}),
+    ({'start_date': '2026-03-02', 'end_date': '2026-03-09'}, {2, 3, 4, 5}),  # Both ends inclusive
+    ({'end_date': '2026-03-31'}, {1, 2, 3, 4, 5, 6, 7, 8}),
+    ({'driver': 'ann lee'}, {1, 3, 7}),
+    ({'company': '  CRETE '}, {5, 6}),
+    ({'origin_state': 'tx'}, {1, 2, 6}),
+    ({'dest_state': 'CO'}, {2, 8}),
+    ({'min_rate_per_mile': '2.05'}, {1, 3, 4, 5, 7}),
+    ({'origin_state': 'OK', 'dest_state': 'TX', 'min_rate_per_mile': 3}, {3}),
+    ({'search': 'acme den'}, {2, 8}),   # Every word must match, as a word prefix
+    ({'search': 'Blue'}, {3, 4}),
+    ({'search': 'zzz'}, set()),
+])
+def test_compilations_select_the_same_loads(rows, values, expected):
+    python, sql, rest = filtered_ids(rows, LoadFilter(**values))
+    assert python == sql == rest == expected
+
+
+# Typo tolerance (local search and pushed rows; the PostgREST fallback is substring only)
+def test_search_tolerates_typos_locally(rows):
+    python, sql, _ = filtered_ids(rows, LoadFilter(search='Dalas'))
+    assert python == sql == {1, 3}
+
+
+def test_filters_compare_by_value():
+    assert LoadFilter(driver=' Ann ') == LoadFilter(driver='Ann')
+    assert not LoadFilter(driver='  ')
+    with pytest.raises(ValueError):
+        LoadFilter(start_date='March')
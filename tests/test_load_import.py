@@ -0,0 +1,67 @@
+# Imports
+import csv
+import pytest
+from load_store import LoadStore
+from load_import import import_loads
+from zip_lookup import zip_cache
+
+
+USER = 'dispatcher@example.com'
+
+HEADER = ['Date', 'Broker', 'Driver', 'Pickup ZIP', 'Origin', 'Delivery ZIP', 'Destination', 'Miles', 'Deadhead', 'Rate']
+
+
+@pytest.fixture(autouse=True)
+def zips():
+    zip_cache.set('75201', {'city': 'Dallas', 'state': 'TX', 'latitude': 32.79, 'longitude': -96.80})
+    zip_cache.set('74103', {'city': 'Tulsa', 'state': 'OK', 'latitude': 36.15, 'longitude': -95.99})
+
+
+def write_rows(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_import_streams_valid_rows_in_batches_and_reports_the_rest(tmp_path):
+    path = write_rows(tmp_path / 'loads.csv', [
+        ['2026-03-02', 'Acme', 'Ann', '75201', 'Dallas, TX', '74103', 'Tulsa, OK', '260', '', '700'],
+        ['March 03, 2026', 'Acme', 'Bob', '75201', '', '74103', '', '255', '10', '650'],   # City and state from the ZIPs
+        ['2026-03-04', 'Acme', '', '75201', 'Dallas, TX', '74103', 'Tulsa, OK', '260', '0', '700'],
+        ['', '', '', '', '', '', '', '', '', ''],                                      # Blank rows are skipped
+        ['2026-03-05', 'Acme', 'Ann', '75201', 'Dallas, TX', '74103', 'Tulsa, OK', '900', '0', '700'],
+    ])
+    store = LoadStore(':memory:')
+    events = []
+    store.subscribe(USER, lambda event, load, old: events.append((event, len(load))))
+    progress = []
+
+    report = import_loads(path, USER, on_progress=lambda report: progress.append(report.imported), batch_size=2, store=store)
+
+    assert (report.processed, report.imported) == (4, 3)
+    assert report.errors == [(4, 'Missing fields: Driver Name')]
+    assert [line for line, _ in report.warnings] == [6]  # 900 miles for a ~300 mile lane
+    assert events == [('reload', 2), ('reload', 1)]
+    assert progress == [2, 3]
+    loads = sorted(store.fetch_all(USER), key=lambda load: load['date'])
+    assert [(load['date'], load['origin'], load['destination']) for load in loads[:2]] == [
+        ('2026-03-02', 'Dallas, TX', 'Tulsa, OK'), ('2026-03-03', 'Dallas, TX', 'Tulsa, OK')
+    ]
+    assert loads[1]['total_miles'] == 265
+
+
+def test_error_report_lists_errors_then_warnings(tmp_path):
+    path = write_rows(tmp_path / 'loads.csv', [
+        ['2026-03-02', 'Acme', '', '75201', 'Dallas, TX', '74103', 'Tulsa, OK', '260', '0', '700'],
+        ['2026-03-05', 'Acme', 'Ann', '75201', 'Dallas, TX', '74103', 'Tulsa, OK', '900', '0', '700'],
+    ])
+    report = import_loads(path, USER, store=LoadStore(':memory:'))
+
+    report.write_errors(str(tmp_path / 'errors.csv'))
+
+    with open(tmp_path / 'errors.csv', newline='') as f:
+        rows = list(csv.reader(f))
+    assert [row[0] for row in rows] == ['line', '2', '3']
+    assert rows[2][1].startswith('Imported with warning')
@@ -0,0 +1,58 @@
+# Imports
+import pytest
+from load_store import LoadStore
+from load_search import SearchIndex, matches_query
+
+
+LOADS = [
+    {'id': 1, 'company_name': 'Acme Freight', 'driver_name': 'Ann Lee', 'origin': 'Dallas, TX', 'destination': 'Tulsa, OK'},
+    {'id': 2, 'company_name': 'Acme Freight', 'driver_name': 'Bob Stone', 'origin': 'Houston, TX', 'destination': 'Denver, CO'},
+    {'id': 3, 'company_name': 'Dalton Transport', 'driver_name': 'Ann Lee', 'origin': 'Tulsa, OK', 'destination': 'Memphis, TN'},
+    {'id': 4, 'company_name': 'Crete Carrier', 'driver_name': 'Carla Diaz', 'origin': 'Denver, CO', 'destination': 'Phoenix, AZ'},
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(LoadStore(':memory:'))
+    for load in LOADS:
+        index.add(load)
+    return index
+
+
+# Ranking
+def test_prefix_matches_rank_above_typo_matches(index):
+    # "dalla" is a prefix of Dallas, and only a typo away from Dalton
+    assert index.search('dalla') == [1, 3]
+
+
+def test_every_word_must_match(index):
+    assert sorted(index.search('acme denver')) == [2]
+    assert index.search('acme memphis') == []
+
+
+def test_more_words_narrow_the_results(index):
+    assert sorted(index.search('ann tulsa')) == [1, 3]
+    assert index.search('ann tulsa memphis') == [3]
+
+
+def test_limit_and_empty_query(index):
+    assert len(index.search('ok', limit=1)) == 1
+    assert index.search('') == []
+
+
+# Incremental updates
+def test_updates_and_removals_are_searchable_at_once(index):
+    index.add({**LOADS[3], 'driver_name': 'Dana Price'})
+    index.remove(1)
+
+    assert index.search('carla') == []
+    assert index.search('dana') == [4]
+    assert index.search('dallas') == []
+    assert 'carla' not in index.postings
+
+
+# The index agrees with the single-load check used for pushed rows
+@pytest.mark.parametrize('query', ['dalla', 'acme den', 'tusla', 'crete phx', 'ann'])
+def test_index_agrees_with_matches_query(index, query):
+    assert set(index.search(query)) == {load['id'] for load in LOADS if matches_query(load, query)}
@@ -0,0 +1,244 @@
+# Imports
+import pytest
+from postgrest.exceptions import APIError
+from load_store import LoadStore, is_rejection, is_auth_error
+from load_events import LocalPublisher, attach_store
+
+
+USER = 'dispatcher@example.com'
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Just enough of the PostgREST query builder for LoadStore.push and pull."""
+
+    def __init__(self, server):
+        self.server = server
+        self.op = None
+        self.payload = None
+        self.filters = {}
+        self.after = 0
+        self.size = None
+
+    def select(self, columns):
+        self.op = 'select'
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = 'insert', payload
+        return self
+
+    def delete(self):
+        self.op = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        if self.server.errors:
+            raise self.server.errors.pop(0)
+        if self.op == 'insert':
+            return Response(self.server.insert(self.payload))
+        if self.op == 'select':
+            rows = [dict(row) for load_id, row in sorted(self.server.rows.items()) if load_id > self.after]
+            return Response(rows[:self.size])
+        return Response(self.server.delete(self.filters['id']))
+
+
+class FakeServer:
+    """In-memory Loads table. Inserts are published to the feed before the
+    response returns, like a Realtime event racing the HTTP reply."""
+
+    def __init__(self, feed: LocalPublisher = None):
+        self.feed = feed
+        self.rows = {}
+        self.next_id = 100
+        self.errors = []         # raised by the next requests, in order
+        self.hidden_ids = set()  # rows row level security keeps this user from deleting
+
+    def table(self, name):
+        return FakeQuery(self)
+
+    def insert(self, payload):
+        rows = []
+        for load in payload if isinstance(payload, list) else [payload]:
+            self.next_id += 1
+            row = {'id': self.next_id, **load}
+            self.rows[row['id']] = row
+            rows.append(dict(row))
+            if self.feed:
+                self.feed.publish('INSERT', dict(row))
+        return rows
+
+    def delete(self, load_id):
+        if load_id in self.hidden_ids or load_id not in self.rows:
+            return []
+        return [self.rows.pop(load_id)]
+
+
+def new_load(**values) -> dict:
+    return {
+        'date': '2026-03-02', 'company_name': 'Acme', 'driver_name': 'Ann', 'origin': 'Dallas, TX',
+        'destination': 'Tulsa, OK', 'miles_driven': 260, 'deadhead': 20, 'total_miles': 280,
+        'total_rate': 700, 'rate_per_mile': 2.5, 'dispatcher_name': USER, **values
+    }
+
+
+@pytest.fixture
+def store():
+    store = LoadStore(':memory:')
+    store.events = []
+    store.subscribe(USER, lambda event, load, old: store.events.append((event, load, old)))
+    return store
+
+
+def outbox(store) -> list:
+    return [row[0] for row in store.db.execute("SELECT op FROM outbox ORDER BY seq")]
+
+
+def local_ids(store) -> list:
+    return [load['id'] for load in store.fetch_all(USER, ['id'])]
+
+
+# Rejection versus retry by status
+@pytest.mark.parametrize('error', [
+    {'code': '23505', 'message': 'duplicate key value violates unique constraint'},  # 409
+    {'code': '23502', 'message': 'null value in column "date"'},                     # 400
+    {'code': '22P02', 'message': 'invalid input syntax for type numeric'},            # 400
+    {'code': 'PGRST204', 'message': "Could not find the 'miles' column"},            # 400
+    {'code': 422, 'message': 'JSON could not be generated'},                         # No JSON body
+])
+def test_permanent_errors_roll_the_write_back(store, error):
+    server = FakeServer()
+    server.errors.append(APIError(error))
+    load = store.add(new_load())
+
+    store.push(server, USER)
+
+    assert outbox(store) == []
+    assert local_ids(store) == []
+    assert [event for event, _, _ in store.events] == ['insert', 'delete', 'error']
+    assert store.events[1][1]['id'] == load['id']
+
+
+@pytest.mark.parametrize('error', [
+    {'code': 'PGRST301', 'message': 'JWT expired'},                                   # 401
+    {'code': '42501', 'message': 'new row violates row-level security policy'},       # 403
+    {'code': 401, 'message': 'JSON could not be generated'},
+    {'code': 408, 'message': 'JSON could not be generated'},
+    {'code': 429, 'message': 'JSON could not be generated'},
+    {'code': 502, 'message': 'JSON could not be generated'},                         # Gateway HTML page
+    {'code': 'PGRST000', 'message': 'Could not connect with the database'},           # 503
+    {'code': '57014', 'message': 'canceling statement due to statement timeout'},    # 500
+])
+def test_transient_errors_keep_the_write_queued(store, error):
+    server = FakeServer()
+    server.errors.append(APIError(error))
+    load = store.add(new_load())
+
+    with pytest.raises(APIError):
+        store.push(server, USER)
+    assert outbox(store) == ['insert']
+    assert local_ids(store) == [load['id']]
+
+    store.push(server, USER)
+    assert outbox(store) == []
+    assert local_ids(store) == [101]
+
+
+def test_auth_errors_are_recognized():
+    assert is_auth_error(APIError({'code': 'PGRST301'}))
+    assert is_auth_error(APIError({'code': '42501'}))
+    assert is_auth_error(APIError({'code': 401}))
+    assert not is_auth_error(APIError({'code': '23505'}))
+    assert not is_rejection(APIError({'code': 403}))
+
+
+# Rekey when the server row arrives first
+def test_rekey_after_the_server_row_arrived_first(store):
+    feed = LocalPublisher()
+    attach_store(feed, store, USER)
+    server = FakeServer(feed)
+    load = store.add(new_load())
+
+    store.push(server, USER)
+
+    assert local_ids(store) == [101]
+    assert outbox(store) == []
+    events = [(event, row['id'], old) for event, row, old in store.events]
+    assert events == [('insert', load['id'], None), ('insert', 101, None), ('rekey', 101, load['id'])]
+
+
+# Row level security zero-row deletes
+def test_delete_of_no_rows_is_a_rejection(store):
+    server = FakeServer()
+    store.add(new_load())
+    store.push(server, USER)
+    server.hidden_ids.add(101)
+    store.events.clear()
+
+    store.delete(USER, 101)
+    store.push(server, USER)
+
+    assert outbox(store) == []
+    assert local_ids(store) == [101]
+    assert server.rows.keys() == {101}
+    assert [event for event, _, _ in store.events] == ['delete', 'insert', 'error']
+
+
+def test_confirmed_delete_is_dropped_from_the_outbox(store):
+    server = FakeServer()
+    store.add(new_load())
+    store.push(server, USER)
+
+    store.delete(USER, 101)
+    store.push(server, USER)
+
+    assert outbox(store) == []
+    assert local_ids(store) == []
+    assert server.rows == {}
+
+
+# First pull
+def test_first_pull_marks_the_replica_initialized_when_complete(store, monkeypatch):
+    monkeypatch.setattr('load_store.PULL_PAGE_SIZE', 2)
+    server = FakeServer()
+    server.insert([new_load(date=f'2026-03-0{day}') for day in range(1, 6)])
+    initialized = []
+    store.subscribe(USER, lambda event, load, old: initialized.append(store.is_initialized(USER)))
+
+    store.ensure_initialized(server, USER)
+
+    assert local_ids(store) == [101, 102, 103, 104, 105]
+    events = [(event, [row['id'] for row in load] if event == 'reload' else load['id']) for event, load, _ in store.events]
+    assert events == [('reload', [101, 102]), ('reload', [103, 104]), ('insert', 105), ('reload', [])]
+    assert initialized == [False, False, False, True]
+
+
+# Sync worker stop
+def test_stopped_worker_exits_and_a_new_one_takes_over(store):
+    server = FakeServer()
+    worker = store.start_sync(USER, server)
+
+    store.stop_sync(USER)
+    worker.join(5)
+
+    assert not worker.is_alive()
+    assert store.start_sync(USER, server) is not worker
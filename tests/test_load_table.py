@@ -0,0 +1,86 @@
+# Imports
+from load_table import LoadTable, MILES_COLUMN
+
+
+def load(load_id, date, company='Acme', miles=260):
+    return {'id': load_id, 'date': date, 'company_name': company, 'driver_name': 'Ann', 'origin': 'Dallas, TX',
+            'destination': 'Tulsa, OK', 'miles_driven': miles, 'deadhead': 0, 'total_miles': miles,
+            'total_rate': '700', 'rate_per_mile': 2.5}
+
+
+def shown(table) -> list:
+    return [row.data for row in table.table.rows]
+
+
+def new_table(*loads) -> LoadTable:
+    table = LoadTable(on_delete=lambda load_id: None)
+    table.set(list(loads))
+    return table
+
+
+# Keyed row diffs
+def test_insert_places_the_row_and_keeps_the_others():
+    table = new_table(load(3, '2026-03-09'), load(1, '2026-03-01'))
+    rows = list(table.table.rows)
+
+    assert table.insert(load(2, '2026-03-05'))
+
+    assert shown(table) == [3, 2, 1]
+    assert table.table.rows[0] is rows[0] and table.table.rows[2] is rows[1]
+
+
+def test_older_loads_wait_for_their_page_while_more_remain():
+    table = new_table(load(3, '2026-03-09'))
+    table.has_more = True
+
+    assert not table.insert(load(1, '2026-03-01'))
+    assert shown(table) == [3]
+
+
+def test_update_rewrites_cells_in_place_or_moves_the_row():
+    table = new_table(load(3, '2026-03-09'), load(2, '2026-03-05'), load(1, '2026-03-01'))
+    row = table.rows[2]
+
+    table.update(load(2, '2026-03-05', company='Crete'))
+    assert table.rows[2] is row and row.cells[1].content.value == 'Crete'
+
+    table.update(load(2, '2026-03-10'))
+    assert shown(table) == [2, 3, 1]
+
+
+def test_remove_and_rekey():
+    table = new_table(load(-1, '2026-03-05'), load(1, '2026-03-01'))
+
+    assert table.rekey(-1, load(7, '2026-03-05'))
+    assert shown(table) == [7, 1]
+    assert table.remove(1)['id'] == 1
+    assert table.remove(1) is None
+    assert shown(table) == [7] and len(table) == 1
+
+
+def test_extend_skips_loads_already_shown():
+    table = new_table(load(3, '2026-03-09'))
+    table.extend([load(3, '2026-03-09'), load(2, '2026-03-05')])
+
+    assert shown(table) == [3, 2]
+
+
+def test_sort_reorders_the_existing_rows_by_typed_keys():
+    table = new_table(load(1, '2026-03-01', miles=90), load(2, '2026-03-02', miles=1000), load(3, '2026-03-03', miles=260))
+
+    table.sort('miles_driven', descending=False)
+    assert shown(table) == [1, 3, 2]  # Numeric, not text, order
+
+    table.insert(load(4, '2026-03-04', miles=500))
+    assert shown(table) == [1, 3, 4, 2]
+
+
+def test_flagged_miles_are_cleared_by_an_update():
+    table = new_table(load(1, '2026-03-01', miles=900))
+    table.flag_miles({1: 300.0})
+    text = table.rows[1].cells[MILES_COLUMN].content
+    assert text.tooltip and text.color
+
+    table.update(load(1, '2026-03-01', miles=300))
+
+    assert text.tooltip is None and text.color is None
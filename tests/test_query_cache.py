@@ -0,0 +1,85 @@
+# Imports
+import asyncio
+import pytest
+from query_cache import QueryCache
+
+
+USER = 'dispatcher@example.com'
+
+
+class Counter:
+    """Loader returning how many times it ran."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.calls
+
+
+def read(cache, key, start, end, loader):
+    return asyncio.run(cache.get(USER, key, start, end, loader))
+
+
+def test_hits_until_a_change_inside_the_window():
+    cache, march, april = QueryCache(), Counter(), Counter()
+    assert read(cache, 'march', '2026-03-01', '2026-04-01', march) == 1
+    assert read(cache, 'april', '2026-04-01', '2026-05-01', april) == 1
+
+    cache.on_store_change(USER, 'insert', {'date': '2026-03-31'}, None)
+
+    assert read(cache, 'march', '2026-03-01', '2026-04-01', march) == 2
+    assert read(cache, 'april', '2026-04-01', '2026-05-01', april) == 1  # End is exclusive
+
+
+def test_update_invalidates_the_old_and_new_dates():
+    cache, march, april = QueryCache(), Counter(), Counter()
+    read(cache, 'march', '2026-03-01', '2026-04-01', march)
+    read(cache, 'april', '2026-04-01', '2026-05-01', april)
+
+    cache.on_store_change(USER, 'update', {'date': '2026-04-02'}, {'date': '2026-03-02'})
+
+    assert read(cache, 'march', '2026-03-01', '2026-04-01', march) == 2
+    assert read(cache, 'april', '2026-04-01', '2026-05-01', april) == 2
+
+
+@pytest.mark.parametrize('batch, expected', [
+    ([{'date': '2026-04-10'}], 1),  # A batch outside the window keeps it
+    ([], 2),                        # The end of a first pull drops everything
+])
+def test_reload_batches(batch, expected):
+    cache, march = QueryCache(), Counter()
+    read(cache, 'march', '2026-03-01', '2026-04-01', march)
+
+    cache.on_store_change(USER, 'reload', batch, None)
+
+    assert read(cache, 'march', '2026-03-01', '2026-04-01', march) == expected
+
+
+def test_entries_expire_and_failures_are_not_cached():
+    cache = QueryCache(ttl=0)
+    counter = Counter()
+    read(cache, 'march', '2026-03-01', '2026-04-01', counter)
+    assert read(cache, 'march', '2026-03-01', '2026-04-01', counter) == 2
+
+    async def fail():
+        raise ConnectionError()
+
+    cache = QueryCache()
+    with pytest.raises(ConnectionError):
+        read(cache, 'march', '2026-03-01', '2026-04-01', fail)
+    assert read(cache, 'march', '2026-03-01', '2026-04-01', counter) == 3
+
+
+def test_concurrent_reads_share_one_query():
+    cache, counter = QueryCache(), Counter()
+
+    async def both():
+        return await asyncio.gather(
+            cache.get(USER, 'march', '2026-03-01', '2026-04-01', counter),
+            cache.get(USER, 'march', '2026-03-01', '2026-04-01', counter),
+        )
+
+    assert asyncio.run(both()) == [1, 1]
@@ -0,0 +1,82 @@
+# Imports
+import time
+import pytest
+import token_manager as token_module
+from load_store import load_store
+from load_events import attached_users, start_realtime
+from analytics import history_cache, watch_history
+from query_cache import watched_users, watch_dashboard_cache
+from load_search import search_indexes
+from token_manager import TokenManager
+
+
+USER = 'dispatcher@example.com'
+
+
+class FakePool:
+    """Records which token each dispatcher's shared client carries."""
+
+    def __init__(self):
+        self.tokens = {}
+        self.discarded = []
+
+    def get(self, user_id, access_token):
+        self.tokens[user_id] = access_token
+        return (user_id, access_token)
+
+    def discard(self, user_id):
+        self.tokens.pop(user_id, None)
+        self.discarded.append(user_id)
+
+
+class FakePage:
+    def __init__(self, session_id):
+        self.session_id = session_id
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(token_module, 'client_pool', pool)
+    return pool
+
+
+def test_clients_are_released_with_the_last_session(pool):
+    manager = TokenManager()
+    expires_at = time.time() + 3600
+    manager.start(FakePage('a'), USER, 'token-a', 'refresh-a', expires_at)
+    manager.start(FakePage('b'), USER, 'token-b', 'refresh-b', expires_at - 60)
+    load_store.start_sync(USER, pool.get(USER, 'token-b'))
+
+    manager.forget('a')
+
+    # The shared client moves to the remaining session's token
+    assert pool.tokens == {USER: 'token-b'}
+    assert pool.discarded == []
+    assert USER in load_store.workers
+
+    manager.forget('b')
+
+    assert pool.discarded == [USER]
+    assert USER not in load_store.workers
+
+
+def test_release_drops_the_dispatchers_listeners_and_caches(pool):
+    manager = TokenManager()
+    session = manager.start(FakePage('a'), USER, 'token-a', 'refresh-a', time.time() + 3600)
+    start_realtime(USER)
+    watch_history(USER)
+    watch_dashboard_cache(USER)
+    search_indexes.get(USER)
+    # A re-rendered page replaces its listener
+    session.listen('loads', lambda event, load, old: None)
+    session.listen('loads', lambda event, load, old: None)
+    assert len(load_store.listeners[USER]) == 4
+
+    manager.forget('a')
+
+    assert USER not in load_store.listeners
+    assert USER not in history_cache
+    assert USER not in watched_users
+    assert USER not in search_indexes.indexes
+    assert USER not in attached_users
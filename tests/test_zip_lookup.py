@@ -0,0 +1,54 @@
+# Imports
+import os
+from zip_lookup import ZipCache
+from mileage import estimate_miles
+
+
+BUNDLED_TABLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'zip_codes.csv.gz')
+
+
+# Bundled centroid table
+def test_bundled_table_is_imported_on_the_first_lookup():
+    cache = ZipCache(':memory:', table_path=BUNDLED_TABLE)
+    assert cache.db.execute('SELECT COUNT(*) FROM zips').fetchone()[0] == 0
+
+    info = cache.get('75201')
+
+    assert (info['city'], info['state']) == ('Dallas', 'TX')
+    assert cache.db.execute('SELECT COUNT(*) FROM zips').fetchone()[0] > 40000
+    assert cache.load_table(BUNDLED_TABLE) == 0  # Unchanged file is not re-imported
+
+
+def test_bundled_table_gives_offline_estimates(monkeypatch):
+    cache = ZipCache(':memory:', table_path=BUNDLED_TABLE)
+    monkeypatch.setattr('mileage.zip_cache', cache)
+
+    # Dallas to Tulsa is about 260 road miles
+    assert 220 < estimate_miles('75201', '74103') < 320
+    assert estimate_miles('75201', '00000') is None
+
+
+# Cache expiry and eviction
+def test_entries_expire_after_the_ttl(monkeypatch):
+    cache = ZipCache(':memory:', ttl=60, table_path='')
+    now = 1_000_000.0
+    monkeypatch.setattr('zip_lookup.time.time', lambda: now)
+    cache.set('75201', {'city': 'Dallas', 'state': 'TX'})
+    cache.set('74103', {'city': 'Tulsa', 'state': 'OK'}, expires=False)
+
+    now += 61
+
+    assert cache.get('75201') is None
+    assert cache.get('74103')['city'] == 'Tulsa'
+
+
+def test_memory_keeps_the_most_recently_used_entries():
+    cache = ZipCache(':memory:', max_size=2, table_path='')
+    cache.set('75201', {'city': 'Dallas', 'state': 'TX'})
+    cache.set('74103', {'city': 'Tulsa', 'state': 'OK'})
+    cache.get('75201')
+    cache.set('80202', {'city': 'Denver', 'state': 'CO'})
+
+    assert list(cache.memory) == ['75201', '80202']
+    # Evicted entries are still served from disk
+    assert cache.get('74103')['city'] == 'Tulsa'
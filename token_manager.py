@@ -0,0 +1,194 @@
+# Imports
+import json
+import time
+import base64
+import threading
+from supabase_auth.errors import AuthApiError
+from config import client_pool
+from load_store import load_store
+from load_events import start_realtime, stop_realtime
+
+
+REFRESH_MARGIN = 120  # Seconds before expiry at which the access token is refreshed
+RETRY_DELAY = 30      # Seconds between attempts while the auth server is unreachable
+
+
+# Define Access Token Expiry (read from the JWT's exp claim)
+def token_expiry(access_token: str) -> float:
+    try:
+        payload = access_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except Exception:
+        return 0.0
+
+
+class AuthSession:
+    """A signed-in page session: its tokens, its authorized client and its pages' store listeners."""
+
+    def __init__(self, user_id: str, access_token: str, refresh_token: str, expires_at: float = None):
+        self.user_id = user_id
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at or token_expiry(access_token)
+        self.client = client_pool.get(user_id, access_token)
+        self.auth_client = None
+        self.page = None
+        self.timer = None
+        self.lock = threading.Lock()
+        self.listeners = {}  # page key -> unsubscribe
+
+
+    def expires_in(self) -> float:
+        return self.expires_at - time.time()
+
+
+    # Define Page Store Listener (replaces the page's previous one; removed when the session ends)
+    def listen(self, key: str, callback: callable):
+        unsubscribe = self.listeners.pop(key, None)
+        if unsubscribe:
+            unsubscribe()
+        self.listeners[key] = load_store.subscribe(self.user_id, callback)
+
+
+    def stop_listening(self):
+        while self.listeners:
+            _, unsubscribe = self.listeners.popitem()
+            unsubscribe()
+
+
+class TokenManager:
+    """Keeps each page session's access token fresh and its client authorized.
+
+    Sessions are cached by Flet session id, so navigating between pages
+    reuses the authorized client instead of re-reading client storage and
+    re-running set_session. Tokens are refreshed in the background shortly
+    before they expire, or at once if a page finds one already expired.
+
+    Sessions of one dispatcher share their clients and sync worker: these
+    carry the newest remaining session's token, and are released with the
+    dispatcher's caches and indexes when their last session ends.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+
+    # Define Session Registration (after sign in)
+    def start(self, page, user_id: str, access_token: str, refresh_token: str, expires_at: float = None) -> AuthSession:
+        self.forget(page.session_id)
+        session = AuthSession(user_id, access_token, refresh_token, expires_at)
+        session.page = page
+        with self.lock:
+            self.sessions[page.session_id] = session
+        self.schedule(page, session)
+        return session
+
+
+    # Define Session Lookup (restores from client storage after a restart)
+    def session(self, page) -> AuthSession | None:
+        """Returns the page's authorized session, or None if the user must log in again."""
+        with self.lock:
+            session = self.sessions.get(page.session_id)
+        if session is None:
+            user_id = page.client_storage.get('user_id')
+            access_token = page.client_storage.get('access_token')
+            refresh_token = page.client_storage.get('refresh_token')
+            if not user_id or not access_token or not refresh_token:
+                return None
+            session = self.start(page, user_id, access_token, refresh_token)
+        if session.expires_in() <= 0 and not self.refresh(page, session):
+            self.forget(page.session_id)
+            return None
+        return session
+
+
+    # Define Session Removal (sign out or disconnect)
+    def forget(self, session_id: str):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+            remaining = [other for other in self.sessions.values() if session and other.user_id == session.user_id]
+        if session is None:
+            return
+        if session.timer:
+            session.timer.cancel()
+        session.stop_listening()
+        if remaining:
+            # The shared clients may carry the ended session's token, which is no longer refreshed
+            newest = max(remaining, key=lambda other: other.expires_at)
+            newest.client = client_pool.get(newest.user_id, newest.access_token)
+            load_store.start_sync(newest.user_id, newest.client)
+            start_realtime(newest.user_id, newest.access_token)
+        else:
+            self.release(session.user_id)
+
+
+    # Define Dispatcher Release (their last session ended)
+    def release(self, user_id: str):
+        stop_realtime(user_id)
+        load_store.release(user_id)
+        client_pool.discard(user_id)
+
+
+    # Define Background Refresh Scheduling
+    def schedule(self, page, session: AuthSession, delay: float = None):
+        if delay is None:
+            # Tokens shorter-lived than the margin are refreshed at half their lifetime
+            delay = max(session.expires_in() - REFRESH_MARGIN, session.expires_in() / 2, 0)
+        if session.timer:
+            session.timer.cancel()
+        session.timer = threading.Timer(delay, self.refresh, (page, session))
+        session.timer.daemon = True
+        session.timer.start()
+
+
+    # Define Token Refresh
+    def refresh(self, page, session: AuthSession, force: bool = False) -> bool:
+        """Exchanges the refresh token for a new access token; returns False if it was rejected."""
+        with session.lock:
+            if not force and session.expires_in() > REFRESH_MARGIN:
+                # Already refreshed by another caller
+                return True
+            try:
+                if session.auth_client is None:
+                    session.auth_client = client_pool.anonymous()
+                response = session.auth_client.auth.refresh_session(session.refresh_token)
+            except AuthApiError:
+                # Refresh token revoked or expired: the user has to log in again
+                self.forget(page.session_id)
+                return False
+            except Exception:
+                # Auth server unreachable; pages keep working from the local replica
+                self.schedule(page, session, RETRY_DELAY)
+                return True
+
+            tokens = response.session
+            session.access_token = tokens.access_token
+            session.refresh_token = tokens.refresh_token
+            session.expires_at = tokens.expires_at or token_expiry(tokens.access_token)
+            session.client = client_pool.get(session.user_id, session.access_token)
+
+        page.client_storage.set('access_token', session.access_token)
+        page.client_storage.set('refresh_token', session.refresh_token)
+        load_store.start_sync(session.user_id, session.client)
+        start_realtime(session.user_id, session.access_token)
+        with self.lock:
+            if self.sessions.get(page.session_id) is session:
+                self.schedule(page, session)
+        return True
+
+
+    # Define Refresh of a Rejected Token (the sync worker got a 401/403)
+    def refresh_user(self, user_id: str) -> bool:
+        """Refreshes the dispatcher's newest session at once; False if it has none left."""
+        with self.lock:
+            sessions = [session for session in self.sessions.values() if session.user_id == user_id]
+        if not sessions:
+            return False
+        session = max(sessions, key=lambda session: session.expires_at)
+        return self.refresh(session.page, session, force=True)
+
+
+token_manager = TokenManager()
+load_store.on_auth_error = token_manager.refresh_user
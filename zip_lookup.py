@@ -0,0 +1,272 @@
+# Imports
+import os
+import csv
+import gzip
+import json
+import time
+import sqlite3
+import threading
+import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+
+ZIP_API_URL = 'https://api.zippopotam.us/us/{zip_code}'
+ZIP_CACHE_PATH = os.environ.get('ZIP_CACHE_PATH', 'zip_cache.sqlite3')
+# Bundled US ZIP centroids (zip,city,state,latitude,longitude; from the MIT-licensed zipcodes package)
+ZIP_TABLE_PATH = os.environ.get(
+    'ZIP_TABLE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'zip_codes.csv.gz')
+)
+ZIP_CACHE_TTL = 90 * 24 * 60 * 60  # ZIP → city/state changes very rarely
+ZIP_CACHE_SIZE = 4096
+ZIP_API_TIMEOUT = (3, 5)  # Connect / read seconds
+ZIP_DEBOUNCE = 0.3
+
+
+class ZipCache:
+    """In-memory LRU of ZIP lookups backed by an on-disk SQLite table with TTL.
+
+    The bundled centroid table is imported on the first lookup, so estimates
+    work offline without a separate loading step.
+    """
+
+    def __init__(self, path: str = ZIP_CACHE_PATH, ttl: int = ZIP_CACHE_TTL, max_size: int = ZIP_CACHE_SIZE,
+                 table_path: str = ZIP_TABLE_PATH):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.table_path = table_path
+        self.table_loaded = False
+        self.table_lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = 0  # Bumped on every write, so derived maps know when to re-read
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS zips ('
+            'zip TEXT PRIMARY KEY, city TEXT, state TEXT, '
+            'latitude REAL, longitude REAL, expires_at REAL)'
+        )
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.db.commit()
+
+
+    # Define Lazy Table Import (once per process; re-imported only when the file changed)
+    def ensure_table(self):
+        if self.table_loaded:
+            return
+        with self.table_lock:
+            if not self.table_loaded:
+                try:
+                    self.load_table(self.table_path)
+                finally:
+                    self.table_loaded = True
+
+
+    # Define Memory Insert (caller holds the lock)
+    def _remember(self, zip_code, info, expires_at):
+        self.memory[zip_code] = (info, expires_at)
+        self.memory.move_to_end(zip_code)
+        if len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+
+    # Define Cache Lookup
+    def get(self, zip_code: str) -> dict | None:
+        """Returns cached info for a ZIP, or None if missing or expired."""
+        self.ensure_table()
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(zip_code)
+            if entry is not None:
+                info, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self.memory.move_to_end(zip_code)
+                    return info
+                del self.memory[zip_code]
+
+            row = self.db.execute(
+                'SELECT city, state, latitude, longitude, expires_at FROM zips WHERE zip = ?',
+                (zip_code,)
+            ).fetchone()
+            if row is None or (row[4] is not None and row[4] <= now):
+                return None
+            info = {'city': row[0], 'state': row[1], 'latitude': row[2], 'longitude': row[3]}
+            self._remember(zip_code, info, row[4])
+            return info
+
+
+    # Define Cache Store
+    def set(self, zip_code: str, info: dict, expires: bool = True):
+        """Stores info for a ZIP in memory and on disk."""
+        expires_at = time.time() + self.ttl if expires else None
+        with self.lock:
+            self._remember(zip_code, info, expires_at)
+            self.db.execute(
+                'INSERT OR REPLACE INTO zips VALUES (?, ?, ?, ?, ?, ?)',
+                (zip_code, info['city'], info['state'], info.get('latitude'), info.get('longitude'), expires_at)
+            )
+            self.db.commit()
+            self.version += 1
+
+
+    # Define Reverse Lookup (ZIP counts per place and ZIP3, for each place's most common ZIP3)
+    def place_zip3s(self) -> list:
+        """Returns (city, state, ZIP3, number of known ZIPs) for every place and prefix, in one query."""
+        self.ensure_table()
+        with self.lock:
+            return self.db.execute(
+                'SELECT city, state, substr(zip, 1, 3), COUNT(*) FROM zips '
+                'GROUP BY city COLLATE NOCASE, state COLLATE NOCASE, substr(zip, 1, 3)'
+            ).fetchall()
+
+
+    # Define Bulk Centroid Lookup (coordinates never expire)
+    def centroids(self, zip_codes) -> dict:
+        """Returns {zip: (latitude, longitude)} for the given ZIPs with known coordinates."""
+        self.ensure_table()
+        with self.lock:
+            rows = self.db.execute(
+                'SELECT zip, latitude, longitude FROM zips '
+                'WHERE latitude IS NOT NULL AND zip IN (SELECT value FROM json_each(?))',
+                (json.dumps(sorted(set(map(str, zip_codes)))),)
+            ).fetchall()
+        return {zip_code: (latitude, longitude) for zip_code, latitude, longitude in rows}
+
+
+    def place_centroids(self) -> list:
+        """Returns (city, state, latitude, longitude) averaged over each place's known ZIPs."""
+        self.ensure_table()
+        with self.lock:
+            return self.db.execute(
+                'SELECT city, state, AVG(latitude), AVG(longitude) FROM zips '
+                'WHERE latitude IS NOT NULL GROUP BY city COLLATE NOCASE, state COLLATE NOCASE'
+            ).fetchall()
+
+
+    # Define Offline Table Loading
+    def load_table(self, path: str = ZIP_TABLE_PATH) -> int:
+        """Loads a zip,city,state[,latitude,longitude] CSV (optionally gzipped) as non-expiring entries.
+
+        The file is only re-imported when its modification time changes.
+        """
+        if not path or not os.path.exists(path):
+            return 0
+        stamp = str(os.path.getmtime(path))
+        with self.lock:
+            row = self.db.execute('SELECT value FROM meta WHERE key = ?', (path,)).fetchone()
+            if row and row[0] == stamp:
+                return 0
+
+            with (gzip.open(path, 'rt', newline='') if path.endswith('.gz') else open(path, newline='')) as f:
+                rows = [
+                    (
+                        r['zip'].zfill(5),
+                        r['city'],
+                        r['state'],
+                        float(r['latitude']) if r.get('latitude') else None,
+                        float(r['longitude']) if r.get('longitude') else None,
+                        None,
+                    )
+                    for r in csv.DictReader(f)
+                ]
+            self.db.executemany('INSERT OR REPLACE INTO zips VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (path, stamp))
+            self.db.commit()
+            self.memory.clear()
+            self.version += 1
+            return len(rows)
+
+
+zip_cache = ZipCache()
+
+
+# Pooled HTTP session so repeated lookups reuse the TLS connection
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
+zip_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='zip-lookup')
+
+
+# Define Remote ZIP Fetch
+def fetch_remote_zip(zip_code: str) -> dict | None:
+    """Queries zippopotam.us for a ZIP code."""
+    response = http_session.get(ZIP_API_URL.format(zip_code=zip_code), timeout=ZIP_API_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    place = response.json()['places'][0]
+    return {
+        'city': place['place name'],
+        'state': place['state abbreviation'],
+        'latitude': float(place['latitude']),
+        'longitude': float(place['longitude']),
+    }
+
+
+# Define ZIP Lookup
+def lookup_zip(zip_code: str) -> dict | None:
+    """Resolves a ZIP code to city/state, consulting the cache before the network."""
+    info = zip_cache.get(zip_code)
+    if info is None:
+        info = fetch_remote_zip(zip_code)
+        if info is not None:
+            zip_cache.set(zip_code, info)
+    return info
+
+
+class ZipResolver:
+    """Resolves ZIP codes off the UI thread with per-field debounce and cancellation.
+
+    Each field is identified by a key; a new request for a key supersedes any
+    pending or in-flight lookup for it, whose result is then discarded.
+    """
+
+    def __init__(self, debounce: float = ZIP_DEBOUNCE):
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.generations = {}
+
+
+    # Define Cancellation
+    def cancel(self, key):
+        """Drops any pending or in-flight lookup for a key."""
+        with self.lock:
+            generation = self.generations[key] = self.generations.get(key, 0) + 1
+            timer = self.timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        return generation
+
+
+    # Define Resolution
+    def resolve(self, key, zip_code: str, on_result: callable, on_error: callable = None):
+        """Schedules a lookup; callbacks run on a worker thread, only if still current."""
+        generation = self.cancel(key)
+
+        # Cache hits are answered immediately
+        info = zip_cache.get(zip_code)
+        if info is not None:
+            on_result(info)
+            return
+
+        def is_current():
+            return self.generations.get(key) == generation
+
+        def run():
+            if not is_current():
+                return
+            try:
+                info = lookup_zip(zip_code)
+            except Exception as ex:
+                if is_current() and on_error:
+                    on_error(ex)
+                return
+            if is_current() and info is not None:
+                on_result(info)
+
+        timer = threading.Timer(self.debounce, lambda: zip_executor.submit(run))
+        timer.daemon = True
+        with self.lock:
+            self.timers[key] = timer
+        timer.start()